@@ -22,7 +22,6 @@ from flask import current_app
 # --- Load .env file VERY EARLY --- 
 from dotenv import load_dotenv
 from flask import send_file
-import base64
 from backend.services.tts_service import TTSService, TTSServiceError
 import io
 # Construct the path to .env in the parent directory (project root)
@@ -62,7 +61,8 @@ import firebase_admin
 
 # Use absolute imports from backend package
 from backend.services import (AuthService, FirestoreService, StorageService, 
-                      DocumentRetrievalService, TTSService, STTService)
+                      DocumentRetrievalService, TTSService, STTService, TTSJobQueue,
+                      IngestionJobQueue, AudioInputStore)
 
 
 from backend.graphs.new_chat_graph import create_new_chat_graph # For general chat functionality
@@ -77,6 +77,7 @@ from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.runnables.graph import MermaidDrawMethod
 from langchain_core.runnables import RunnableConfig
 from backend.utils.message_utils import serialize_messages, deserialize_messages, serialize_deep, deserialize_deep
+from backend.utils.data_dir import get_data_dir
 from functools import wraps # Added for auth decorator
 
 # --- Authentication Decorator --- 
@@ -85,7 +86,7 @@ from backend.decorators.auth import require_auth
 
 # Import Blueprints using absolute paths
 from backend.routes.document_routes import document_bp
-from backend.routes.tts_routes import tts_bp
+from backend.routes.tts_routes import tts_bp, audio_response_fields
 from backend.routes.stt_routes import stt_bp
 from backend.routes.user_routes import user_bp
 from backend.routes.progress_routes import progress_bp
@@ -145,6 +146,16 @@ with app.app_context():
     if tts_service:
         app.config['TTS_SERVICE'] = tts_service
     stt_service = initialize_component(STTService, 'STTService', 'SERVICES')
+    # Background TTS pre-generation for uploaded documents (each gunicorn worker runs its own pool)
+    tts_job_queue = initialize_component(TTSJobQueue, 'TTSJobQueue', 'SERVICES')
+    if tts_job_queue:
+        app.config['TTS_JOB_QUEUE'] = tts_job_queue
+        tts_job_queue.start()
+    # Staged upload pipeline: GCS upload, DUA/text narrative, TTS queueing
+    ingestion_job_queue = initialize_component(IngestionJobQueue, 'IngestionJobQueue', 'SERVICES')
+    if ingestion_job_queue:
+        app.config['INGESTION_JOB_QUEUE'] = ingestion_job_queue
+        ingestion_job_queue.start()
     
     # Initialize DocumentRetrievalService with dependencies
     # Ensure firestore_service and storage_service are available before this
@@ -209,16 +220,7 @@ class DatabaseManager:
         self.flask_app = app # Store the app instance
         # Determine the absolute path for the SQLite databases
         # Priority: Env Var -> Docker Vol -> Local Fallback
-        if os.getenv('DATA_DIR'):
-            base_dir = os.getenv('DATA_DIR')
-        elif os.path.exists('/app/data'):
-            base_dir = '/app/data'
-        else:
-            # Local fallback: backend/data
-            base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-        
-        os.makedirs(base_dir, exist_ok=True)
-        APP_DIR = base_dir
+        APP_DIR = get_data_dir()
         
         # Initialize QuizGraph checkpointer
         QUIZ_DB_PATH = os.path.join(APP_DIR, "quiz_checkpoints.db")
@@ -376,18 +378,22 @@ def agent_chat_route():
     For audio uploads, supports two processing modes:
     - 'review': Returns only the transcribed text without processing with the agent
     - 'direct_send' (default): Processes the transcribed text with the agent
+
+    The agent's spoken response is returned as base64 in 'audio_content_base64', or with
+    audio_delivery='url' as an 'audio_url' to fetch from /api/tts/audio/<audio_id>.
     """
     try:
         user_id = g.user_id  # From @require_auth decorator
         effective_query = ""  # This will hold the text query for the supervisor
         thread_id = None
         document_id = None
-        audio_data_base64: Optional[str] = None
+        pending_audio_bytes: Optional[bytes] = None # Audio the supervisor still has to transcribe
         audio_bytes: Optional[bytes] = None # Store audio bytes for potential STT
         audio_format: Optional[str] = None
         stt_processing_mode = "direct_send"  # Default mode
         client_provided_transcript: Optional[str] = None
         interaction_mode: Optional[str] = None
+        audio_delivery = "inline"  # 'url' returns TTS audio as a separate /api/tts/audio resource
 
         if request.content_type.startswith('multipart/form-data'):
             initial_form_query = request.form.get('query', '') # Might be empty
@@ -396,6 +402,7 @@ def agent_chat_route():
             stt_processing_mode = request.form.get('stt_processing_mode', 'direct_send')
             client_provided_transcript = request.form.get('transcript')
             interaction_mode = request.form.get('mode')
+            audio_delivery = request.form.get('audio_delivery', 'inline')
             
             if 'audio_file' in request.files:
                 audio_file = request.files['audio_file']
@@ -404,24 +411,24 @@ def agent_chat_route():
                     current_app.logger.info(f"[API] Received audio file: {filename} from user {user_id}, processing mode: {stt_processing_mode}")
                     try:
                         audio_bytes = audio_file.read()
-                        audio_data_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+                        pending_audio_bytes = audio_bytes
                         ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else None
                         mimetype = audio_file.mimetype
                         if ext == 'mp3' or mimetype == 'audio/mpeg': audio_format = 'mp3'
                         elif ext == 'wav' or mimetype in ['audio/wav', 'audio/x-wav']: audio_format = 'wav'
                         elif ext == 'flac' or mimetype == 'audio/flac': audio_format = 'flac'
                         elif ext == 'webm' or mimetype == 'audio/webm' or mimetype == 'audio/webm;codecs=opus': audio_format = 'webm'
+                        elif ext in ('ogg', 'opus') or mimetype in ['audio/ogg', 'audio/ogg;codecs=opus']: audio_format = 'ogg'
                         else:
-                            current_app.logger.warning(f"[API] Warning: Unknown audio format (ext: {ext}, mime: {mimetype}). Defaulting to mp3.")
-                            audio_format = 'mp3'
-                        current_app.logger.info(f"[API] Processed audio. Format: {audio_format}, Base64 len: {len(audio_data_base64)}")
+                            # Guessing would send the wrong encoding to STT and fail with a misleading error
+                            current_app.logger.warning(f"[API] Rejecting audio in unknown format (ext: {ext}, mime: {mimetype}).")
+                            return jsonify({"error": "Unsupported audio format", "detail": f"Expected mp3, wav, flac, webm or ogg audio (got extension '{ext}', type '{mimetype}').", "thread_id": thread_id}), 400
+                        current_app.logger.info(f"[API] Processed audio. Format: {audio_format}, size: {len(audio_bytes)} bytes")
 
                         if stt_processing_mode == 'review':
                             # Transcribe and return immediately (existing logic)
                             stt_service = app.config['SERVICES']['STTService']
-                            success, result = stt_service.transcribe_audio_bytes(
-                                audio_bytes=audio_bytes
-                            )
+                            success, result = stt_service.transcribe(audio_bytes, audio_format=audio_format)
                             if success and 'transcript' in result:
                                 transcript_data_obj = result['transcript']
                                 actual_transcript_string = None
@@ -450,7 +457,7 @@ def agent_chat_route():
                             elif audio_bytes: # Ensure audio_bytes is available for STT
                                 stt_service = app.config['SERVICES']['STTService']
                                 current_app.logger.info(f"[API] Performing backend STT for direct_send (audio_format: {audio_format})")
-                                success, stt_result = stt_service.transcribe_audio_bytes(audio_bytes=audio_bytes)
+                                success, stt_result = stt_service.transcribe(audio_bytes, audio_format=audio_format)
                                 if success and stt_result and isinstance(stt_result.get('transcript'), dict) and 'transcript' in stt_result['transcript']:
                                     effective_query = stt_result['transcript']['transcript']
                                     current_app.logger.info(f"[API] Backend STT for direct_send successful: '{effective_query[:50]}...' ")
@@ -468,6 +475,9 @@ def agent_chat_route():
                                 # This case should ideally not be reached if 'audio_file' was present but audio_bytes is None
                                 current_app.logger.warning("[API] Warning: 'direct_send' mode with audio file, but no audio_bytes to transcribe and no client_transcript.")
                                 effective_query = initial_form_query # Fallback, likely empty
+                            if effective_query:
+                                # The utterance has a transcript; don't hand the audio to the supervisor to transcribe again
+                                pending_audio_bytes = None
                     except Exception as e:
                         current_app.logger.error(f"[API] Error processing audio file '{filename}': {e}")
                         traceback.print_exc() # Add traceback for better debugging
@@ -490,15 +500,19 @@ def agent_chat_route():
             stt_processing_mode = data.get('stt_processing_mode', 'direct_send') # Can be passed, though less common for JSON
             client_provided_transcript = data.get('transcript') # Also less common for JSON, but possible
             interaction_mode = data.get('mode')
+            audio_delivery = data.get('audio_delivery', 'inline')
             if client_provided_transcript and not effective_query: # If query is empty but transcript is there
                 effective_query = client_provided_transcript
         else:
             return jsonify({"error": "Unsupported content type. Use 'multipart/form-data' for audio or 'application/json' for text."}), 415
 
-        if not audio_data_base64 and not effective_query:
+        if not pending_audio_bytes and not effective_query:
              return jsonify({"error": "Query (text or transcribed audio) is required"}), 400
 
-        current_app.logger.info(f"[API] User: {user_id}, Thread: {thread_id}, Effective Query: '{effective_query[:50]}...', Audio: {'Yes' if audio_data_base64 else 'No'}, DocID: {document_id}, Mode: {stt_processing_mode}")
+        current_app.logger.info(f"[API] User: {user_id}, Thread: {thread_id}, Effective Query: '{effective_query[:50]}...', Audio: {'Yes' if pending_audio_bytes else 'No'}, DocID: {document_id}, Mode: {stt_processing_mode}")
+
+        # Audio goes to the supervisor by reference so it is never written to checkpoints
+        audio_blob_id = AudioInputStore().save(pending_audio_bytes, audio_format, user_id) if pending_audio_bytes else None
 
         db_manager = DatabaseManager(current_app)
 
@@ -522,8 +536,7 @@ def agent_chat_route():
                 quiz_complete=False,
                 quiz_cancelled=False,
                 quiz_ready_for_final_conclusion=None,
-                current_audio_input_base64=audio_data_base64, # Still pass for potential downstream use
-                current_audio_format=audio_format
+                current_audio_blob_id=audio_blob_id # Only set when the audio still needs transcribing
             )
             current_app.logger.info(f"[API] Invoking supervisor for new thread {thread_id} with initial state.")
         else:
@@ -552,8 +565,7 @@ def agent_chat_route():
                 user_id=user_id,
                 current_query=effective_query, # Use effective_query
                 interaction_mode=resolved_interaction_mode,
-                current_audio_input_base64=audio_data_base64,
-                current_audio_format=audio_format,
+                current_audio_blob_id=audio_blob_id,
                 document_id_for_action=document_id,
                 conversation_history=conversation_history,
                 active_quiz_thread_id=retrieved_state_values.get("active_quiz_thread_id"),
@@ -632,7 +644,7 @@ def agent_chat_route():
                 serializable_history.append({"type": "system", "content": str(msg.content)})
 
         # Generate TTS for the agent's response
-        audio_content_base64 = None
+        audio_fields = {"audio_content_base64": None}
         timepoints = None
         # Attempt to get TTSService from app config, falling back to direct instantiation if not found (for robustness)
         tts_service_instance = current_app.config.get('SERVICES', {}).get('TTSService')
@@ -650,7 +662,7 @@ def agent_chat_route():
                 if tts_response and tts_response.get("audio_content"):
                     audio_bytes = tts_response["audio_content"]
                     timepoints = tts_response.get("timepoints") # Extract timepoints
-                    audio_content_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+                    audio_fields = audio_response_fields(audio_bytes, tts_response.get("mime_type"), user_id, audio_delivery)
                     current_app.logger.info(f"[API] TTS generated {len(audio_bytes)} bytes and {len(timepoints) if timepoints else 0} timepoints for chat response.")
                 else:
                     current_app.logger.warning("[API] TTS synthesis returned no audio bytes for chat response.")
@@ -667,7 +679,7 @@ def agent_chat_route():
             "quiz_cancelled": result.get("quiz_cancelled", False),
             "document_id": result.get("document_id_for_action"),
             "processing_mode": stt_processing_mode,
-            "audio_content_base64": audio_content_base64,
+            **audio_fields,
             "timepoints": timepoints # Add this line
         }
         if result.get("supervisor_error_message"):
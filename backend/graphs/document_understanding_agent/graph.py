@@ -2,10 +2,11 @@ import os
 import json
 import uuid # For generating document_id if missing
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import sys
 import logging
 import asyncio
+import threading
 import mimetypes # For determining mimetype from file path
 
 # For loading .env file for local testing
@@ -13,7 +14,6 @@ from dotenv import load_dotenv
 
 # Gemini API SDK (replaces Vertex AI for access to gemini-3-flash-preview)
 import google.generativeai as genai
-from google.cloud import storage  # For downloading GCS files
 
 # LangGraph
 from langgraph.graph import StateGraph, END
@@ -23,6 +23,12 @@ from backend.graphs.document_understanding_agent.state import DocumentUnderstand
 
 # Firestore service for fetching user profile
 from backend.services.firestore_service import FirestoreService
+# Shared GCS client for downloading input files
+from backend.services.storage_service import StorageService
+
+# Page-range fan-out for large PDFs
+from backend.utils.pdf_pages import PageRange, count_pdf_pages, split_pdf, map_page_ranges
+from backend.utils.narrative_progress import PartialNarrativePublisher
 
 # --- Initialize Gemini API ---
 def initialize_gemini_api():
@@ -46,6 +52,22 @@ GEMINI_API_INITIALIZED = initialize_gemini_api()
 # --- Constants ---
 MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-3-flash-preview")
 
+# --- Page-parallel mode for large PDFs ---
+# PDFs with at least DUA_PARALLEL_MIN_PAGES pages are narrated in ranges of DUA_PAGES_PER_RANGE
+# pages, DUA_MAX_CONCURRENT_RANGES at a time; each range gets DUA_RANGE_MAX_ATTEMPTS tries.
+# DUA_PARALLEL_MIN_PAGES=0 always sends the whole file in one request.
+DUA_PARALLEL_MIN_PAGES = int(os.getenv("DUA_PARALLEL_MIN_PAGES", 12))
+DUA_PAGES_PER_RANGE = int(os.getenv("DUA_PAGES_PER_RANGE", 5))
+DUA_MAX_CONCURRENT_RANGES = int(os.getenv("DUA_MAX_CONCURRENT_RANGES", 4))
+DUA_RANGE_MAX_ATTEMPTS = int(os.getenv("DUA_RANGE_MAX_ATTEMPTS", 3))
+# Minimum time between writes of the in-progress narrative to dua_narrative_partial
+DUA_PARTIAL_FLUSH_SECONDS = float(os.getenv("DUA_PARTIAL_FLUSH_SECONDS", 2.0))
+
+# Appended to the prompt when the file is one page range of a longer PDF
+PAGE_RANGE_PROMPT_SUFFIX = """
+Note: The provided file contains pages {start_page} to {end_page} of a {total_pages}-page document. The narratives for all page ranges will be joined in page order, so narrate only these pages, start directly with their content, and do not add an introduction, a closing remark or a summary of the document as a whole.
+"""
+
 # --- Prompt for users WITH visual impairment (detailed visual descriptions) ---
 PROMPT_VISUALLY_IMPAIRED = """You are an advanced document analysis assistant. Your task is to analyze the provided document file, which may contain a mix of text, images, tables, and graphs/charts. Your goal is to produce a single, coherent, and detailed textual output that accurately represents the document's content as if you were meticulously reading it aloud for academic study by someone who cannot read the text visually, particularly a student with severe dyslexia. The output must be ready for clear and natural-sounding Text-to-Speech (TTS).
 
@@ -144,7 +166,7 @@ if not logger.hasHandlers(): # Configure basic logging if no handlers are found
 
 # --- Helper: Download file from GCS ---
 def download_gcs_file_to_bytes(gcs_uri: str) -> Optional[bytes]:
-    """Download a file from GCS and return its bytes."""
+    """Download a file from GCS and return its bytes, using StorageService's shared client."""
     try:
         # Parse gs://bucket/path format
         if not gcs_uri.startswith("gs://"):
@@ -159,8 +181,11 @@ def download_gcs_file_to_bytes(gcs_uri: str) -> Optional[bytes]:
         bucket_name = path_parts[0]
         blob_path = path_parts[1]
         
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
+        storage_service = StorageService()
+        if bucket_name == storage_service.bucket_name:
+            bucket = storage_service.bucket
+        else:
+            bucket = storage_service.storage_client.bucket(bucket_name)
         blob = bucket.blob(blob_path)
         
         file_bytes = blob.download_as_bytes()
@@ -170,6 +195,36 @@ def download_gcs_file_to_bytes(gcs_uri: str) -> Optional[bytes]:
         logger.error(f"Error downloading from GCS {gcs_uri}: {e}", exc_info=True)
         return None
 
+def _split_for_parallel_narration(file_bytes: bytes, mimetype: str, document_id: Optional[str]) -> Optional[List[PageRange]]:
+    """Page ranges for a PDF long enough for page-parallel narration, or None to send the file whole."""
+    if mimetype != "application/pdf" or DUA_PARALLEL_MIN_PAGES <= 0:
+        return None
+    try:
+        total_pages = count_pdf_pages(file_bytes)
+        if total_pages < DUA_PARALLEL_MIN_PAGES:
+            return None
+        return split_pdf(file_bytes, DUA_PAGES_PER_RANGE)
+    except Exception as e:
+        # An unreadable PDF may still be understood by the model as a whole
+        logger.warning(f"[{document_id}] Could not split PDF into page ranges ({e}); sending it whole.")
+        return None
+
+def _partial_narrative_publisher(state: DocumentUnderstandingState) -> Optional[PartialNarrativePublisher]:
+    """Publisher writing the in-progress narrative to the document, if the caller asked for it."""
+    document_id = state.get('document_id')
+    if not state.get('publish_partial_narrative') or not document_id:
+        return None
+    firestore_service = FirestoreService()
+
+    def write(text: str) -> None:
+        firestore_service.update_document(document_id, {
+            'dua_narrative_partial': text,
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        })
+        logger.info(f"[{document_id}] Published {len(text)} chars of partial narrative.")
+
+    return PartialNarrativePublisher(write, DUA_PARTIAL_FLUSH_SECONDS)
+
 # --- Fetch User Profile Node ---
 def fetch_user_profile_node(state: DocumentUnderstandingState) -> DocumentUnderstandingState:
     """Fetch user profile from Firestore and set visual_impairment flag."""
@@ -288,21 +343,95 @@ def generate_tts_narrative_node(state: DocumentUnderstandingState) -> DocumentUn
             selected_prompt = PROMPT_STANDARD
             logger.info(f"Using PROMPT_STANDARD for user without visual impairment.")
 
-        logger.info(f"Sending request to Gemini model: {MODEL_NAME} with prompt and document.")
-        response = model.generate_content(
-            [selected_prompt, file_data],
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
-        
-        if response.text:
-            tts_narrative = response.text
-            state['tts_ready_narrative'] = tts_narrative
-            logger.info(f"Successfully generated TTS narrative. Length: {len(tts_narrative)} chars.")
+        publisher = _partial_narrative_publisher(state)
+
+        def generate(prompt: str, data: Dict[str, Any], on_text=None) -> str:
+            # Streamed so the narrative can be published while the rest is being generated
+            response = model.generate_content(
+                [prompt, data],
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                stream=True
+            )
+            parts = []
+            for chunk in response:
+                try:
+                    piece = chunk.text
+                except ValueError:  # Chunk without text parts (e.g. only a finish reason)
+                    continue
+                if piece:
+                    parts.append(piece)
+                    if on_text:
+                        on_text("".join(parts))
+            text = "".join(parts)
+            if not text:
+                raise ValueError(f"LLM response was empty or malformed. Full response: {response}")
+            return text
+
+        page_ranges = _split_for_parallel_narration(file_bytes_content, input_mimetype, state.get('document_id'))
+        if page_ranges:
+            total_pages = page_ranges[-1].end_page
+            logger.info(f"Sending {len(page_ranges)} page ranges ({total_pages} pages) to Gemini model: {MODEL_NAME}, "
+                        f"{DUA_MAX_CONCURRENT_RANGES} at a time.")
+            # Text so far per range (keyed by start page); the published prefix is every
+            # finished range from the start plus the streaming text of the first unfinished one
+            range_text: Dict[int, str] = {}
+            finished_ranges = set()
+            # Ranges stream from several worker threads
+            range_lock = threading.Lock()
+
+            def published_text() -> str:
+                # Caller holds range_lock
+                parts = []
+                last_finished = False
+                for page_range in page_ranges:
+                    text = range_text.get(page_range.start_page)
+                    if text is None:
+                        break
+                    parts.append(text)
+                    last_finished = page_range.start_page in finished_ranges
+                    if not last_finished:
+                        break
+                # A finished range ends on a complete paragraph
+                return "\n\n".join(parts) + ("\n\n" if last_finished else "")
+
+            def narrate_range(page_range: PageRange) -> str:
+                prompt = selected_prompt + PAGE_RANGE_PROMPT_SUFFIX.format(
+                    start_page=page_range.start_page, end_page=page_range.end_page, total_pages=total_pages)
+                on_text = None
+                if publisher:
+                    with range_lock:
+                        # A retry starts over: drop the failed attempt's text, even if it was published
+                        if range_text.pop(page_range.start_page, None) is not None:
+                            publisher.rewind(published_text())
+
+                    def on_text(text: str) -> None:
+                        with range_lock:
+                            range_text[page_range.start_page] = text
+                            publisher.update(published_text())
+                narrative = generate(prompt, {"mime_type": input_mimetype, "data": page_range.pdf_bytes}, on_text).strip()
+                if publisher:
+                    with range_lock:
+                        range_text[page_range.start_page] = narrative
+                        finished_ranges.add(page_range.start_page)
+                        publisher.update(published_text())
+                return narrative
+
+            # A range that fails every attempt raises PageRangeError, handled below like a failed single call
+            narratives = map_page_ranges(
+                page_ranges, narrate_range,
+                max_concurrency=DUA_MAX_CONCURRENT_RANGES,
+                max_attempts=DUA_RANGE_MAX_ATTEMPTS,
+                log_prefix=state.get('document_id')
+            )
+            tts_narrative = "\n\n".join(narratives)
         else:
-            state['error_message'] = "LLM response was empty or malformed."
-            logger.error(f"{state['error_message']} Full response: {response}")
-            
+            logger.info(f"Sending request to Gemini model: {MODEL_NAME} with prompt and document.")
+            tts_narrative = generate(selected_prompt, file_data, publisher.update if publisher else None)
+
+        state['tts_ready_narrative'] = tts_narrative
+        logger.info(f"Successfully generated TTS narrative. Length: {len(tts_narrative)} chars.")
+
     except Exception as e:
         state['error_message'] = f"Error during LLM call: {str(e)}"
         logger.error(state['error_message'], exc_info=True)
@@ -18,5 +18,6 @@ class DocumentUnderstandingState(TypedDict):
     input_file_path: Optional[str] = None # To pass the local file path for the LLM
     input_file_content_bytes: Optional[bytes] = None # Alternative for passing file content
     input_file_mimetype: Optional[str] = None # Mimetype of the input file
+    publish_partial_narrative: Optional[bool] = None # Write the narrative to dua_narrative_partial while it is generated
 
     error_message: Optional[str]
@@ -4,8 +4,7 @@ from typing import Any, Optional, Dict, Tuple
 
 from langchain_core.messages import HumanMessage
 from backend.services.stt_service import STTService 
-from google.cloud import speech
-import base64
+from backend.services.audio_input_store import AudioInputStore
 
 from backend.graphs.supervisor.state import SupervisorState
 from backend.utils.message_utils import serialize_messages
@@ -31,8 +30,7 @@ def receive_user_input_node(state: SupervisorState) -> dict[str, Any]:
 
     user_id = state.get("user_id")
     current_query_from_state = state.get("current_query", "").strip()
-    current_audio_input_base64 = state.get("current_audio_input_base64")
-    current_audio_format = state.get("current_audio_format")
+    current_audio_blob_id = state.get("current_audio_blob_id")
 
     # Initialize updates dictionary, carrying over essential state
     # and preparing for Quiz Engine v2 fields.
@@ -55,8 +53,7 @@ def receive_user_input_node(state: SupervisorState) -> dict[str, Any]:
         "final_agent_response": None,
         "supervisor_error_message": None,
         
-        "current_audio_input_base64": None, # Clear after processing
-        "current_audio_format": None,     # Clear after processing
+        "current_audio_blob_id": None, # Clear after processing
         
         "document_understanding_output": state.get("document_understanding_output"), # Preserve from DUA
         "document_understanding_error": state.get("document_understanding_error") # Preserve from DUA
@@ -64,39 +61,25 @@ def receive_user_input_node(state: SupervisorState) -> dict[str, Any]:
 
     # STT processing if audio is present
     transcribed_query = None
-    if current_audio_input_base64 and current_audio_format:
-        print(f"[Supervisor] Audio input detected (format: {current_audio_format}). Attempting transcription...")
+    if current_audio_blob_id:
+        print(f"[Supervisor] Audio input detected (blob: {current_audio_blob_id}). Attempting transcription...")
         try:
-            audio_bytes = base64.b64decode(current_audio_input_base64)
-            stt_service = STTService()
-            audio_encoding_map = {
-                "wav": speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                "mp3": speech.RecognitionConfig.AudioEncoding.MP3,
-                "ogg": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
-                "opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
-                "flac": speech.RecognitionConfig.AudioEncoding.FLAC,
-            }
-            normalized_audio_format = current_audio_format.lower()
-            encoding_enum = audio_encoding_map.get(normalized_audio_format)
-
-            if not encoding_enum:
-                print(f"[Supervisor] STT Error: Unsupported audio format '{current_audio_format}'")
-                updates["supervisor_error_message"] = f"Speech-to-text failed: Unsupported audio format '{current_audio_format}'"
+            audio_input = AudioInputStore().take(current_audio_blob_id, user_id)
+            if audio_input is None:
+                raise ValueError("audio input expired or not found")
+            audio_bytes, current_audio_format = audio_input
+            # Same entry point as agent_chat_route: audio it already transcribed is served from the memo
+            success, stt_result = STTService().transcribe(audio_bytes, audio_format=current_audio_format)
+            if not success:
+                error_detail = (stt_result or {}).get("error", "transcription failed")
+                print(f"[Supervisor] STT Error: {error_detail}")
+                updates["supervisor_error_message"] = f"Speech-to-text failed: {error_detail}"
+            elif stt_result.get("transcript"):
+                transcribed_query = stt_result["transcript"].strip()
+                print(f"[Supervisor] STT successful. Transcribed query: '{transcribed_query}'")
+                updates["current_query"] = transcribed_query
             else:
-                config = speech.RecognitionConfig(
-                    encoding=encoding_enum,
-                    sample_rate_hertz=16000, 
-                    language_code="en-US",
-                    enable_automatic_punctuation=True,
-                )
-                audio = speech.RecognitionAudio(content=audio_bytes)
-                response = stt_service.client.recognize(config=config, audio=audio)
-                if response.results and response.results[0].alternatives:
-                    transcribed_query = response.results[0].alternatives[0].transcript.strip()
-                    print(f"[Supervisor] STT successful. Transcribed query: '{transcribed_query}'")
-                    updates["current_query"] = transcribed_query
-                else:
-                    print("[Supervisor] STT Warning: No transcription result.")
+                print("[Supervisor] STT Warning: No transcription result.")
         except Exception as e:
             print(f"[Supervisor] STT Error: Exception during transcription: {e}")
             updates["supervisor_error_message"] = f"Speech-to-text processing failed."
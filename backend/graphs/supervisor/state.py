@@ -33,9 +33,9 @@ class SupervisorState(TypedDict):
     is_quiz_v2_active: bool = False
     # --- End Quiz Engine v2 State Fields ---
     
-    # For STT input
-    current_audio_input_base64: Optional[str] = None
-    current_audio_format: Optional[str] = None
+    # For STT input: an AudioInputStore blob ID, resolved and cleared by receive_user_input_node.
+    # The audio itself never enters state, so it is never written to checkpoints.
+    current_audio_blob_id: Optional[str] = None
 
     # Document Understanding Agent related state
     gcs_uri_for_action: Optional[str] = None # GCS URI for the document to be analyzed
@@ -9,9 +9,9 @@ from flask import Blueprint, request, jsonify, current_app, g
 from datetime import datetime, timezone
 import uuid
 import logging
-import base64
 
 from backend.decorators.auth import require_auth
+from backend.routes.tts_routes import audio_response_fields
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +32,8 @@ def refine_answer():
     {
         "transcript": "Um, so like, the causes were...",
         "question": "Explain the causes of the American Revolution",
-        "session_id": "optional-existing-session-id"
+        "session_id": "optional-existing-session-id",
+        "audio_delivery": "inline"  // Optional: "url" returns audio_id/audio_url instead of base64
     }
     
     Response JSON:
@@ -96,20 +97,22 @@ def refine_answer():
         # Generate TTS for the refined answer
         tts_service = current_app.config.get('TTS_SERVICE')
         tts_result = {}
-        audio_content_base64 = None
+        audio_fields = {"audio_content_base64": None}
         
         if tts_service and result.get('refined_answer'):
             try:
-                tts_result = tts_service.synthesize_text(result['refined_answer'])
+                tts_result = tts_service.synthesize_text(result['refined_answer'], incremental=True)
                 logger.info(f"Session {session_id}: TTS generated successfully")
                 
-                # Base64 encode the audio content if present
+                # Base64 encode the audio content if present, or store it for download
                 if tts_result.get('audio_content'):
                     audio_bytes = tts_result['audio_content']
                     if isinstance(audio_bytes, bytes):
-                        audio_content_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+                        audio_fields = audio_response_fields(
+                            audio_bytes, tts_result.get('mime_type'), user_id, data.get('audio_delivery', 'inline')
+                        )
                     else:
-                        audio_content_base64 = audio_bytes  # Already encoded
+                        audio_fields = {"audio_content_base64": audio_bytes}  # Already encoded
                         
             except Exception as e:
                 logger.warning(f"Session {session_id}: TTS generation failed - {str(e)}")
@@ -122,7 +125,7 @@ def refine_answer():
             "status": result.get('status'),
             "fidelity_score": result.get('fidelity_score'),
             "iteration_count": result.get('iteration_count', 1),
-            "audio_content_base64": audio_content_base64,
+            **audio_fields,
             "timepoints": tts_result.get('timepoints')
         }
         
@@ -147,7 +150,8 @@ def edit_answer():
     Request JSON:
     {
         "session_id": "uuid",
-        "edit_command": "Change 'upset' to 'angry'"
+        "edit_command": "Change 'upset' to 'angry'",
+        "audio_delivery": "inline"  // Optional, see /refine
     }
     
     Response JSON:
@@ -230,20 +234,22 @@ def edit_answer():
         # Generate TTS for the updated answer
         tts_service = current_app.config.get('TTS_SERVICE')
         tts_result = {}
-        audio_content_base64 = None
+        audio_fields = {"audio_content_base64": None}
         
         if tts_service and result.get('refined_answer'):
             try:
-                tts_result = tts_service.synthesize_text(result['refined_answer'])
+                tts_result = tts_service.synthesize_text(result['refined_answer'], incremental=True)
                 logger.info(f"Session {session_id}: TTS generated for edited answer")
                 
-                # Base64 encode the audio content if present
+                # Base64 encode the audio content if present, or store it for download
                 if tts_result.get('audio_content'):
                     audio_bytes = tts_result['audio_content']
                     if isinstance(audio_bytes, bytes):
-                        audio_content_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+                        audio_fields = audio_response_fields(
+                            audio_bytes, tts_result.get('mime_type'), user_id, data.get('audio_delivery', 'inline')
+                        )
                     else:
-                        audio_content_base64 = audio_bytes  # Already encoded
+                        audio_fields = {"audio_content_base64": audio_bytes}  # Already encoded
                         
             except Exception as e:
                 logger.warning(f"Session {session_id}: TTS generation failed - {str(e)}")
@@ -254,7 +260,7 @@ def edit_answer():
             "session_id": session_id,
             "status": result.get('status'),
             "iteration_count": result.get('iteration_count'),
-            "audio_content_base64": audio_content_base64,
+            **audio_fields,
             "timepoints": tts_result.get('timepoints')
         }
         
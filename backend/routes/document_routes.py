@@ -6,9 +6,7 @@ import io
 from datetime import datetime, timezone
 from functools import wraps
 import uuid
-import asyncio
 import json # For DUA output handling
-import docx # For native Word document support
 
 # Assuming services are initialized elsewhere and passed or imported
 # from services import AuthService, FirestoreService, StorageService, DocRetrievalService
@@ -17,7 +15,8 @@ import docx # For native Word document support
 # from ..services import FirestoreService, StorageService # Example structure
 
 from backend.decorators.auth import require_auth
-from backend.graphs.document_understanding_agent.graph import DocumentUnderstandingState, run_dua_processing_for_document
+from backend.routes.tts_routes import audio_response_fields, format_timepoints, AUDIO_DELIVERY_MODES, TIMEPOINTS_FORMATS
+from backend.services.tts_segment_service import TTSSegmentService
 
 # from utilities.benchmark import STime # Assuming STime is for benchmarking
 # from utilities.prepare_response_text import prepare_response_text # Assuming utility function
@@ -41,19 +40,25 @@ document_bp = Blueprint('document_bp', __name__, url_prefix='/api/documents')
 # Auth helpers removed in favor of backend.decorators.auth.require_auth
 
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'docx', 'md'}
-DUA_ELIGIBLE_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'} # Define file types for DUA processing (now includes images) 
-TEXT_ELIGIBLE_EXTENSIONS = {'docx', 'txt', 'md'} # Native text support extensions 
+# Document statuses while the ingestion pipeline is still working on an upload
+INGESTION_IN_PROGRESS_STATUSES = {'queued', 'uploading', 'uploaded', 'processing_dua', 'processing_text'}
 
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
 @document_bp.route('/upload', methods=['POST'])
 @require_auth
 def upload_document():
-    """Upload a new document and trigger DUA or Native Text processing."""
-    current_app.logger.info("\n\n--- UPLOAD_DOCUMENT HIT (DUA INTEGRATED - Single Call) ---")
+    """
+    Accept a new document and queue it for ingestion.
+
+    GCS upload, DUA or native text processing and TTS pre-generation run in the
+    ingestion job queue; poll GET /api/documents/<id> for the document's status.
+    """
+    current_app.logger.info("\n\n--- UPLOAD_DOCUMENT HIT (queued ingestion) ---")
     user_id = g.user_id
 
     if 'file' not in request.files:
@@ -70,17 +75,17 @@ def upload_document():
         generated_document_id = str(uuid.uuid4())
 
         firestore_service = current_app.config['FIRESTORE_SERVICE']
-        storage_service = current_app.config['STORAGE_SERVICE']
-        document_id = None 
-
-        final_fs_update_payload = {}
-        response_data = {} # Initialize response data
+        ingestion_job_queue = current_app.config.get('INGESTION_JOB_QUEUE')
+        if not ingestion_job_queue:
+            current_app.logger.error("Ingestion job queue unavailable; rejecting upload.")
+            return jsonify({"error": "Document processing is temporarily unavailable"}), 503
 
+        document_id = None
         try:
-            # 1. Create initial document entry in Firestore
+            # 1. Create the document entry; the pipeline moves 'status' through its stages
             initial_doc_data = {
                 'id': generated_document_id, 'user_id': user_id, 'name': document_name,
-                'original_filename': original_filename, 'file_type': file_extension, 'status': 'uploading',
+                'original_filename': original_filename, 'file_type': file_extension, 'status': 'queued',
                 'created_at': datetime.now(timezone.utc).isoformat(),
                 'updated_at': datetime.now(timezone.utc).isoformat(),
                 'gcs_uri': None, 'content_length': request.content_length,
@@ -92,237 +97,40 @@ def upload_document():
             if not document_id:
                 current_app.logger.error("Failed to create document entry in Firestore during initial save.")
                 return jsonify({"error": "Failed to create document entry in Firestore"}), 500
-            
-            final_fs_update_payload.update(initial_doc_data)
-            final_fs_update_payload['id'] = document_id # Ensure 'id' is the actual Firestore doc ID
 
-            # 2. Upload original file to Google Cloud Storage
+            # 2. Spool the upload and hand it to the ingestion workers
             file.seek(0)
-            success_gcs_original, gcs_file_metadata = storage_service.upload_file(
-                file_content=file,
-                content_type=file.mimetype,
+            job_id = ingestion_job_queue.enqueue(
+                document_id=document_id,
                 user_id=user_id,
-                original_filename=original_filename
+                file_content=file,
+                original_filename=original_filename,
+                mimetype=file.mimetype,
+                file_extension=file_extension
             )
-            if not success_gcs_original or not gcs_file_metadata:
-                current_app.logger.error(f"Failed to upload original file to GCS for document_id: {document_id}")
-                if document_id: 
-                    try: firestore_service.delete_document(document_id) 
-                    except Exception as e_clean: current_app.logger.error(f"Firestore cleanup failed for {document_id}: {e_clean}")
-                return jsonify({"error": "Failed to upload file to storage"}), 500
-
-            # 3. Update Firestore with GCS URI of original file
-            gcs_uri = gcs_file_metadata['gcsUri']
-            current_processing_status = 'uploaded'
-            final_fs_update_payload.update({
-                'gcs_uri': gcs_uri, 'status': current_processing_status,
-                'updated_at': datetime.now(timezone.utc).isoformat(),
-                'content_length': gcs_file_metadata.get('size', request.content_length)
-            })
-            if not firestore_service.update_document(document_id, final_fs_update_payload):
-                current_app.logger.error(f"CRITICAL: Uploaded {gcs_uri} but failed to update Firestore for doc {document_id}.")
-                # Consider GCS cleanup here if critical
-                return jsonify({"error": "File uploaded but failed to update document details before processing"}), 500
-
-            dua_processed_successfully = False
-            text_processed_successfully = False
-
-            # --- 4. DUA PROCESSING (Single Call Refactor) ---
-            if file_extension in DUA_ELIGIBLE_EXTENSIONS:
-                current_app.logger.info(f"Document {document_id} ({file_extension}) is DUA eligible. Attempting new single-call DUA.")
-                final_fs_update_payload['status'] = 'processing_dua'
-                firestore_service.update_document(document_id, {'status': 'processing_dua', 'updated_at': datetime.now(timezone.utc).isoformat()})
-                
-                dua_initial_state = {
-                    "document_id": document_id,
-                    "user_id": user_id,  # Pass user ID for adaptive prompt selection
-                    "input_file_path": gcs_uri, # Use GCS URI for DUA processing
-                    "input_file_mimetype": file.mimetype,
-                    "original_gcs_uri": gcs_uri # Store for reference if needed
-                }
-                current_app.logger.info(f"Calling run_dua_processing_for_document with state: {dua_initial_state}")
-
-                try:
-                    # Run the DUA graph (this is an async function, run it appropriately)
-                    dua_result = asyncio.run(run_dua_processing_for_document(dua_initial_state))
-                    current_app.logger.info(f"DUA processing result for {document_id}: {dua_result}")
-
-                    if dua_result and dua_result.get('tts_ready_narrative'):
-                        final_fs_update_payload['dua_narrative_content'] = dua_result['tts_ready_narrative']
-                        final_fs_update_payload['status'] = 'processed_dua'
-                        final_fs_update_payload['processing_error'] = None # Clear any previous error
-                        dua_processed_successfully = True
-                        current_app.logger.info(f"DUA successfully processed document {document_id}.")
-
-                        # --- Pre-generate TTS Audio and Timepoints ---
-                        try:
-                            narrative_text = dua_result['tts_ready_narrative']
-                            if narrative_text and len(narrative_text.strip()) > 10: # Only generate for substantial text
-                                current_app.logger.info(f"Starting TTS pre-generation for document {document_id}.")
-                                tts_service = current_app.config['TTS_SERVICE']
-                                tts_result = tts_service.synthesize_text(narrative_text)
-
-                                if tts_result and tts_result.get('audio_content') and tts_result.get('timepoints'):
-                                    audio_content = tts_result['audio_content']
-                                    timepoints_json = json.dumps(tts_result['timepoints'])
-
-                                    # Upload audio file
-                                    audio_success, audio_meta = storage_service.upload_bytes_as_file(
-                                        content_bytes=audio_content,
-                                        content_type='audio/mpeg',
-                                        user_id=user_id,
-                                        base_filename=f"{document_id}_tts.mp3",
-                                        sub_folder='tts_outputs'
-                                    )
-
-                                    # Upload timepoints file
-                                    tp_success, tp_meta = storage_service.upload_string_as_file(
-                                        content_string=timepoints_json,
-                                        content_type='application/json',
-                                        user_id=user_id,
-                                        base_filename=f"{document_id}_timepoints.json",
-                                        sub_folder='tts_outputs'
-                                    )
-
-                                    if audio_success and tp_success:
-                                        final_fs_update_payload['tts_audio_gcs_uri'] = audio_meta['gcsUri']
-                                        final_fs_update_payload['tts_timepoints_gcs_uri'] = tp_meta['gcsUri']
-                                        current_app.logger.info(f"Successfully pre-generated and saved TTS assets for {document_id}.")
-                                    else:
-                                        current_app.logger.error(f"Failed to upload TTS assets to GCS for {document_id}.")
-                                else:
-                                    current_app.logger.error(f"TTS synthesis failed or returned incomplete data for {document_id}.")
-                        except Exception as e_tts:
-                            current_app.logger.error(f"An exception occurred during TTS pre-generation for {document_id}: {e_tts}", exc_info=True)
-                    else:
-                        error_msg = dua_result.get('error_message', 'DUA processing failed or returned no narrative.')
-                        final_fs_update_payload['status'] = 'dua_failed'
-                        final_fs_update_payload['processing_error'] = error_msg
-                        current_app.logger.error(f"DUA processing failed for {document_id}: {error_msg}")
-                except Exception as e_dua:
-                    current_app.logger.error(f"Exception during DUA processing for {document_id}: {e_dua}", exc_info=True)
-                    final_fs_update_payload['status'] = 'dua_failed'
-                    final_fs_update_payload['processing_error'] = f"DUA execution error: {str(e_dua)}"
-                
-                final_fs_update_payload['updated_at'] = datetime.now(timezone.utc).isoformat()
-                firestore_service.update_document(document_id, final_fs_update_payload)
-
-
-            # --- 4b. NATIVE TEXT PROCESSING (New Branch) ---
-            elif file_extension in TEXT_ELIGIBLE_EXTENSIONS:
-                current_app.logger.info(f"Document {document_id} ({file_extension}) is eligible for Native Text Processing.")
-                final_fs_update_payload['status'] = 'processing_text'
-                firestore_service.update_document(document_id, {'status': 'processing_text', 'updated_at': datetime.now(timezone.utc).isoformat()})
-
-                extracted_text = ""
-                try:
-                    file.seek(0) # Reset file pointer
-                    if file_extension == 'docx':
-                        doc = docx.Document(file)
-                        extracted_text = "\n".join([para.text for para in doc.paragraphs])
-                    elif file_extension in ['txt', 'md']:
-                        extracted_text = file.read().decode('utf-8', errors='replace')
-                    
-                    if extracted_text:
-                        final_fs_update_payload['dua_narrative_content'] = extracted_text
-                        final_fs_update_payload['status'] = 'processed_dua' # Mimic DUA status for compatibility
-                        final_fs_update_payload['processing_error'] = None
-                        text_processed_successfully = True
-                        current_app.logger.info(f"Text successfully extracted for document {document_id}.")
-
-                        # --- Pre-generate TTS Audio and Timepoints (Reused Logic) ---
-                        try:
-                            if len(extracted_text.strip()) > 10:
-                                current_app.logger.info(f"Starting TTS pre-generation for text document {document_id}.")
-                                tts_service = current_app.config['TTS_SERVICE']
-                                tts_result = tts_service.synthesize_text(extracted_text)
-
-                                if tts_result and tts_result.get('audio_content') and tts_result.get('timepoints'):
-                                    audio_content = tts_result['audio_content']
-                                    timepoints_json = json.dumps(tts_result['timepoints'])
-
-                                    # Upload audio file
-                                    audio_success, audio_meta = storage_service.upload_bytes_as_file(
-                                        content_bytes=audio_content,
-                                        content_type='audio/mpeg',
-                                        user_id=user_id,
-                                        base_filename=f"{document_id}_tts.mp3",
-                                        sub_folder='tts_outputs'
-                                    )
-
-                                    # Upload timepoints file
-                                    tp_success, tp_meta = storage_service.upload_string_as_file(
-                                        content_string=timepoints_json,
-                                        content_type='application/json',
-                                        user_id=user_id,
-                                        base_filename=f"{document_id}_timepoints.json",
-                                        sub_folder='tts_outputs'
-                                    )
-
-                                    if audio_success and tp_success:
-                                        final_fs_update_payload['tts_audio_gcs_uri'] = audio_meta['gcsUri']
-                                        final_fs_update_payload['tts_timepoints_gcs_uri'] = tp_meta['gcsUri']
-                                        current_app.logger.info(f"Successfully pre-generated and saved TTS assets for {document_id}.")
-                                    else:
-                                        current_app.logger.error(f"Failed to upload TTS assets to GCS for {document_id}.")
-                                else:
-                                    current_app.logger.error(f"TTS synthesis failed or returned incomplete data for {document_id}.")
-                        except Exception as e_tts:
-                            current_app.logger.error(f"An exception occurred during TTS pre-generation for {document_id}: {e_tts}", exc_info=True)
-
-                    else:
-                         final_fs_update_payload['processing_error'] = "Extracted text was empty."
-                         final_fs_update_payload['status'] = 'processing_failed'
-
-                except Exception as e_text:
-                    current_app.logger.error(f"Error extracting text from {file_extension} file: {e_text}", exc_info=True)
-                    final_fs_update_payload['status'] = 'processing_failed'
-                    final_fs_update_payload['processing_error'] = f"Text extraction failed: {str(e_text)}"
-                
-                final_fs_update_payload['updated_at'] = datetime.now(timezone.utc).isoformat()
-                firestore_service.update_document(document_id, final_fs_update_payload)
-
-
-
-
-            # Determine final status based on processing outcomes
-            if final_fs_update_payload.get('status') not in ['processed_dua', 'processed_ocr', 'dua_failed', 'ocr_failed', 'ocr_empty_result', 'ocr_skipped_tool_unavailable']:
-                # If no specific processing status was set, mark as 'processed' (generic) or 'upload_failed' if something went wrong earlier.
-                # This path should ideally not be hit if logic is correct.
-                final_fs_update_payload['status'] = 'processed_generic' # Fallback status
-            
-            current_app.logger.info(f"Final Firestore update for {document_id}: {final_fs_update_payload}")
-            if not firestore_service.update_document(document_id, final_fs_update_payload): # Final update
-                 current_app.logger.error(f"CRITICAL: Failed final Firestore update for doc {document_id} after processing.")
-                 # This is a problematic state, data might be inconsistent.
 
             response_data = {
-                "message": "File processed successfully.",
+                "message": "File accepted for processing.",
                 "document_id": document_id,
                 "filename": original_filename,
                 "name": document_name,
-                "gcs_uri": gcs_uri,
-                "status": final_fs_update_payload.get('status'),
-                "dua_processed": dua_processed_successfully or text_processed_successfully,
-                "dua_narrative_snippet": (final_fs_update_payload.get('dua_narrative_content')[:200] + '...' if final_fs_update_payload.get('dua_narrative_content') else None),
-                "processing_error": final_fs_update_payload.get('processing_error')
+                "status": 'queued',
+                "job_id": job_id
             }
-            return jsonify(response_data), 200
+            return jsonify(response_data), 202
 
         except Exception as e:
-            current_app.logger.error(f"Error during document upload and processing for {original_filename}: {e}", exc_info=True)
-            # Attempt to clean up Firestore entry if it was created and an error occurred
-            if document_id and final_fs_update_payload.get('status') != 'uploading': # Avoid double delete if initial save failed
+            current_app.logger.error(f"Error queueing document upload for {original_filename}: {e}", exc_info=True)
+            if document_id:
                 try:
-                    # Update status to reflect failure before potential delete, or just log
                     firestore_service.update_document(document_id, {
-                        'status': 'upload_failed', 
+                        'status': 'upload_failed',
                         'processing_error': f"Unhandled exception: {str(e)}",
                         'updated_at': datetime.now(timezone.utc).isoformat()
                     })
                 except Exception as e_fs_final_fail:
                     current_app.logger.error(f"Failed to update Firestore status to 'upload_failed' for {document_id}: {e_fs_final_fail}")
-            return jsonify({"error": "Internal server error during file processing", "details": str(e)}), 500
+            return jsonify({"error": "Internal server error during file upload", "details": str(e)}), 500
     else:
         return jsonify({"error": "File type not allowed"}), 400
 
@@ -428,7 +236,9 @@ def get_document_details(document_id):
         "status": doc.get('status'),
         "original_filename": doc.get('original_filename'),
         "gcs_uri": doc.get('gcs_uri'),
-        "content_length": doc.get('content_length')
+        "content_length": doc.get('content_length'),
+        "processing": doc.get('status') in INGESTION_IN_PROGRESS_STATUSES,
+        "processing_error": doc.get('processing_error')
     }
 
     include_content = request.args.get('include_content', 'false').lower() == 'true'
@@ -460,7 +270,9 @@ def get_document_details(document_id):
         elif doc.get('file_type') == 'txt' and doc.get('gcs_uri'): # For text files, read from GCS
             try:
                 current_app.logger.info(f"Serving direct GCS content for .txt document {document_id}")
-                file_content_bytes = storage_service.download_file_to_bytes(doc['gcs_uri'])
+                success, file_content_bytes = storage_service.get_file(doc['gcs_uri'])
+                if not success:
+                    raise RuntimeError("download from storage failed")
                 response_data['content'] = file_content_bytes.decode('utf-8') # Assuming UTF-8 for text files
             except Exception as e:
                 current_app.logger.error(f"Failed to read .txt content from GCS for {document_id}: {e}")
@@ -472,6 +284,15 @@ def get_document_details(document_id):
         elif doc.get('status') in ['ocr_failed', 'ocr_empty_result', 'processing_failed'] and 'processing_error' in doc:
             response_data['content'] = None
             response_data['content_error'] = doc.get('processing_error', 'Document processing failed or resulted in no content.')
+        elif doc.get('status') in INGESTION_IN_PROGRESS_STATUSES: # Ingestion pipeline still running
+            if doc.get('dua_narrative_partial'):
+                # The paragraphs the DUA graph has generated so far; more follow until 'processing' is false
+                response_data['content'] = doc['dua_narrative_partial']
+                response_data['content_is_json'] = False
+                response_data['content_partial'] = True
+            else:
+                response_data['content'] = None
+                response_data['content_error'] = 'Document is still being processed.'
         elif doc.get('status') == 'processing_ocr': # If still processing
             response_data['content'] = None
             response_data['content_error'] = 'Document is still being processed by OCR.'
@@ -512,6 +333,110 @@ def download_document(document_id):
         print(f"Error downloading document {document_id}: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@document_bp.route('/<string:document_id>/tts-status', methods=['GET'])
+@require_auth
+def get_tts_status(document_id):
+    """Reports progress of the document's background TTS pre-generation job."""
+    user_id = g.user_id
+    firestore_service = current_app.config['FIRESTORE_SERVICE']
+
+    doc = firestore_service.get_document(document_id)
+    if not doc or doc.get('user_id') != user_id:
+        return jsonify({"error": "Document not found or access denied"}), 404
+
+    assets_ready = bool(doc.get('tts_audio_gcs_uri') and doc.get('tts_timepoints_gcs_uri'))
+    response = {
+        "document_id": document_id,
+        "tts_status": doc.get('tts_status') or ('completed' if assets_ready else None),
+        "assets_ready": assets_ready,
+        "error": doc.get('tts_error'),
+    }
+
+    # The job table is updated before Firestore, so prefer it when this document has a job
+    tts_job_queue = current_app.config.get('TTS_JOB_QUEUE')
+    job = tts_job_queue.get_latest_job(document_id) if tts_job_queue else None
+    if job:
+        response.update({
+            "tts_status": job['status'],
+            "job_id": job['job_id'],
+            "attempts": job['attempts'],
+            "error": job['error'],
+        })
+    return jsonify(response), 200
+
+
+def _get_owned_narrative(document_id):
+    """Returns (doc, narrative, None) for the caller's document, or (None, None, error_response)."""
+    firestore_service = current_app.config['FIRESTORE_SERVICE']
+    doc = firestore_service.get_document(document_id)
+    if not doc or doc.get('user_id') != g.user_id:
+        return None, None, (jsonify({"error": "Document not found or access denied"}), 404)
+    narrative = doc.get('dua_narrative_content')
+    if not narrative and doc.get('status') in INGESTION_IN_PROGRESS_STATUSES:
+        # Segments are whole paragraphs, so the ones generated so far are already final
+        narrative = doc.get('dua_narrative_partial')
+    if not narrative:
+        return None, None, (jsonify({"error": "Document has no narrative to read aloud yet.", "status": doc.get('status')}), 409)
+    doc.setdefault('id', document_id)
+    return doc, narrative, None
+
+
+@document_bp.route('/<string:document_id>/tts-segments', methods=['GET'])
+@require_auth
+def get_tts_segment_manifest(document_id):
+    """Lists the document's read-aloud segments and their durations, and starts prefetching the first ones."""
+    doc, narrative, error_response = _get_owned_narrative(document_id)
+    if error_response:
+        return error_response
+    try:
+        manifest = TTSSegmentService().get_manifest(doc, narrative)
+    except Exception as e:
+        current_app.logger.error(f"Error building TTS segment manifest for doc {document_id}: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error while building segment manifest."}), 500
+    # 'partial': the narrative is still being generated and more segments will follow
+    return jsonify({"document_id": document_id, **manifest, "partial": not doc.get('dua_narrative_content')}), 200
+
+
+@document_bp.route('/<string:document_id>/tts-segments/<int:index>', methods=['GET'])
+@require_auth
+def get_tts_segment(document_id, index):
+    """
+    Returns one read-aloud segment's audio and timepoints (timepoints are relative to the
+    segment start), synthesizing it on first request and prefetching the following segments.
+
+    Query params: audio_delivery ('inline' | 'url'), timepoints_format ('list' | 'compact').
+    """
+    audio_delivery = request.args.get('audio_delivery', 'inline')
+    timepoints_format = request.args.get('timepoints_format', 'list')
+    if audio_delivery not in AUDIO_DELIVERY_MODES:
+        return jsonify({"error": f"'audio_delivery' must be one of {', '.join(AUDIO_DELIVERY_MODES)}"}), 400
+    if timepoints_format not in TIMEPOINTS_FORMATS:
+        return jsonify({"error": f"'timepoints_format' must be one of {', '.join(TIMEPOINTS_FORMATS)}"}), 400
+
+    doc, narrative, error_response = _get_owned_narrative(document_id)
+    if error_response:
+        return error_response
+    try:
+        segment = TTSSegmentService().get_segment(doc, narrative, index)
+    except Exception as e:
+        current_app.logger.error(f"Error synthesizing TTS segment {index} for doc {document_id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to synthesize segment."}), 502
+    if segment is None:
+        return jsonify({"error": "Segment index out of range."}), 404
+
+    response = {
+        "document_id": document_id,
+        "index": segment['index'],
+        "segment_count": segment['segment_count'],
+        "paragraph_index": segment['paragraph_index'],
+        "duration_seconds": segment['duration_seconds'],
+        "timepoints": format_timepoints(segment['timepoints'], timepoints_format),
+        "audio_mime_type": segment['mime_type'],
+        **audio_response_fields(segment['audio_content'], segment['mime_type'], g.user_id, audio_delivery),
+    }
+    return jsonify(response), 200
+
+
 @document_bp.route('/<string:document_id>/tts-assets', methods=['GET'])
 @require_auth
 def get_tts_assets(document_id):
@@ -529,7 +454,7 @@ def get_tts_assets(document_id):
     timepoints_gcs_uri = doc.get('tts_timepoints_gcs_uri')
 
     if not audio_gcs_uri or not timepoints_gcs_uri:
-        return jsonify({"error": "TTS assets not found for this document."}), 404
+        return jsonify({"error": "TTS assets not found for this document.", "tts_status": doc.get('tts_status')}), 404
 
     try:
         # GCS URIs are in the format gs://<bucket>/<path>. We need just the path for get_signed_url.
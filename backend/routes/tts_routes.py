@@ -1,12 +1,77 @@
-from flask import Blueprint, request, jsonify, current_app, send_file, g
+from flask import Blueprint, request, jsonify, current_app, send_file, g, Response, stream_with_context, url_for
 import io
+import json
 import tempfile
 import base64
 
 from backend.services.tts_service import TTSService, TTSServiceError
+from backend.services.tts_audio_store import TTSAudioStore
+from backend.utils.timepoint_codec import encode_timepoints
 
 tts_bp = Blueprint('tts_bp', __name__, url_prefix='/api/tts')
 
+# How synthesized audio is returned: base64 inside the JSON body ('inline', the default)
+# or saved to TTSAudioStore and fetched separately from /api/tts/audio/<audio_id> ('url').
+AUDIO_DELIVERY_MODES = ('inline', 'url')
+
+# How timepoints are returned: a list of {"mark_name", "time_seconds"} dicts ('list', the
+# default) or parallel token/delta-millisecond arrays ('compact', see utils.timepoint_codec).
+TIMEPOINTS_FORMATS = ('list', 'compact')
+
+
+def format_timepoints(timepoints, timepoints_format='list'):
+    """Returns timepoints in the requested TIMEPOINTS_FORMATS representation."""
+    if timepoints_format == 'compact' and timepoints is not None:
+        return encode_timepoints(timepoints)
+    return timepoints
+
+
+def audio_response_fields(audio_bytes, mime_type, user_id, audio_delivery='inline', inline_key='audio_content_base64'):
+    """
+    Builds the audio part of a JSON response for the requested delivery mode.
+
+    Args:
+        audio_bytes: Encoded audio
+        mime_type: MIME type of the audio
+        user_id: Firebase Auth UID allowed to fetch the audio in 'url' mode
+        audio_delivery: 'inline' or 'url' (anything else is treated as 'inline')
+        inline_key: Response key carrying base64 audio in 'inline' mode
+
+    Returns:
+        Dict to merge into the response: {inline_key: base64} for 'inline', or
+        {inline_key: None, 'audio_id', 'audio_url', 'audio_mime_type'} for 'url'
+    """
+    if audio_delivery == 'url':
+        audio_id = TTSAudioStore().save(audio_bytes, mime_type, user_id)
+        return {
+            inline_key: None,
+            'audio_id': audio_id,
+            'audio_url': url_for('tts_bp.get_tts_audio', audio_id=audio_id),
+            'audio_mime_type': mime_type
+        }
+    return {inline_key: base64.b64encode(audio_bytes).decode('utf-8')}
+
+def _parse_output_options(data):
+    """
+    Validates the optional 'audio_encoding' (MP3, OGG_OPUS, LINEAR16) and 'bitrate_kbps'
+    fields of a synthesis payload.
+
+    Returns:
+        Tuple of ((audio_encoding, bitrate_kbps), None) or (None, error_message)
+    """
+    try:
+        audio_encoding = TTSService.resolve_audio_encoding(data.get('audio_encoding'))
+    except ValueError as e:
+        return None, str(e)
+
+    bitrate_kbps = data.get('bitrate_kbps')
+    if bitrate_kbps is not None:
+        if isinstance(bitrate_kbps, bool) or not isinstance(bitrate_kbps, int) or not 6 <= bitrate_kbps <= 320:
+            return None, "'bitrate_kbps' must be an integer between 6 and 320"
+        if audio_encoding == 'LINEAR16':
+            return None, "'bitrate_kbps' does not apply to LINEAR16 output"
+    return (audio_encoding, bitrate_kbps), None
+
 # Helper function to get user from token (adapted for blueprint context)
 def _get_user_from_token():
     """Helper function to get user data from Firebase ID token."""
@@ -46,8 +111,11 @@ def before_request_func():
 def tts_synthesize():
     """
     Synthesizes text to speech using TTSService.
-    Expects a JSON payload with a 'text' field.
-    Returns audio data as base64-encoded MP3 with timepoints.
+    Expects a JSON payload with a 'text' field, and optionally 'audio_encoding'
+    (MP3 by default, OGG_OPUS or LINEAR16), 'bitrate_kbps', 'audio_delivery' and
+    'timepoints_format' ('list' or 'compact').
+    Returns base64-encoded audio with its mime_type and timepoints; with
+    audio_delivery='url' the audio is returned as an audio_url to fetch instead.
     """
     user_id = g.user.get('uid') if g.user else 'unknown'
     
@@ -65,6 +133,18 @@ def tts_synthesize():
         current_app.logger.error(f"TTS Synthesis: Missing 'text' in JSON payload. Received data: {data}")
         return jsonify(error="Missing 'text' in JSON payload"), 400
 
+    output_options, option_error = _parse_output_options(data)
+    if option_error:
+        return jsonify(error=option_error), 400
+    audio_encoding, bitrate_kbps = output_options
+
+    audio_delivery = data.get('audio_delivery', 'inline')
+    if audio_delivery not in AUDIO_DELIVERY_MODES:
+        return jsonify(error=f"'audio_delivery' must be one of: {', '.join(AUDIO_DELIVERY_MODES)}"), 400
+    timepoints_format = data.get('timepoints_format', 'list')
+    if timepoints_format not in TIMEPOINTS_FORMATS:
+        return jsonify(error=f"'timepoints_format' must be one of: {', '.join(TIMEPOINTS_FORMATS)}"), 400
+
     try:
         tts_service = TTSService()
         if not tts_service.is_functional():
@@ -75,18 +155,22 @@ def tts_synthesize():
             text=text_to_synthesize,
             voice_name=voice_name,
             speaking_rate=speaking_rate,
-            pitch=pitch
+            pitch=pitch,
+            audio_encoding=audio_encoding,
+            bitrate_kbps=bitrate_kbps
         )
 
         if tts_response and tts_response.get("audio_content"):
             audio_content = tts_response["audio_content"]
             timepoints = tts_response.get("timepoints", [])
-            encoded_audio = base64.b64encode(audio_content).decode('utf-8')
 
             current_app.logger.info(f"Successfully synthesized audio for user {user_id}, text: '{text_to_synthesize[:50]}...'")
             return jsonify({
-                "audio_content": encoded_audio,
-                "timepoints": timepoints
+                **audio_response_fields(audio_content, tts_response.get("mime_type"), user_id,
+                                        audio_delivery, inline_key="audio_content"),
+                "audio_encoding": tts_response.get("audio_encoding"),
+                "mime_type": tts_response.get("mime_type"),
+                "timepoints": format_timepoints(timepoints, timepoints_format)
             })
         else:
             current_app.logger.error(f"TTS synthesis failed for user {user_id}, text: '{text_to_synthesize[:50]}...'")
@@ -100,27 +184,130 @@ def tts_synthesize():
         return jsonify(error=f"An unexpected error occurred: {str(e)}"), 500
 
 
+@tts_bp.route('/synthesize/stream', methods=['POST'])
+def tts_synthesize_stream():
+    """
+    Streaming variant of /synthesize for long texts.
+    Expects the same JSON payload. Responds with newline-delimited JSON (application/x-ndjson):
+    one {"type": "chunk", ...} line per synthesized chunk, in order, carrying base64 audio
+    and timepoints already offset to the start of the text, then {"type": "done"}.
+    A failure after streaming has started is reported as a final {"type": "error"} line.
+    """
+    user_id = g.user.get('uid') if g.user else 'unknown'
+
+    if not request.is_json:
+        current_app.logger.error(f"TTS Stream: Request is not JSON. Content-Type: {request.headers.get('Content-Type')}")
+        return jsonify(error="Request must be JSON"), 400
+
+    data = request.get_json()
+    text_to_synthesize = data.get('text')
+    if not text_to_synthesize:
+        current_app.logger.error(f"TTS Stream: Missing 'text' in JSON payload. Received data: {data}")
+        return jsonify(error="Missing 'text' in JSON payload"), 400
+
+    output_options, option_error = _parse_output_options(data)
+    if option_error:
+        return jsonify(error=option_error), 400
+    audio_encoding, bitrate_kbps = output_options
+
+    timepoints_format = data.get('timepoints_format', 'list')
+    if timepoints_format not in TIMEPOINTS_FORMATS:
+        return jsonify(error=f"'timepoints_format' must be one of: {', '.join(TIMEPOINTS_FORMATS)}"), 400
+
+    try:
+        tts_service = TTSService()
+        if not tts_service.is_functional():
+            current_app.logger.error(f"User {user_id} attempted to use TTS streaming, but service is not functional.")
+            return jsonify(error="TTS service is not available"), 503
+    except TTSServiceError as tse:
+        current_app.logger.error(f"TTSServiceError for user {user_id}: {str(tse)}")
+        return jsonify(error=f"TTS Service error: {str(tse)}"), 503
+
+    chunk_stream = tts_service.synthesize_text_stream(
+        text=text_to_synthesize,
+        voice_name=data.get('voice_name'),
+        speaking_rate=data.get('speaking_rate'),
+        pitch=data.get('pitch'),
+        audio_encoding=audio_encoding,
+        bitrate_kbps=bitrate_kbps
+    )
+
+    def generate():
+        chunk_count = 0
+        try:
+            for chunk in chunk_stream:
+                chunk_count += 1
+                yield json.dumps({
+                    "type": "chunk",
+                    "chunk_index": chunk["chunk_index"],
+                    "chunk_count": chunk["chunk_count"],
+                    "audio_content": base64.b64encode(chunk["audio_content"]).decode('utf-8'),
+                    "mime_type": chunk["mime_type"],
+                    "offset_seconds": chunk["offset_seconds"],
+                    "duration_seconds": chunk["duration_seconds"],
+                    "timepoints": format_timepoints(chunk["timepoints"], timepoints_format)
+                }) + "\n"
+            current_app.logger.info(f"Streamed {chunk_count} TTS chunks for user {user_id}, text: '{text_to_synthesize[:50]}...'")
+            yield json.dumps({"type": "done"}) + "\n"
+        except Exception as e:
+            current_app.logger.error(f"TTS stream failed for user {user_id} after {chunk_count} chunks: {str(e)}", exc_info=True)
+            yield json.dumps({"type": "error", "message": "Failed to synthesize audio"}) + "\n"
+        finally:
+            # Stops outstanding chunk requests if the client disconnects mid-stream
+            chunk_stream.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@tts_bp.route('/audio/<audio_id>', methods=['GET'])
+def get_tts_audio(audio_id):
+    """
+    Serves audio saved by a synthesis response with audio_delivery='url'.
+    Supports HTTP range requests so players can seek without downloading everything.
+    """
+    user_id = g.user.get('uid') if g.user else None
+    audio_store = TTSAudioStore()
+    stored_audio = audio_store.get(audio_id, user_id)
+    if not stored_audio:
+        return jsonify(error="Audio not found or expired"), 404
+
+    audio_path, mime_type = stored_audio
+    response = send_file(audio_path, mimetype=mime_type, conditional=True, max_age=audio_store.ttl_seconds)
+    # Per-user content: browsers may cache it, shared proxies must not
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+
 @tts_bp.route('/voices', methods=['GET'])
 def get_available_voices():
-    """Get available voices for Text-to-Speech"""
-    tts_tool_instance = current_app.config['TOOLS'].get('TTSTool')
-    if not tts_tool_instance:
-        return jsonify({'status': 'error', 'message': 'TTS Tool not available'}), 503
+    """
+    Get available voices for Text-to-Speech, optionally filtered by ?language_code=.
+    Served from TTSService's voice cache; the list is only fetched from the API when
+    it is missing or stale.
+    """
+    tts_service = current_app.config.get('TTS_SERVICE')
+    if not tts_service:
+        return jsonify({'status': 'error', 'message': 'TTS service not available'}), 503
 
     language_code = request.args.get('language_code')
-    success, result = tts_tool_instance.get_available_voices(language_code=language_code)
-    
-    if success:
-        voices = result 
-        if voices is None:
-            raise ValueError("TTS Tool returned None for voices list")
-             
-        return jsonify({
-            'status': 'success',
-            'voices': voices
-        })
-    else:
+    try:
+        voices = tts_service.get_available_voices(language_code=language_code)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    if voices is None:
         return jsonify({
             'status': 'error',
-            'message': result.get('error', 'Failed to retrieve available voices')
+            'message': 'Failed to retrieve available voices'
         }), 500
+
+    response = jsonify({
+        'status': 'success',
+        'voices': voices
+    })
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
@@ -5,7 +5,12 @@ from .firestore_service import FirestoreService
 from .storage_service import StorageService
 from .doc_retrieval_service import DocumentRetrievalService
 from .tts_service import TTSService
+from .tts_audio_store import TTSAudioStore
+from .tts_job_queue import TTSJobQueue
+from .ingestion_job_queue import IngestionJobQueue
+from .tts_segment_service import TTSSegmentService
 from .stt_service import STTService
+from .audio_input_store import AudioInputStore
 
 __all__ = [
     'AuthService',
@@ -13,5 +18,10 @@ __all__ = [
     'StorageService',
     'DocumentRetrievalService',
     'TTSService',
+    'TTSAudioStore',
+    'TTSJobQueue',
+    'IngestionJobQueue',
+    'TTSSegmentService',
     'STTService',
+    'AudioInputStore',
 ]
@@ -0,0 +1,130 @@
+"""
+Side-channel store for recorded user audio that a graph still has to transcribe.
+
+Supervisor state is checkpointed by SqliteSaver on every turn, so audio is not put
+into state. agent_chat_route saves the recording here and passes only its blob ID
+(current_audio_blob_id); receive_user_input_node takes the audio back out, which also
+deletes it. Blobs nobody claims expire after STT_AUDIO_INPUT_TTL_SECONDS.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.utils.data_dir import get_data_dir
+
+# Load environment variables
+load_dotenv()
+
+_BLOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class AudioInputStore:
+    """Service class for handing recorded audio to graph nodes without checkpointing it"""
+
+    _instance = None
+
+    # Expired blobs are swept at most this often (per process)
+    CLEANUP_INTERVAL_SECONDS = 60
+
+    def __new__(cls):
+        """Singleton pattern so routes and graph nodes share one store"""
+        if cls._instance is None:
+            cls._instance = super(AudioInputStore, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, store_dir: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        """Resolve the store directory and expiry"""
+        self.store_dir = store_dir or get_data_dir('audio_inputs')
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv('STT_AUDIO_INPUT_TTL_SECONDS', 600))
+        self._last_cleanup = 0.0
+        self._cleanup_lock = threading.Lock()
+
+    def _paths(self, blob_id: str) -> Tuple[str, str]:
+        base = os.path.join(self.store_dir, blob_id)
+        return base + '.audio', base + '.json'
+
+    def save(self, audio_bytes: bytes, audio_format: Optional[str], user_id: str) -> str:
+        """
+        Save a recording for a later take() by the same user.
+
+        Args:
+            audio_bytes: The recording
+            audio_format: Short format name (see STTService.transcribe)
+            user_id: Firebase Auth UID allowed to take it
+
+        Returns:
+            The blob ID
+        """
+        self._cleanup_expired()
+
+        blob_id = uuid.uuid4().hex
+        audio_path, meta_path = self._paths(blob_id)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'user_id': user_id, 'audio_format': audio_format}, f)
+        tmp_path = f"{audio_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(audio_bytes)
+        os.replace(tmp_path, audio_path)
+        return blob_id
+
+    def take(self, blob_id: str, user_id: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Read and delete a saved recording.
+
+        Returns:
+            Tuple of (audio_bytes, audio_format), or None if missing, expired or owned by someone else
+        """
+        if not blob_id or not _BLOB_ID_PATTERN.match(blob_id):
+            return None
+        audio_path, meta_path = self._paths(blob_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            if metadata.get('user_id') != user_id:
+                return None
+            expired = time.time() - os.path.getmtime(audio_path) > self.ttl_seconds
+            with open(audio_path, 'rb') as f:
+                audio_bytes = f.read()
+        except (OSError, ValueError):
+            return None
+        self._remove(blob_id)
+        if expired:
+            return None
+        return audio_bytes, metadata.get('audio_format')
+
+    def _remove(self, blob_id: str) -> None:
+        for path in self._paths(blob_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _cleanup_expired(self) -> None:
+        """Delete blobs older than the TTL. Runs at most once per CLEANUP_INTERVAL_SECONDS."""
+        now = time.time()
+        if now - self._last_cleanup < self.CLEANUP_INTERVAL_SECONDS or not self._cleanup_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_cleanup = now
+            removed = 0
+            for name in os.listdir(self.store_dir):
+                path = os.path.join(self.store_dir, name)
+                try:
+                    if now - os.path.getmtime(path) > self.ttl_seconds:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+            if removed:
+                logging.info(f"Audio input store: removed {removed} expired files")
+        finally:
+            self._cleanup_lock.release()
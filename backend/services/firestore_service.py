@@ -368,7 +368,41 @@ class FirestoreService:
         if doc.exists:
             return doc.to_dict()
         return None
-    
+
+    def get_content_index_entry(self, content_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the deduplication index entry for an uploaded file's content key
+
+        Args:
+            content_key: SHA-256 of the file bytes plus the prompt variant
+
+        Returns:
+            Index entry (including the processed document's ID) if found, None otherwise
+        """
+        doc_ref = self.db.collection('document_content_index').document(content_key)
+        doc = doc_ref.get()
+        if doc.exists:
+            return doc.to_dict()
+        return None
+
+    def save_content_index_entry(self, content_key: str, entry_data: Dict[str, Any]) -> bool:
+        """
+        Point a content key at a processed document, replacing any previous entry
+
+        Args:
+            content_key: SHA-256 of the file bytes plus the prompt variant
+            entry_data: Index entry data including document_id
+
+        Returns:
+            True if the entry was saved successfully
+        """
+        try:
+            self.db.collection('document_content_index').document(content_key).set(entry_data)
+            return True
+        except Exception as e:
+            print(f"Error saving content index entry: {e}")
+            return False
+
     def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a document by its ID
@@ -0,0 +1,623 @@
+"""
+Background pipeline for ingesting uploaded documents.
+
+upload_document used to create the Firestore entry, upload to GCS, run the DUA graph
+and queue TTS inside one request, which regularly ran past the gunicorn timeout. The
+request now only spools the upload to DATA_DIR/ingestion, creates the document with
+status 'queued', enqueues a job here and answers 202.
+
+A job moves through four stages, each claimed and retried on its own:
+
+    store      upload the spooled file to GCS                 status: uploading -> uploaded
+    narrative  DUA narrative (PDF/images) or text extraction  status: processing_dua / processing_text -> processed_dua
+               (the DUA graph streams its output into dua_narrative_partial meanwhile)
+    tts        queue TTS pre-generation (TTSJobQueue)         tts_status: queued
+    finalize   delete the spooled file
+
+Uploads are deduplicated by content (INGESTION_DEDUP_ENABLED, on by default). The store
+stage hashes the file (SHA-256) together with the prompt variant the narrative depends
+on ('standard', 'visually_impaired' or 'text') and looks the key up in Firestore's
+document_content_index. If a processed document with that key still exists, its
+original file and TTS assets are copied within GCS (StorageService.copy_file) and its
+narrative is reused, so neither Gemini nor TTS runs again. Newly processed documents
+are added to the index.
+
+Failures are retried with backoff up to INGESTION_JOB_MAX_ATTEMPTS per stage; the
+document then gets upload_failed, dua_failed or processing_failed (tts_status 'failed'
+for the tts stage). DUA failures are only retried when transient (timeouts, 429, 5xx);
+content and parse errors fail the document at once. Like TTSJobQueue, jobs live in
+SQLite under DATA_DIR/jobs, every gunicorn worker runs INGESTION_JOB_WORKERS daemon
+threads, and a job left 'processing' by a dead worker is reclaimed after
+INGESTION_JOB_STALE_SECONDS.
+"""
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import shutil
+import socket
+import sqlite3
+import asyncio
+import logging
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.utils.data_dir import get_data_dir
+
+# Load environment variables
+load_dotenv()
+
+DUA_ELIGIBLE_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'} # File types the DUA graph narrates (includes images)
+TEXT_ELIGIBLE_EXTENSIONS = {'docx', 'txt', 'md'} # Native text support extensions
+# 'full': synthesize the whole narrative in the background after ingestion (TTS job queue).
+# 'lazy': synthesize nothing up front; read-aloud uses /tts-segments on demand.
+TTS_PREGENERATION_MODE = os.getenv('TTS_PREGENERATION_MODE', 'full').strip().lower()
+INGESTION_DEDUP_ENABLED = os.getenv('INGESTION_DEDUP_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
+
+# Pipeline stages, in order
+STAGE_STORE = 'store'
+STAGE_NARRATIVE = 'narrative'
+STAGE_TTS = 'tts'
+STAGE_FINALIZE = 'finalize'
+STAGES = (STAGE_STORE, STAGE_NARRATIVE, STAGE_TTS, STAGE_FINALIZE)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'processing'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    job_id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    original_filename TEXT NOT NULL,
+    mimetype TEXT,
+    file_extension TEXT NOT NULL,
+    spool_path TEXT NOT NULL,
+    gcs_uri TEXT,
+    narrative TEXT,
+    content_key TEXT,
+    reuse_document_id TEXT,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    claimed_by TEXT,
+    claimed_at REAL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_document ON ingestion_jobs (document_id, created_at);
+"""
+
+# Columns added after the table was first created, with their types
+_ADDED_COLUMNS = {'content_key': 'TEXT', 'reuse_document_id': 'TEXT'}
+
+# Gemini/Google API errors start with their HTTP status code, e.g. "503 The service is currently unavailable."
+_TRANSIENT_STATUS_PATTERN = re.compile(r'(?:^|: )(?:429|5\d\d) ')
+_TRANSIENT_ERROR_MARKERS = (
+    'timeout', 'timed out', 'deadline exceeded', 'resource exhausted', 'resource_exhausted',
+    'rate limit', 'unavailable', 'internal error', 'connection'
+)
+
+# Columns returned by get_job/get_latest_job
+_STATUS_COLUMNS = (
+    'job_id', 'document_id', 'user_id', 'stage', 'status', 'attempts', 'error',
+    'gcs_uri', 'reuse_document_id', 'created_at', 'updated_at'
+)
+
+
+def extract_text(path: str, file_extension: str) -> str:
+    """Plain text of a .docx, .txt or .md file"""
+    if file_extension == 'docx':
+        import docx  # For native Word document support
+        return "\n".join(para.text for para in docx.Document(path).paragraphs)
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8', errors='replace')
+
+
+def is_transient_error(message: str) -> bool:
+    """Whether an error message describes a failure worth retrying (timeout, 429, 5xx, network)"""
+    if _TRANSIENT_STATUS_PATTERN.search(message):
+        return True
+    lowered = message.lower()
+    return any(marker in lowered for marker in _TRANSIENT_ERROR_MARKERS)
+
+
+class PermanentStageError(RuntimeError):
+    """A stage failure that retrying cannot fix; the job fails without further attempts"""
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionJobQueue:
+    """Service class for queueing and running the staged document ingestion pipeline"""
+
+    _instance = None
+
+    # How long an idle worker sleeps before polling the table again
+    POLL_INTERVAL_SECONDS = 2.0
+    # Delay before retrying a failed stage, multiplied by the attempt number
+    RETRY_BACKOFF_SECONDS = 15
+
+    def __new__(cls):
+        """Singleton pattern so each process runs one worker pool"""
+        if cls._instance is None:
+            cls._instance = super(IngestionJobQueue, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, db_path: Optional[str] = None, spool_dir: Optional[str] = None,
+                    num_workers: Optional[int] = None, max_attempts: Optional[int] = None,
+                    stale_seconds: Optional[int] = None, dedup_enabled: Optional[bool] = None):
+        """Create the job table and spool directory and read the worker settings"""
+        self.db_path = db_path or os.path.join(get_data_dir('jobs'), 'ingestion_jobs.db')
+        self.spool_dir = spool_dir or get_data_dir('ingestion')
+        self.num_workers = num_workers if num_workers is not None else int(os.getenv('INGESTION_JOB_WORKERS', 2))
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv('INGESTION_JOB_MAX_ATTEMPTS', 3))
+        self.stale_seconds = stale_seconds if stale_seconds is not None else int(os.getenv('INGESTION_JOB_STALE_SECONDS', 1800))
+        self.dedup_enabled = dedup_enabled if dedup_enabled is not None else INGESTION_DEDUP_ENABLED
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stage_runners = {
+            STAGE_STORE: self._run_store,
+            STAGE_NARRATIVE: self._run_narrative,
+            STAGE_TTS: self._run_tts,
+            STAGE_FINALIZE: self._run_finalize,
+        }
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(ingestion_jobs)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE ingestion_jobs ADD COLUMN {column} {column_type}")
+        logging.info(f"Ingestion job queue ready at {self.db_path} ({self.num_workers} worker(s) per process)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation: safe across threads and gunicorn processes
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Producer side ---
+
+    def enqueue(self, document_id: str, user_id: str, file_content: BinaryIO, original_filename: str,
+                mimetype: Optional[str], file_extension: str) -> str:
+        """
+        Spool an upload to local disk and queue it for ingestion.
+
+        Args:
+            document_id: Firestore document created for the upload
+            user_id: Owner of the document
+            file_content: The uploaded file stream (read to the end here)
+            original_filename: Client-side filename, used for the GCS object name
+            mimetype: Content type reported by the client
+            file_extension: Lower-case extension, which selects DUA or text extraction
+
+        Returns:
+            The job ID
+        """
+        job_id = uuid.uuid4().hex
+        spool_path = os.path.join(self.spool_dir, f"{job_id}.upload")
+        with open(spool_path, 'wb') as f:
+            shutil.copyfileobj(file_content, f)
+
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO ingestion_jobs (job_id, document_id, user_id, original_filename, mimetype, file_extension, "
+                "spool_path, stage, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, document_id, user_id, original_filename, mimetype, file_extension,
+                 spool_path, STAGE_STORE, JOB_QUEUED, now, now, now)
+            )
+        self._wakeup.set()
+        logging.info(f"Queued ingestion job {job_id} for document {document_id} ({os.path.getsize(spool_path)} bytes)")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a single job, or None if unknown"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(_STATUS_COLUMNS)} FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_latest_job(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Status of the most recent ingestion job for a document, or None if there is none"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(_STATUS_COLUMNS)} FROM ingestion_jobs WHERE document_id = ? "
+                "ORDER BY created_at DESC LIMIT 1", (document_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    # --- Worker side ---
+
+    def start(self) -> None:
+        """Start this process's worker threads (idempotent)"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(max(self.num_workers, 0)):
+            thread = threading.Thread(target=self._worker_loop, name=f"ingestion-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the worker threads to exit once their current stage is done"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = self.process_next()
+            except Exception as e:
+                logging.error(f"Ingestion worker error: {e}", exc_info=True)
+                processed = False
+            if not processed:
+                self._wakeup.wait(self.POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest runnable job to 'processing' and return it"""
+        now = time.time()
+        stale_before = now - self.stale_seconds
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so two workers never claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            abandoned = conn.execute(
+                "SELECT * FROM ingestion_jobs WHERE status = ? AND claimed_at < ? AND attempts >= ?",
+                (JOB_RUNNING, stale_before, self.max_attempts)
+            ).fetchall()
+            if abandoned:
+                conn.execute(
+                    "UPDATE ingestion_jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE status = ? AND claimed_at < ? AND attempts >= ?",
+                    (JOB_FAILED, 'Worker stopped while processing', now, JOB_RUNNING, stale_before, self.max_attempts)
+                )
+            row = conn.execute(
+                "SELECT * FROM ingestion_jobs WHERE (status = ? AND available_at <= ?) OR (status = ? AND claimed_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, now, JOB_RUNNING, stale_before)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE ingestion_jobs SET status = ?, attempts = attempts + 1, claimed_by = ?, claimed_at = ?, "
+                    "updated_at = ? WHERE job_id = ?",
+                    (JOB_RUNNING, self.worker_name, now, now, row['job_id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        for abandoned_job in abandoned:
+            logging.error(f"Ingestion job {abandoned_job['job_id']} abandoned by its worker in stage {abandoned_job['stage']}; giving up")
+            self._fail_document(dict(abandoned_job), 'Worker stopped while processing')
+
+        if not row:
+            return None
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+    def process_next(self) -> bool:
+        """
+        Claim a job and run its current stage.
+
+        Returns:
+            True if a stage was run (successfully or not), False if nothing was runnable
+        """
+        job = self._claim_next()
+        if not job:
+            return False
+
+        job_id, document_id, stage = job['job_id'], job['document_id'], job['stage']
+        logging.info(f"Running ingestion stage '{stage}' of job {job_id} for document {document_id} (attempt {job['attempts']})")
+        try:
+            results = self._stage_runners[stage](job) or {}
+        except Exception as e:
+            self._record_failure(job, str(e), retryable=not isinstance(e, PermanentStageError))
+            return True
+
+        next_index = STAGES.index(stage) + 1
+        if next_index < len(STAGES):
+            # Each stage starts with a fresh attempt budget
+            self._finish_job(job_id, JOB_QUEUED, stage=STAGES[next_index], attempts=0, error=None,
+                             available_at=time.time(), **results)
+            self._wakeup.set()
+        else:
+            self._finish_job(job_id, JOB_COMPLETED, error=None, narrative=None)
+            logging.info(f"Ingestion job {job_id} completed for document {document_id}")
+        return True
+
+    # --- Stages ---
+
+    def _run_store(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Upload the spooled file to GCS, or copy it from an already processed duplicate"""
+        from backend.services.storage_service import StorageService
+
+        self._update_document(job['document_id'], {'status': 'uploading'})
+
+        content_key, source = None, None
+        if self.dedup_enabled and job['file_extension'] in DUA_ELIGIBLE_EXTENSIONS | TEXT_ELIGIBLE_EXTENSIONS:
+            try:
+                content_key = f"{file_sha256(job['spool_path'])}:{self._prompt_variant(job)}"
+            except Exception as e:
+                logging.warning(f"Skipping deduplication for document {job['document_id']}: {e}")
+            if content_key:
+                source = self._find_processed_duplicate(content_key)
+        results = {'content_key': content_key, 'reuse_document_id': source['id'] if source else None}
+
+        if source:
+            extension = os.path.splitext(job['original_filename'])[1]
+            gcs_uri = self._copy_asset(source.get('gcs_uri'), f"{job['user_id']}/{uuid.uuid4()}{extension}")
+            if gcs_uri:
+                logging.info(f"Document {job['document_id']} duplicates processed document {source['id']}; copied {gcs_uri}")
+                self._update_document(job['document_id'], {
+                    'status': 'uploaded',
+                    'gcs_uri': gcs_uri,
+                    'content_length': os.path.getsize(job['spool_path'])
+                })
+                return dict(results, gcs_uri=gcs_uri)
+
+        with open(job['spool_path'], 'rb') as f:
+            success, metadata = StorageService().upload_file(
+                file_content=f,
+                content_type=job['mimetype'],
+                user_id=job['user_id'],
+                original_filename=job['original_filename']
+            )
+        if not success or not metadata:
+            raise RuntimeError("Failed to upload file to storage")
+        self._update_document(job['document_id'], {
+            'status': 'uploaded',
+            'gcs_uri': metadata['gcsUri'],
+            'content_length': metadata.get('size') or os.path.getsize(job['spool_path'])
+        })
+        return dict(results, gcs_uri=metadata['gcsUri'])
+
+    def _run_narrative(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Produce the document's narrative with the DUA graph or native text extraction"""
+        document_id, file_extension = job['document_id'], job['file_extension']
+        source = self._find_processed_duplicate(job['content_key'], job['reuse_document_id']) if job.get('reuse_document_id') else None
+        if source:
+            narrative = source['dua_narrative_content']
+            logging.info(f"Reusing the narrative of document {source['id']} for duplicate {document_id}")
+        elif file_extension in DUA_ELIGIBLE_EXTENSIONS:
+            # Clear text a failed earlier attempt may have published
+            self._update_document(document_id, {'status': 'processing_dua', 'dua_narrative_partial': None})
+            narrative = self._run_dua(job)
+        elif file_extension in TEXT_ELIGIBLE_EXTENSIONS:
+            self._update_document(document_id, {'status': 'processing_text'})
+            narrative = extract_text(job['spool_path'], file_extension)
+            if not narrative:
+                raise RuntimeError("Extracted text was empty.")
+        else:
+            self._update_document(document_id, {'status': 'processed_generic'})
+            return {'narrative': None}
+
+        # 'processed_dua' is also used for native text, for client compatibility
+        self._update_document(document_id, {
+            'status': 'processed_dua',
+            'dua_narrative_content': narrative,
+            'dua_narrative_partial': None,
+            'processing_error': None
+        })
+        if not source and job.get('content_key'):
+            self._record_processed_content(job['content_key'], document_id)
+        logging.info(f"Narrative ready for document {document_id} ({len(narrative)} chars)")
+        return {'narrative': narrative}
+
+    def _run_dua(self, job: Dict[str, Any]) -> str:
+        from backend.graphs.document_understanding_agent.graph import run_dua_processing_for_document
+
+        # The spooled upload is still on local disk, so the graph doesn't download it from GCS again
+        with open(job['spool_path'], 'rb') as f:
+            file_bytes = f.read()
+        try:
+            dua_result = asyncio.run(run_dua_processing_for_document({
+                "document_id": job['document_id'],
+                "user_id": job['user_id'],  # Pass user ID for adaptive prompt selection
+                "input_file_content_bytes": file_bytes,
+                "input_file_path": job['gcs_uri'],
+                "input_file_mimetype": job['mimetype'],
+                "original_gcs_uri": job['gcs_uri'],
+                "publish_partial_narrative": True  # Readable (and playable) while generation continues
+            }))
+        except Exception as e:
+            if isinstance(e, (TimeoutError, ConnectionError)) or is_transient_error(str(e)):
+                raise
+            raise PermanentStageError(str(e)) from e
+        if not dua_result or not dua_result.get('tts_ready_narrative'):
+            error = (dua_result or {}).get('error_message') or 'DUA processing failed or returned no narrative.'
+            # Content and parse failures come back the same on every attempt
+            raise RuntimeError(error) if is_transient_error(error) else PermanentStageError(error)
+        return dua_result['tts_ready_narrative']
+
+    def _run_tts(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Hand substantial narratives to the TTS job queue (skipped in lazy mode)"""
+        from backend.services.tts_job_queue import TTSJobQueue
+
+        narrative = job.get('narrative')
+        if not narrative or len(narrative.strip()) <= 10:
+            return {}
+        if TTS_PREGENERATION_MODE == 'lazy':
+            logging.info(f"Lazy TTS mode: skipping pre-generation for {job['document_id']}; segments are synthesized on demand.")
+            return {}
+        if job.get('reuse_document_id') and self._reuse_tts_assets(job):
+            return {}
+        self._update_document(job['document_id'], {'tts_status': 'queued', 'tts_error': None})
+        tts_job_id = TTSJobQueue().enqueue(job['document_id'], job['user_id'], narrative)
+        logging.info(f"Queued TTS pre-generation job {tts_job_id} for document {job['document_id']}.")
+        return {}
+
+    def _run_finalize(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Remove the spooled upload"""
+        self._remove_spool(job)
+        return {}
+
+    # --- Deduplication ---
+
+    def _prompt_variant(self, job: Dict[str, Any]) -> str:
+        """The narrative prompt a job's file would get (mirrors the DUA graph's profile lookup)"""
+        from backend.services.firestore_service import FirestoreService
+
+        if job['file_extension'] in TEXT_ELIGIBLE_EXTENSIONS:
+            return 'text'
+        user_profile = FirestoreService().get_user(job['user_id']) or {}
+        return 'visually_impaired' if user_profile.get('visualImpairment') else 'standard'
+
+    def _find_processed_duplicate(self, content_key: str, document_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        The processed document indexed under content_key, if it still exists and has a narrative.
+
+        Args:
+            content_key: SHA-256 of the file plus the prompt variant
+            document_id: Check this document instead of reading the index
+        """
+        from backend.services.firestore_service import FirestoreService
+
+        try:
+            firestore_service = FirestoreService()
+            if not document_id:
+                entry = firestore_service.get_content_index_entry(content_key)
+                document_id = entry.get('document_id') if entry else None
+                if not document_id:
+                    return None
+            source = firestore_service.get_document(document_id)
+        except Exception as e:
+            logging.warning(f"Content index lookup failed for {content_key}: {e}")
+            return None
+        # The source may have been deleted or reprocessed since it was indexed
+        if not source or source.get('status') != 'processed_dua' or not source.get('dua_narrative_content'):
+            return None
+        source.setdefault('id', document_id)
+        return source
+
+    def _record_processed_content(self, content_key: str, document_id: str) -> None:
+        from backend.services.firestore_service import FirestoreService
+        try:
+            FirestoreService().save_content_index_entry(content_key, {
+                'document_id': document_id,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            })
+        except Exception as e:
+            logging.warning(f"Could not index content of document {document_id}: {e}")
+
+    def _copy_asset(self, gcs_uri: Optional[str], destination_path: str) -> Optional[str]:
+        """Copy a GCS object of the source document; returns the new URI or None"""
+        from backend.services.storage_service import StorageService
+
+        storage_service = StorageService()
+        prefix = f"gs://{storage_service.bucket_name}/"
+        if not gcs_uri or not gcs_uri.startswith(prefix):
+            return None
+        if not storage_service.copy_file(gcs_uri[len(prefix):], destination_path):
+            return None
+        return prefix + destination_path
+
+    def _reuse_tts_assets(self, job: Dict[str, Any]) -> bool:
+        """Copy the duplicate's finished TTS audio and timepoints instead of synthesizing again"""
+        document_id, user_id = job['document_id'], job['user_id']
+        source = self._find_processed_duplicate(job['content_key'], job['reuse_document_id'])
+        if not source or source.get('tts_status') != 'completed':
+            return False
+        # Same object names the TTS job queue would upload to, keeping the source's audio extension
+        source_audio_uri = source.get('tts_audio_gcs_uri') or ''
+        audio_extension = os.path.splitext(source_audio_uri)[1] or '.mp3'
+        audio_gcs_uri = self._copy_asset(source_audio_uri, f"{user_id}/tts_outputs/{document_id}_tts{audio_extension}")
+        timepoints_gcs_uri = self._copy_asset(source.get('tts_timepoints_gcs_uri'), f"{user_id}/tts_outputs/{document_id}_timepoints.json")
+        if not (audio_gcs_uri and timepoints_gcs_uri):
+            return False
+        self._update_document(document_id, {
+            'tts_status': 'completed',
+            'tts_error': None,
+            'tts_audio_gcs_uri': audio_gcs_uri,
+            'tts_timepoints_gcs_uri': timepoints_gcs_uri
+        })
+        logging.info(f"Copied TTS assets of document {source['id']} to duplicate {document_id}")
+        return True
+
+    # --- Bookkeeping ---
+
+    def _record_failure(self, job: Dict[str, Any], error: str, retryable: bool = True) -> None:
+        """Schedule a retry of the stage with backoff, or fail the job after max_attempts (or at once if not retryable)"""
+        job_id, document_id, stage = job['job_id'], job['document_id'], job['stage']
+        if retryable and job['attempts'] < self.max_attempts:
+            delay = self.RETRY_BACKOFF_SECONDS * job['attempts']
+            logging.warning(f"Ingestion stage '{stage}' of job {job_id} failed ({error}); retrying in {delay}s")
+            self._finish_job(job_id, JOB_QUEUED, error=error, available_at=time.time() + delay)
+        else:
+            logging.error(f"Ingestion stage '{stage}' of job {job_id} for document {document_id} failed after {job['attempts']} attempts: {error}")
+            self._finish_job(job_id, JOB_FAILED, error=error)
+            self._fail_document(job, error)
+
+    def _fail_document(self, job: Dict[str, Any], error: str) -> None:
+        """Record a permanent failure on the document and drop the spooled upload"""
+        stage = job['stage']
+        if stage == STAGE_STORE:
+            self._update_document(job['document_id'], {'status': 'upload_failed', 'processing_error': error})
+        elif stage == STAGE_NARRATIVE:
+            status = 'dua_failed' if job['file_extension'] in DUA_ELIGIBLE_EXTENSIONS else 'processing_failed'
+            self._update_document(job['document_id'], {'status': status, 'processing_error': error})
+        elif stage == STAGE_TTS:
+            # The narrative stays usable; /tts-status reports the missing audio
+            self._update_document(job['document_id'], {'tts_status': 'failed', 'tts_error': error})
+        # A failed finalize stage only leaves the spooled file behind, removed below
+        self._remove_spool(job)
+
+    def _remove_spool(self, job: Dict[str, Any]) -> None:
+        try:
+            os.remove(job['spool_path'])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not remove spooled upload {job['spool_path']}: {e}")
+
+    def _finish_job(self, job_id: str, status: str, **fields: Any) -> None:
+        fields.update(status=status, updated_at=time.time(), claimed_by=None)
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with closing(self._connect()) as conn:
+            conn.execute(f"UPDATE ingestion_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def _update_document(self, document_id: str, fields: Dict[str, Any]) -> None:
+        """Mirror pipeline progress onto the Firestore document; failures are logged, not raised"""
+        from backend.services.firestore_service import FirestoreService
+        try:
+            fields = dict(fields, updated_at=datetime.now(timezone.utc).isoformat())
+            if not FirestoreService().update_document(document_id, fields):
+                logging.error(f"Failed to update ingestion status for document {document_id}")
+        except Exception as e:
+            logging.error(f"Error updating ingestion status for document {document_id}: {e}")
@@ -303,7 +303,8 @@ class StorageService:
         content_type: str,
         user_id: str,
         base_filename: str,
-        sub_folder: Optional[str] = None
+        sub_folder: Optional[str] = None,
+        content_encoding: Optional[str] = None
     ) -> Tuple[bool, Optional[Dict[str, Any]]]:
         """
         Upload bytes content as a file to Google Cloud Storage.
@@ -314,6 +315,8 @@ class StorageService:
             user_id: Firebase Auth UID of the file owner.
             base_filename: A base filename (e.g., 'audio.mp3') to construct the GCS path.
             sub_folder: Optional sub-folder to store the file in.
+            content_encoding: Optional Content-Encoding of the bytes (e.g., 'gzip'). GCS then
+                serves them decompressed to clients that don't accept that encoding.
 
         Returns:
             Tuple of (success: bool, file_metadata: Optional[Dict])
@@ -325,6 +328,8 @@ class StorageService:
                 file_path = f"{user_id}/{base_filename}"
             
             blob = self.bucket.blob(file_path)
+            if content_encoding:
+                blob.content_encoding = content_encoding
             blob.upload_from_string(
                 content_bytes,
                 content_type=content_type
@@ -5,21 +5,55 @@ This module handles interactions with Google Cloud Speech-to-Text API,
 providing transcription capabilities for the AI Tutor application.
 """
 
+import io
 import os
 import time
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple, List, Iterator, Generator
 from google.cloud import speech
 from google.oauth2 import service_account
 from dotenv import load_dotenv
+from simple_websocket import ConnectionClosed
+from pydub import AudioSegment
 import logging
 import traceback
 import datetime
-from simple_websocket import ConnectionClosed
 import json
+from backend.utils.audio_capture import AudioCapture
+from backend.utils.audio_utils import WavFormat, opus_packets, opus_stream_info
+from backend.services.stt_stream import STREAM_ENCODINGS, STTStreamSession, negotiate_stream, stream_session_slots
+from backend.utils.voice_activity import TrimResult, detect_speech, estimate_edge_silence_seconds, pcm_to_mono, trim_wav
 
 # Load environment variables
 load_dotenv()
 
+# Recording formats accepted by STTService.transcribe (file extension / short name -> encoding)
+AUDIO_FORMAT_ENCODINGS = {
+    "wav": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+    "flac": speech.RecognitionConfig.AudioEncoding.FLAC,
+    "mp3": speech.RecognitionConfig.AudioEncoding.MP3,
+    "ogg": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+    "opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+    "webm": speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
+}
+
+# Transcripts are memoized by audio hash so one utterance is never sent to the API twice
+# (e.g. by agent_chat_route and again by the supervisor's input node)
+STT_MEMO_MAX_ENTRIES = int(os.getenv('STT_MEMO_MAX_ENTRIES', 32))
+STT_MEMO_TTL_SECONDS = int(os.getenv('STT_MEMO_TTL_SECONDS', 300))
+
+# Leading/trailing silence is trimmed locally before upload; recordings with no speech
+# never reach the API. Trims shorter than STT_VAD_MIN_TRIM_SECONDS are not worth re-encoding.
+STT_VAD_ENABLED = os.getenv('STT_VAD_ENABLED', 'true').lower() == 'true'
+STT_VAD_MIN_TRIM_SECONDS = float(os.getenv('STT_VAD_MIN_TRIM_SECONDS', 0.5))
+# Opus recordings (browser webm/ogg) are only decoded and re-encoded when their packet
+# sizes suggest at least this much leading + trailing silence (trimming keeps 0.25s padding per side)
+STT_VAD_MIN_OPUS_SILENCE_SECONDS = float(os.getenv('STT_VAD_MIN_OPUS_SILENCE_SECONDS', 1.0))
+# Compressed recordings are decoded to this rate for detection and re-encoded as Ogg Opus
+_VAD_SAMPLE_RATE = 16000
+
 class STTService:
     """Service class for Google Cloud Speech-to-Text operations"""
     
@@ -36,6 +70,9 @@ class STTService:
         """Initialize Google Cloud Speech-to-Text client with credentials from environment variables"""
         self.client = None
         self.logger = logging.getLogger(self.__class__.__name__)  # Correctly initialize logger
+        self.debug_capture = AudioCapture()
+        self._memo: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
         
         try:
             # Get required environment variables
@@ -72,6 +109,159 @@ class STTService:
             return False
         return True
     
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        audio_format: Optional[str] = None,
+        language_code: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Transcribe a recorded utterance. This is the entry point routes and graph nodes
+        should use: the encoding and (for Opus) sample rate are derived from the recording,
+        leading/trailing silence is trimmed locally (recordings with no speech return an
+        empty transcript without an API call), and results are memoized by audio hash
+        for STT_MEMO_TTL_SECONDS.
+
+        Args:
+            audio_bytes: The recording
+            audio_format: Short format name (wav, flac, mp3, ogg, opus, webm); None lets
+                the API detect WAV/FLAC from the header
+            language_code: Optional language code (default: STT_DEFAULT_LANGUAGE_CODE)
+            model: Optional recognition model (default: STT_DEFAULT_MODEL)
+
+        Returns:
+            Same as transcribe_audio_bytes: (success, result details with 'transcript')
+        """
+        if not audio_bytes:
+            return False, {"error": "No audio data provided."}
+
+        audio_format = audio_format.lower() if audio_format else None
+        if audio_format and audio_format not in AUDIO_FORMAT_ENCODINGS:
+            return False, {"error": f"Unsupported audio format '{audio_format}'"}
+
+        memo_key = hashlib.sha256(audio_bytes).hexdigest() + f"|{audio_format}|{language_code}|{model}"
+        cached = self._memo_get(memo_key)
+        if cached is not None:
+            logging.info(f"[STTService] Reusing transcript for audio {memo_key[:12]} ({len(audio_bytes)} bytes)")
+            return True, cached
+
+        if STT_VAD_ENABLED:
+            has_speech, audio_bytes, audio_format = self._trim_silence(audio_bytes, audio_format)
+            if not has_speech:
+                result = {
+                    "transcript": None,
+                    "language_code": language_code or os.getenv('STT_DEFAULT_LANGUAGE_CODE', "en-US"),
+                    "model_used": model or os.getenv('STT_DEFAULT_MODEL', "latest_short"),
+                    "confidence": None,
+                    "audio_size_bytes": len(audio_bytes),
+                    "processing_time_ms": 0,
+                    "no_speech": True
+                }
+                self._memo_put(memo_key, result)
+                return True, result
+
+        encoding = None
+        sample_rate_hertz = None
+        audio_channel_count = 1
+        if audio_format:
+            encoding = AUDIO_FORMAT_ENCODINGS[audio_format]
+            if encoding in (speech.RecognitionConfig.AudioEncoding.OGG_OPUS, speech.RecognitionConfig.AudioEncoding.WEBM_OPUS):
+                # Opus needs an explicit rate that matches the recording's header
+                sample_rate_hertz, audio_channel_count = opus_stream_info(audio_bytes) or (48000, 1)
+
+        success, result = self.transcribe_audio_bytes(
+            audio_bytes=audio_bytes,
+            encoding=encoding,
+            sample_rate_hertz=sample_rate_hertz,
+            language_code=language_code,
+            audio_channel_count=audio_channel_count,
+            model=model
+        )
+        if success and result:
+            self._memo_put(memo_key, result)
+        return success, result
+
+    def _trim_silence(self, audio_bytes: bytes, audio_format: Optional[str]) -> Tuple[bool, bytes, Optional[str]]:
+        """
+        Run voice activity detection on a recording and cut leading/trailing silence.
+
+        Returns:
+            Tuple of (has_speech, audio_bytes, audio_format). The audio is returned unchanged
+            when it cannot be decoded or when trimming would save less than STT_VAD_MIN_TRIM_SECONDS.
+        """
+        is_wav = audio_format == 'wav' or (audio_format is None and audio_bytes[:4] == b'RIFF')
+        try:
+            if is_wav:
+                trimmed_format = audio_format
+                result = trim_wav(audio_bytes)
+            else:
+                trimmed_format = 'ogg'
+                result = self._trim_compressed(audio_bytes, audio_format)
+        except Exception as e:
+            logging.warning(f"[STTService] Skipping silence trimming, could not decode {audio_format or 'audio'}: {e}")
+            return True, audio_bytes, audio_format
+
+        if result.audio_bytes is None:
+            logging.info(f"[STTService] No speech detected in {result.original_seconds:.2f}s recording; skipping STT API call")
+            return False, audio_bytes, audio_format
+        if result.audio_bytes is audio_bytes or result.original_seconds - result.speech_seconds < STT_VAD_MIN_TRIM_SECONDS:
+            return True, audio_bytes, audio_format
+        logging.info(
+            f"[STTService] Trimmed silence: {result.original_seconds:.2f}s -> {result.speech_seconds:.2f}s, "
+            f"{len(audio_bytes)} -> {len(result.audio_bytes)} bytes"
+        )
+        return True, result.audio_bytes, trimmed_format
+
+    @staticmethod
+    def _trim_compressed(audio_bytes: bytes, audio_format: Optional[str]) -> TrimResult:
+        """Decode a compressed recording with ffmpeg for detection; re-encode the speech span as Ogg Opus"""
+        packets = opus_packets(audio_bytes) if audio_format in ('webm', 'ogg', 'opus') else None
+        if packets:
+            original_seconds = sum(seconds for _, seconds in packets)
+            if estimate_edge_silence_seconds(packets) < STT_VAD_MIN_OPUS_SILENCE_SECONDS:
+                # Too little silence to pay for a decode and a lossy re-encode; send the original
+                return TrimResult(audio_bytes, original_seconds, original_seconds)
+
+        segment = AudioSegment.from_file(
+            io.BytesIO(audio_bytes),
+            format='ogg' if audio_format == 'opus' else audio_format,
+            parameters=['-ac', '1', '-ar', str(_VAD_SAMPLE_RATE)]
+        )
+        samples = pcm_to_mono(segment.raw_data, WavFormat(segment.frame_rate, segment.channels, segment.sample_width))
+        original_seconds = len(samples) / segment.frame_rate
+        bounds = detect_speech(samples, segment.frame_rate)
+        if bounds is None:
+            return TrimResult(None, original_seconds, 0.0)
+        speech_seconds = (bounds.end_sample - bounds.start_sample) / segment.frame_rate
+        if original_seconds - speech_seconds < STT_VAD_MIN_TRIM_SECONDS:
+            # Not worth a re-encode; send the original recording
+            return TrimResult(audio_bytes, original_seconds, original_seconds)
+
+        speech_segment = segment[bounds.start_sample * 1000 // segment.frame_rate:bounds.end_sample * 1000 // segment.frame_rate]
+        buffer = io.BytesIO()
+        speech_segment.export(buffer, format='ogg', codec='libopus', bitrate='32k')
+        return TrimResult(buffer.getvalue(), original_seconds, speech_seconds)
+
+    def _memo_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._memo_lock:
+            entry = self._memo.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.time():
+                del self._memo[key]
+                return None
+            self._memo.move_to_end(key)
+            return dict(result)
+
+    def _memo_put(self, key: str, result: Dict[str, Any]) -> None:
+        with self._memo_lock:
+            self._memo[key] = (time.time() + STT_MEMO_TTL_SECONDS, dict(result))
+            self._memo.move_to_end(key)
+            while len(self._memo) > STT_MEMO_MAX_ENTRIES:
+                self._memo.popitem(last=False)
+
     def transcribe_audio_bytes(
         self, 
         audio_bytes: bytes, 
@@ -92,6 +282,7 @@ class STTService:
         try:
             # Determine defaults from environment variables if parameters are not provided
             transcript_text: Optional[str] = None # Initialize transcript_text
+            confidence: Optional[float] = None
             final_language_code = language_code if language_code is not None else os.getenv('STT_DEFAULT_LANGUAGE_CODE', "en-US")
             final_model = model if model is not None else os.getenv('STT_DEFAULT_MODEL', "latest_short")
 
@@ -142,31 +333,11 @@ class STTService:
             logging.info(log_msg_bytes)
             if self.logger: self.logger.info(log_msg_bytes)
 
-            # For debugging: Save the audio bytes being sent to the API
-            timestamp = time.strftime("%Y%m%d-%H%M%S")
-            debug_audio_filename = f"debug_audio_sent_to_api_{timestamp}.{'flac' if encoding == speech.RecognitionConfig.AudioEncoding.FLAC else 'wav' if encoding == speech.RecognitionConfig.AudioEncoding.LINEAR16 else 'raw'}"
-            
-            # Try to save in a 'debug_audio' subdirectory of the backend.
-            # Create it if it doesn't exist.
-            # Correctly get backend_dir assuming stt_service.py is in backend/services/
-            current_file_dir = os.path.dirname(os.path.abspath(__file__))
-            services_dir = current_file_dir 
-            backend_dir = os.path.dirname(services_dir) 
-            debug_dir = os.path.join(backend_dir, "debug_audio")
-            os.makedirs(debug_dir, exist_ok=True)
-            debug_audio_filepath = os.path.join(debug_dir, debug_audio_filename)
-            
-            try:
-                with open(debug_audio_filepath, "wb") as f:
-                    f.write(audio_bytes)
-                save_log_msg = f"[STTService] Saved audio bytes sent to API for inspection at: {debug_audio_filepath}"
-                logging.info(save_log_msg)
-                if self.logger: self.logger.info(save_log_msg)
-            except Exception as e_save:
-                save_err_msg = f"[STTService] Error saving debug audio file: {e_save}"
-                logging.error(save_err_msg)
-                if self.logger: self.logger.error(save_err_msg)
-
+            # Opt-in sampled capture for debugging (STT_DEBUG_CAPTURE_RATE); written off this thread
+            self.debug_capture.maybe_capture(
+                audio_bytes,
+                'flac' if encoding == speech.RecognitionConfig.AudioEncoding.FLAC else 'wav' if encoding == speech.RecognitionConfig.AudioEncoding.LINEAR16 else 'raw'
+            )
 
             audio_proto = speech.RecognitionAudio(content=audio_bytes)
             
@@ -482,89 +653,39 @@ class STTService:
             ws.close(reason=1011, message='STT service is not configured on the server.')
             return
 
-        # 1. Set up the recognition config
-        # We use WEBM_OPUS as it's common for web-based audio streaming (e.g. from browsers)
-        # Adjust sample rate if necessary, but 16000 or 48000 is typical. 
-        # Ideally, we might want to let the client negotiate this, but fixed for now based on app.py logic.
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
-            sample_rate_hertz=16000,
-            language_code="en-US",
-            enable_automatic_punctuation=True,
-        )
-        streaming_config = speech.StreamingRecognitionConfig(
-            config=config, interim_results=True
-        )
-
-        # 2. Define the generator for the streaming request
-        def request_generator():
-            while True:
-                try:
-                    # Receive data from the WebSocket
-                    # timeout=10 was in app.py, keeping it.
-                    message = ws.receive(timeout=10)
-                    
-                    if message is None:
-                        # None usually means connection closed cleanly or no data
-                        continue
-                    
-                    if isinstance(message, str):
-                        # Control messages or text data (unexpected for pure audio stream but possible)
-                        logger.info(f"Received string message: {message}")
-                        if message == 'CLOSE': # Example control
-                             break
-                        continue
-                    
-                    # Yield audio content
-                    yield speech.StreamingRecognizeRequest(audio_content=message)
-                    
-                except ConnectionClosed:
-                    logger.info("Client connection closed in generator.")
-                    break
-                except Exception as e:
-                    logger.error(f"Error receiving from websocket: {e}")
-                    break
-
+        # Sessions are capped per worker process; reject before reading anything
+        if not stream_session_slots.acquire(blocking=False):
+            logger.warning("Rejecting STT stream: too many concurrent sessions in this worker.")
+            try:
+                ws.close(reason=1013, message='Too many concurrent speech streams; try again shortly.')
+            except Exception:
+                pass
+            return
         try:
-            # Start streaming recognition
-            responses = self.client.streaming_recognize(
-                config=streaming_config,
-                requests=request_generator(),
+            # 1. Negotiate the audio format (optional JSON handshake) and build the config
+            negotiated = negotiate_stream(ws)
+            if negotiated is None:
+                logger.info("STT stream closed during handshake.")
+                return
+            options, initial_audio = negotiated
+            success, streaming_config = self.create_streaming_config(
+                encoding=STREAM_ENCODINGS[options.encoding],
+                sample_rate_hertz=options.sample_rate_hertz,
+                language_code=options.language_code,
+                interim_results=options.interim_results
             )
-
-            # 3. Process responses and send back to client
-            for response in responses:
-                if not response.results:
-                    continue
-                
-                result = response.results[0]
-                if not result.alternatives:
-                    continue
-                
-                transcript = result.alternatives[0].transcript
-                
-                response_data = {
-                    'is_final': result.is_final,
-                    'transcript': transcript,
-                    'stability': result.stability
-                }
-                
-                try:
-                    ws.send(json.dumps(response_data))
-                except ConnectionClosed:
-                    logger.info("Client connection closed while sending response.")
-                    break
-                except Exception as e:
-                    logger.error(f"Error sending response to websocket: {e}")
-                    break
-
-        except Exception as e:
-            logger.error(f"Error during STT stream processing: {e}")
-            # Optional: send error message to client if possible
+            if not success:
+                ws.close(reason=1011, message='Could not configure speech recognition.')
+                return
+            logger.info(f"STT stream configured: {options._asdict()}")
+            if initial_audio is None:
+                ws.send(json.dumps({"event": "ready", **options._asdict()}))
+
+            # 2. Serve the session: the socket is read on this thread into a bounded queue,
+            # and recognition runs on a separate thread (see backend/services/stt_stream.py)
+            STTStreamSession(ws, self.client, streaming_config, logger=logger, initial_audio=initial_audio).run()
+        except ConnectionClosed:
+            logger.info("Client connection closed during STT stream setup.")
         finally:
-            # Ensure connection is closed
-            try:
-                ws.close()
-            except:
-                pass
+            stream_session_slots.release()
             logger.info("WebSocket connection closed in STTService.")
@@ -0,0 +1,396 @@
+"""
+Streaming Speech-to-Text sessions for the /ws/stt/stream WebSocket.
+
+A client may open with a JSON handshake that picks the audio format, for example
+{"encoding": "linear16", "sample_rate_hertz": 16000, "language_code": "en-US",
+"interim_results": true}; the server validates it, builds the StreamingRecognitionConfig
+from it and answers {"event": "ready", ...}. Clients that send audio straight away get
+WEBM_OPUS at 16 kHz in STT_DEFAULT_LANGUAGE_CODE with interim results.
+
+A session runs on two threads. The WebSocket handler thread only reads audio frames
+into a bounded queue; a recognizer thread feeds that queue to streaming_recognize and
+sends results back to the client. Nothing polls the socket, and with gunicorn's gthread
+worker a dictation ties up one thread instead of a whole worker process.
+
+Long dictations outlive the API's per-stream duration limit, so the recognizer rolls
+over to a new stream by itself (see STT_STREAM_ROLLOVER_SECONDS). Audio sent since the
+last final result is kept in an overlap buffer and replayed into the new stream (after
+the container header for WebM/Ogg), and the old stream is cancelled rather than
+half-closed, so its unfinished words are recognized exactly once. The client sees one
+continuous sequence of results on the same socket.
+
+Backpressure: when the recognizer falls behind and the queue is full, the reader stops
+reading the socket (TCP then pushes back on the client) and tells the client once with
+{"event": "backpressure"}. If the queue stays full for STT_STREAM_BACKPRESSURE_TIMEOUT
+seconds the session ends with an error. Each session holds a gunicorn worker thread
+for its whole life, so each worker process runs at most STT_STREAM_MAX_SESSIONS
+sessions: by default its GUNICORN_THREADS minus STT_STREAM_RESERVED_HTTP_THREADS kept
+free for plain HTTP requests. Extra connections are closed with 1013 (try again later).
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from google.cloud import speech
+from simple_websocket import ConnectionClosed
+
+from backend.utils.audio_utils import OPUS_SAMPLE_RATES, container_header_length
+
+STT_STREAM_QUEUE_CHUNKS = int(os.getenv('STT_STREAM_QUEUE_CHUNKS', 64))
+STT_STREAM_BACKPRESSURE_TIMEOUT = float(os.getenv('STT_STREAM_BACKPRESSURE_TIMEOUT', 5))
+# Threads per gunicorn worker (set by the Dockerfile) and how many stay free for HTTP
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', 100))
+STT_STREAM_RESERVED_HTTP_THREADS = int(os.getenv('STT_STREAM_RESERVED_HTTP_THREADS', 25))
+STT_STREAM_MAX_SESSIONS = int(os.getenv('STT_STREAM_MAX_SESSIONS',
+                                        max(1, GUNICORN_THREADS - STT_STREAM_RESERVED_HTTP_THREADS)))
+STT_STREAM_HANDSHAKE_TIMEOUT = float(os.getenv('STT_STREAM_HANDSHAKE_TIMEOUT', 10))
+# The API ends a stream after ~305s. Sessions roll over to a fresh stream at the first
+# final result after STT_STREAM_ROLLOVER_SECONDS, or unconditionally at STT_STREAM_MAX_SECONDS.
+STT_STREAM_ROLLOVER_SECONDS = float(os.getenv('STT_STREAM_ROLLOVER_SECONDS', 240))
+STT_STREAM_MAX_SECONDS = float(os.getenv('STT_STREAM_MAX_SECONDS', 290))
+# Most recent not-yet-finalized audio replayed into the next stream on rollover
+STT_STREAM_OVERLAP_SECONDS = float(os.getenv('STT_STREAM_OVERLAP_SECONDS', 10))
+
+# Container encodings whose first chunk carries the header every new stream needs
+_CONTAINER_ENCODINGS = (
+    speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
+    speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+)
+
+# Handshake encoding names -> encodings accepted on the stream
+STREAM_ENCODINGS = {
+    "webm_opus": speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
+    "ogg_opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+    "linear16": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+}
+_HANDSHAKE_FIELDS = {"encoding", "sample_rate_hertz", "language_code", "interim_results"}
+_LANGUAGE_CODE = re.compile(r'^[A-Za-z]{2,3}(-[A-Za-z0-9]{2,8})*$')
+
+# Per-process cap on concurrent sessions
+stream_session_slots = threading.BoundedSemaphore(STT_STREAM_MAX_SESSIONS)
+
+
+class StreamOptions(NamedTuple):
+    """Audio format and result policy negotiated for one stream"""
+    encoding: str
+    sample_rate_hertz: int
+    language_code: str
+    interim_results: bool
+
+
+def default_stream_options() -> StreamOptions:
+    """What clients that skip the handshake get (browser MediaRecorder output)"""
+    return StreamOptions("webm_opus", 16000, os.getenv('STT_DEFAULT_LANGUAGE_CODE', "en-US"), True)
+
+
+def parse_stream_handshake(message: str) -> StreamOptions:
+    """
+    Validate a handshake message; omitted fields keep their defaults.
+
+    Raises:
+        ValueError: With a client-facing reason if the handshake is invalid
+    """
+    try:
+        fields = json.loads(message)
+    except ValueError:
+        raise ValueError("Handshake must be a JSON object")
+    if not isinstance(fields, dict):
+        raise ValueError("Handshake must be a JSON object")
+    unknown = set(fields) - _HANDSHAKE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown handshake fields: {', '.join(sorted(unknown))}")
+
+    options = default_stream_options()._replace(**fields)
+    encoding = options.encoding.lower() if isinstance(options.encoding, str) else None
+    if encoding not in STREAM_ENCODINGS:
+        raise ValueError(f"encoding must be one of: {', '.join(STREAM_ENCODINGS)}")
+    sample_rate = options.sample_rate_hertz
+    if isinstance(sample_rate, bool) or not isinstance(sample_rate, int):
+        raise ValueError("sample_rate_hertz must be an integer")
+    if encoding == "linear16" and not 8000 <= sample_rate <= 48000:
+        raise ValueError("sample_rate_hertz must be between 8000 and 48000 for linear16")
+    if encoding != "linear16" and sample_rate not in OPUS_SAMPLE_RATES:
+        raise ValueError(f"sample_rate_hertz must be one of {list(OPUS_SAMPLE_RATES)} for Opus")
+    if not isinstance(options.language_code, str) or not _LANGUAGE_CODE.match(options.language_code):
+        raise ValueError("language_code must be a BCP-47 code such as en-US")
+    if not isinstance(options.interim_results, bool):
+        raise ValueError("interim_results must be true or false")
+    return options._replace(encoding=encoding)
+
+
+def negotiate_stream(ws) -> Optional[Tuple[StreamOptions, Optional[bytes]]]:
+    """
+    Read the client's first message: a handshake, or the first audio chunk from a
+    client that does not send one.
+
+    Returns:
+        Tuple of (options, first audio chunk or None), or None if the socket was
+        closed because the handshake was missing or invalid
+    """
+    try:
+        message = ws.receive(timeout=STT_STREAM_HANDSHAKE_TIMEOUT)
+    except ConnectionClosed:
+        return None
+    if message is None:
+        _reject(ws, "No handshake or audio received.")
+        return None
+    if not isinstance(message, str):
+        return default_stream_options(), message
+    try:
+        options = parse_stream_handshake(message)
+    except ValueError as e:
+        _reject(ws, str(e))
+        return None
+    return options, None
+
+
+def _reject(ws, reason: str) -> None:
+    try:
+        ws.send(json.dumps({"error": reason}))
+        ws.close(reason=1008, message=reason[:120])
+    except Exception:
+        pass
+
+
+class STTStreamSession:
+    """One client's streaming recognition over a WebSocket"""
+
+    # How often the request generator checks whether the client has finished
+    QUEUE_POLL_SECONDS = 0.5
+    # How long to wait for final results after the client stops sending audio
+    DRAIN_SECONDS = 10
+
+    def __init__(
+        self,
+        ws,
+        client,
+        streaming_config: speech.StreamingRecognitionConfig,
+        logger: Optional[logging.Logger] = None,
+        queue_chunks: Optional[int] = None,
+        backpressure_timeout: Optional[float] = None,
+        initial_audio: Optional[bytes] = None
+    ):
+        self.ws = ws
+        self.client = client
+        self.streaming_config = streaming_config
+        self.logger = logger or logging.getLogger("STTService")
+        # (received_at, chunk); receive time stands in for the chunk's position in the audio
+        self.audio_queue: "queue.Queue[Tuple[float, bytes]]" = queue.Queue(maxsize=queue_chunks or STT_STREAM_QUEUE_CHUNKS)
+        self.backpressure_timeout = backpressure_timeout if backpressure_timeout is not None else STT_STREAM_BACKPRESSURE_TIMEOUT
+        self._audio_done = threading.Event()
+        self._recognizer_done = threading.Event()
+        self._send_lock = threading.Lock()
+        self._backpressure_reported = False
+        self._initial_audio = initial_audio
+
+        config = getattr(streaming_config, 'config', None)
+        self._needs_header = getattr(config, 'encoding', None) in _CONTAINER_ENCODINGS
+        # Container header bytes of the first chunk (not the audio that follows them)
+        self._header_chunk: Optional[bytes] = None
+        # Audio sent to the current stream and not yet covered by a final result
+        self._overlap: Deque[Tuple[float, bytes]] = deque()
+        # Held while a request generator takes a chunk, so a rollover never strands one
+        self._pull_lock = threading.Lock()
+        self._overlap_lock = threading.Lock()
+        self._generation = 0
+        self._stream_origin: Optional[float] = None
+        self._stream_opened_at = 0.0
+        self._rollover = threading.Event()
+        self._responses = None
+        self.stream_count = 0
+
+    def run(self) -> None:
+        """Serve the session until the client or the recognizer ends it. Closes the socket."""
+        recognizer = threading.Thread(target=self._recognize, name='stt-recognizer', daemon=True)
+        recognizer.start()
+        try:
+            if self._initial_audio is None or self._enqueue(self._initial_audio):
+                self._read_audio()
+        finally:
+            self._audio_done.set()
+            recognizer.join(timeout=self.DRAIN_SECONDS)
+            self._close_socket()
+
+    # --- Socket -> queue ---
+
+    def _read_audio(self) -> None:
+        while not self._recognizer_done.is_set():
+            try:
+                message = self.ws.receive()
+            except ConnectionClosed:
+                self.logger.info("Client connection closed while streaming audio.")
+                return
+            if message is None:
+                continue
+            if isinstance(message, str):
+                if message == 'CLOSE':
+                    return
+                self.logger.info(f"Ignoring text message on STT stream: {message[:100]}")
+                continue
+            if not self._enqueue(message):
+                self.logger.warning(f"STT stream stalled: recognizer did not accept audio for {self.backpressure_timeout}s")
+                self._send({"error": "Speech recognition is falling behind; please restart dictation."})
+                return
+
+    def _enqueue(self, chunk: bytes) -> bool:
+        """Queue a chunk, blocking (and so not reading the socket) while the queue is full"""
+        item = (time.monotonic(), chunk)
+        try:
+            self.audio_queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        if not self._backpressure_reported:
+            self._backpressure_reported = True
+            self._send({"event": "backpressure"})
+        try:
+            self.audio_queue.put(item, timeout=self.backpressure_timeout)
+            return True
+        except queue.Full:
+            return False
+
+    # --- Queue -> recognizer -> socket ---
+
+    def _requests(self, generation: int, replay) -> Iterator[speech.StreamingRecognizeRequest]:
+        """Audio for one stream: header and overlap replay (on rollover), then live chunks"""
+        if generation > 1 and self._header_chunk is not None:
+            yield speech.StreamingRecognizeRequest(audio_content=self._header_chunk)
+        for _, chunk in replay:
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        while True:
+            if time.monotonic() - self._stream_opened_at >= STT_STREAM_MAX_SECONDS:
+                self._request_rollover()
+                return
+            with self._pull_lock:
+                if generation != self._generation:
+                    return
+                try:
+                    received_at, chunk = self.audio_queue.get(timeout=self.QUEUE_POLL_SECONDS)
+                except queue.Empty:
+                    if self._audio_done.is_set():
+                        return
+                    continue
+                audio = chunk
+                if self._needs_header and self._header_chunk is None:
+                    # The first chunk also carries audio; only that part joins the overlap,
+                    # so a replay never repeats it after the header
+                    header_length = container_header_length(chunk)
+                    self._header_chunk, audio = chunk[:header_length], chunk[header_length:]
+                if audio:
+                    with self._overlap_lock:
+                        if self._stream_origin is None:
+                            self._stream_origin = received_at
+                        self._overlap.append((received_at, audio))
+                        while received_at - self._overlap[0][0] > STT_STREAM_OVERLAP_SECONDS:
+                            self._overlap.popleft()
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+    def _recognize(self) -> None:
+        try:
+            while True:
+                with self._pull_lock, self._overlap_lock:
+                    self._generation += 1
+                    replay = list(self._overlap)
+                    self._stream_origin = replay[0][0] if replay else None
+                    self._stream_opened_at = time.monotonic()
+                    self._rollover.clear()
+                    generation = self._generation
+                if self.stream_count:
+                    self.logger.info(f"Rolling STT stream over (stream {self.stream_count + 1}), replaying {len(replay)} chunks")
+                self.stream_count += 1
+
+                try:
+                    self._responses = self.client.streaming_recognize(
+                        config=self.streaming_config, requests=self._requests(generation, replay)
+                    )
+                    for response in self._responses:
+                        if not self._handle_response(response):
+                            return
+                except Exception as e:
+                    if not (self._rollover.is_set() or _is_duration_limit_error(e)):
+                        raise
+                if not self._rollover.is_set() and self._audio_done.is_set() and self.audio_queue.empty():
+                    return
+        except Exception as e:
+            self.logger.error(f"Error during STT stream processing: {e}")
+        finally:
+            self._recognizer_done.set()
+            # Let the request generator finish so the gRPC call winds down
+            self._audio_done.set()
+            if self._responses is not None and hasattr(self._responses, 'cancel'):
+                self._responses.cancel()
+            # Wake the reader if it is blocked on the socket
+            self._close_socket()
+
+    def _handle_response(self, response) -> bool:
+        """Forward a result to the client and track which audio is finalized. False if the client is gone."""
+        if not response.results:
+            return True
+        result = response.results[0]
+        if not result.alternatives:
+            return True
+        if not self._send({
+            'is_final': result.is_final,
+            'transcript': result.alternatives[0].transcript,
+            'stability': result.stability
+        }):
+            return False
+
+        if result.is_final:
+            self._drop_finalized(getattr(result, 'result_end_time', None))
+            if time.monotonic() - self._stream_opened_at >= STT_STREAM_ROLLOVER_SECONDS:
+                # A final result is a natural seam: little or no audio is left to replay
+                self._request_rollover()
+        return True
+
+    def _drop_finalized(self, end_time) -> None:
+        """Forget overlap audio that a final result ending at end_time (stream offset) covers"""
+        with self._overlap_lock:
+            if self._stream_origin is None:
+                return
+            if end_time is None:
+                # No offset reported: everything sent so far is finalized
+                finalized_until = time.monotonic()
+            else:
+                offset = end_time.total_seconds() if hasattr(end_time, 'total_seconds') else float(end_time)
+                finalized_until = self._stream_origin + offset
+            while self._overlap and self._overlap[0][0] <= finalized_until:
+                self._overlap.popleft()
+
+    def _request_rollover(self) -> None:
+        """End the current stream without half-closing it (which would finalize partial words)"""
+        self._rollover.set()
+        responses = self._responses
+        if responses is not None and hasattr(responses, 'cancel'):
+            responses.cancel()
+
+    def _send(self, data: Dict[str, Any]) -> bool:
+        with self._send_lock:
+            try:
+                self.ws.send(json.dumps(data))
+                return True
+            except ConnectionClosed:
+                self.logger.info("Client connection closed while sending response.")
+            except Exception as e:
+                self.logger.error(f"Error sending response to websocket: {e}")
+            return False
+
+    def _close_socket(self) -> None:
+        with self._send_lock:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+
+
+def _is_duration_limit_error(error: Exception) -> bool:
+    """The API ends streams that run past its maximum duration with OUT_OF_RANGE"""
+    return 'maximum allowed stream duration' in str(error).lower()
@@ -0,0 +1,124 @@
+"""
+Short-lived store for synthesized audio served as a binary resource.
+
+Routes that would otherwise inline base64 audio in their JSON can save the bytes
+here and return an audio ID instead; the client then fetches the audio from
+/api/tts/audio/<audio_id>. Files live under DATA_DIR/tts_audio so every gunicorn
+worker can serve audio written by any other, and expire after TTS_AUDIO_TTL_SECONDS.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.utils.data_dir import get_data_dir
+
+# Load environment variables
+load_dotenv()
+
+_AUDIO_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class TTSAudioStore:
+    """Service class for saving and resolving per-user synthesized audio files"""
+
+    _instance = None
+
+    # Expired files are swept at most this often (per process)
+    CLEANUP_INTERVAL_SECONDS = 60
+
+    def __new__(cls):
+        """Singleton pattern so all routes share one store"""
+        if cls._instance is None:
+            cls._instance = super(TTSAudioStore, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, store_dir: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        """Resolve the store directory and expiry"""
+        self.store_dir = store_dir or get_data_dir('tts_audio')
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv('TTS_AUDIO_TTL_SECONDS', 3600))
+        self._last_cleanup = 0.0
+        self._cleanup_lock = threading.Lock()
+
+    def _paths(self, audio_id: str) -> Tuple[str, str]:
+        base = os.path.join(self.store_dir, audio_id)
+        return base + '.audio', base + '.json'
+
+    def save(self, audio_content: bytes, mime_type: str, user_id: str) -> str:
+        """
+        Save audio for later download by the same user.
+
+        Args:
+            audio_content: Encoded audio bytes
+            mime_type: MIME type to serve the audio with
+            user_id: Firebase Auth UID allowed to fetch it
+
+        Returns:
+            The audio ID
+        """
+        self._cleanup_expired()
+
+        audio_id = uuid.uuid4().hex
+        audio_path, meta_path = self._paths(audio_id)
+        # Metadata first: an audio file on disk implies its owner is known
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'user_id': user_id, 'mime_type': mime_type or 'application/octet-stream'}, f)
+        tmp_path = f"{audio_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(audio_content)
+        os.replace(tmp_path, audio_path)
+        return audio_id
+
+    def get(self, audio_id: str, user_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Resolve a saved audio file.
+
+        Args:
+            audio_id: ID returned by save()
+            user_id: Firebase Auth UID of the requester
+
+        Returns:
+            Tuple of (file_path, mime_type), or None if missing, expired or owned by someone else
+        """
+        if not audio_id or not _AUDIO_ID_PATTERN.match(audio_id):
+            return None
+        audio_path, meta_path = self._paths(audio_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            if time.time() - os.path.getmtime(audio_path) > self.ttl_seconds:
+                return None
+        except (OSError, ValueError):
+            return None
+        if metadata.get('user_id') != user_id:
+            return None
+        return audio_path, metadata.get('mime_type', 'application/octet-stream')
+
+    def _cleanup_expired(self) -> None:
+        """Delete audio older than the TTL. Runs at most once per CLEANUP_INTERVAL_SECONDS."""
+        now = time.time()
+        if now - self._last_cleanup < self.CLEANUP_INTERVAL_SECONDS or not self._cleanup_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_cleanup = now
+            removed = 0
+            for name in os.listdir(self.store_dir):
+                path = os.path.join(self.store_dir, name)
+                try:
+                    if now - os.path.getmtime(path) > self.ttl_seconds:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+            if removed:
+                logging.info(f"TTS audio store: removed {removed} expired files")
+        finally:
+            self._cleanup_lock.release()
@@ -0,0 +1,213 @@
+"""
+Content-addressed cache for Text-to-Speech results.
+
+Two tiers: an in-process LRU (bounded by total audio bytes) in front of an
+on-disk store under DATA_DIR/tts_cache. Entries are keyed on a hash of the
+sanitized text and the voice parameters, and hold the final audio bytes plus
+the word timepoints, so a hit skips both the API call and the audio re-encode.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from backend.utils.data_dir import get_data_dir
+
+
+def _env_flag(name: str, default: str = 'true') -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) cache of synthesized audio and timepoints."""
+
+    AUDIO_SUFFIX = '.audio'
+    TIMEPOINTS_SUFFIX = '.json'
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 memory_max_bytes: Optional[int] = None,
+                 disk_max_bytes: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        self.enabled = _env_flag('TTS_CACHE_ENABLED') if enabled is None else enabled
+        self.memory_max_bytes = memory_max_bytes if memory_max_bytes is not None else int(os.getenv('TTS_CACHE_MEMORY_MAX_BYTES', 64 * 1024 * 1024))
+        self.disk_max_bytes = disk_max_bytes if disk_max_bytes is not None else int(os.getenv('TTS_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+
+        self.cache_dir = None
+        if self.enabled and self.disk_max_bytes > 0:
+            try:
+                self.cache_dir = cache_dir or get_data_dir('tts_cache')
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            except OSError as e:
+                logging.warning(f"TTS cache disk tier disabled, could not use cache directory: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def make_key(sanitized_text: str, **params: Any) -> str:
+        """Build a stable content hash from the sanitized text and synthesis parameters."""
+        payload = json.dumps({'text': sanitized_text, **params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Dict with audio_content (bytes) and timepoints (list), or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                logging.debug(f"TTS_CACHE: memory hit for {key[:12]}")
+                return self._copy(entry)
+
+        entry = self._read_disk(key)
+        if entry is None:
+            return None
+        logging.debug(f"TTS_CACHE: disk hit for {key[:12]}")
+        self._put_memory(key, entry)
+        return self._copy(entry)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a synthesis result (audio_content bytes + timepoints) in both tiers."""
+        if not self.enabled or not result or not isinstance(result.get('audio_content'), bytes):
+            return
+        entry = {
+            'audio_content': result['audio_content'],
+            'timepoints': list(result.get('timepoints') or []),
+        }
+        self._put_memory(key, entry)
+        self._write_disk(key, entry)
+
+    # --- Memory tier ---
+
+    @staticmethod
+    def _copy(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {'audio_content': entry['audio_content'], 'timepoints': list(entry['timepoints'])}
+
+    def _put_memory(self, key: str, entry: Dict[str, Any]) -> None:
+        size = len(entry['audio_content'])
+        if size > self.memory_max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous['audio_content'])
+            self._memory[key] = entry
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted['audio_content'])
+
+    # --- Disk tier ---
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + self.AUDIO_SUFFIX, base + self.TIMEPOINTS_SUFFIX
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        audio_path, timepoints_path = self._paths(key)
+        try:
+            with open(audio_path, 'rb') as f:
+                audio_content = f.read()
+            with open(timepoints_path, 'r', encoding='utf-8') as f:
+                timepoints = json.load(f)
+            # Refresh mtime so eviction is least-recently-used rather than oldest-written
+            self._touch(audio_path)
+            return {'audio_content': audio_content, 'timepoints': timepoints}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"TTS_CACHE: discarding unreadable disk entry {key[:12]}: {e}")
+            self._remove_disk_entry(key)
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.cache_dir or len(entry['audio_content']) > self.disk_max_bytes:
+            return
+        audio_path, timepoints_path = self._paths(key)
+        try:
+            timepoints_bytes = json.dumps(entry['timepoints']).encode('utf-8')
+            # Write to temp files and rename so readers never see a partial entry.
+            # Timepoints go first: an audio file on disk implies a complete entry.
+            replaced_bytes = 0
+            for path, data in ((timepoints_path, timepoints_bytes), (audio_path, entry['audio_content'])):
+                # Unique per process and thread: gunicorn workers share the cache directory
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                # Overwriting an entry (e.g. two workers synthesizing the same text) frees the old file
+                try:
+                    replaced_bytes += os.path.getsize(path)
+                except FileNotFoundError:
+                    pass
+                os.replace(tmp_path, path)
+            self._touch(audio_path)
+            with self._lock:
+                self._disk_bytes += len(entry['audio_content']) + len(timepoints_bytes) - replaced_bytes
+                over_budget = self._disk_bytes > self.disk_max_bytes
+            if over_budget:
+                self._evict_disk()
+        except OSError as e:
+            logging.warning(f"TTS_CACHE: failed to write disk entry {key[:12]}: {e}")
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # Filesystem timestamps are often coarse; stamp a precise clock so LRU order is exact
+        now_ns = time.time_ns()
+        os.utime(path, ns=(now_ns, now_ns))
+
+    def _scan_disk(self):
+        """Yield (key, total_size, last_used) for every complete entry on disk."""
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.AUDIO_SUFFIX):
+                continue
+            key = name[:-len(self.AUDIO_SUFFIX)]
+            audio_path, timepoints_path = self._paths(key)
+            try:
+                stat = os.stat(audio_path)
+                size = stat.st_size + (os.path.getsize(timepoints_path) if os.path.exists(timepoints_path) else 0)
+                yield key, size, stat.st_mtime_ns
+            except OSError:
+                continue
+
+    def _remove_disk_entry(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict_disk(self) -> None:
+        """Delete least-recently-used entries until the store is back under its size budget."""
+        entries = sorted(self._scan_disk(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in entries)
+        # Leave some headroom so we don't rescan on every subsequent write
+        target = int(self.disk_max_bytes * 0.9)
+        evicted = 0
+        for key, size, _ in entries:
+            if total <= target:
+                break
+            self._remove_disk_entry(key)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+        if evicted:
+            logging.info(f"TTS_CACHE: evicted {evicted} disk entries, {total} bytes remain")
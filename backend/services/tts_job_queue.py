@@ -0,0 +1,320 @@
+"""
+Background queue for pre-generating document TTS audio.
+
+upload_document used to synthesize the whole narrative and upload the MP3 and
+timepoints to GCS inside the request, tying up a gunicorn worker for minutes.
+Uploads now enqueue a job here and return as soon as the narrative exists.
+
+Jobs live in a SQLite table under DATA_DIR/jobs so every gunicorn worker shares
+one queue and jobs survive restarts. Each process runs TTS_JOB_WORKERS daemon
+threads that claim queued jobs, synthesize, upload the assets and write
+tts_audio_gcs_uri / tts_timepoints_gcs_uri / tts_status back to Firestore.
+A job left 'processing' by a worker that died is reclaimed after TTS_JOB_STALE_SECONDS.
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.utils.data_dir import get_data_dir
+from backend.utils.timepoint_codec import dumps_timepoints
+
+# Load environment variables
+load_dotenv()
+
+# Job states; the same values are mirrored to the document's 'tts_status' field
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'processing'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tts_jobs (
+    job_id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    audio_gcs_uri TEXT,
+    timepoints_gcs_uri TEXT,
+    claimed_by TEXT,
+    claimed_at REAL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tts_jobs_status ON tts_jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_tts_jobs_document ON tts_jobs (document_id, created_at);
+"""
+
+# Columns returned by get_job/get_latest_job (the narrative text is left out)
+_STATUS_COLUMNS = (
+    'job_id', 'document_id', 'user_id', 'status', 'attempts', 'error',
+    'audio_gcs_uri', 'timepoints_gcs_uri', 'created_at', 'updated_at'
+)
+
+
+class TTSJobQueue:
+    """Service class for queueing and running document TTS pre-generation jobs"""
+
+    _instance = None
+
+    # How long an idle worker sleeps before polling the table again
+    POLL_INTERVAL_SECONDS = 2.0
+    # Delay before retrying a failed job, multiplied by the attempt number
+    RETRY_BACKOFF_SECONDS = 30
+
+    def __new__(cls):
+        """Singleton pattern so each process runs one worker pool"""
+        if cls._instance is None:
+            cls._instance = super(TTSJobQueue, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, db_path: Optional[str] = None, num_workers: Optional[int] = None,
+                    max_attempts: Optional[int] = None, stale_seconds: Optional[int] = None):
+        """Create the job table and read the worker settings"""
+        self.db_path = db_path or os.path.join(get_data_dir('jobs'), 'tts_jobs.db')
+        self.num_workers = num_workers if num_workers is not None else int(os.getenv('TTS_JOB_WORKERS', 1))
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv('TTS_JOB_MAX_ATTEMPTS', 3))
+        self.stale_seconds = stale_seconds if stale_seconds is not None else int(os.getenv('TTS_JOB_STALE_SECONDS', 1800))
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        logging.info(f"TTS job queue ready at {self.db_path} ({self.num_workers} worker(s) per process)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation: safe across threads and gunicorn processes
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Producer side ---
+
+    def enqueue(self, document_id: str, user_id: str, text: str) -> str:
+        """
+        Queue TTS pre-generation for a document's narrative.
+
+        Args:
+            document_id: Firestore document ID to attach the assets to
+            user_id: Owner of the document (GCS assets are stored under their folder)
+            text: Narrative to synthesize
+
+        Returns:
+            The job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO tts_jobs (job_id, document_id, user_id, text, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, document_id, user_id, text, JOB_QUEUED, now, now, now)
+            )
+        self._wakeup.set()
+        logging.info(f"Queued TTS job {job_id} for document {document_id} ({len(text)} chars)")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a single job, or None if unknown"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(_STATUS_COLUMNS)} FROM tts_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_latest_job(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Status of the most recently queued job for a document, or None if there is none"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(_STATUS_COLUMNS)} FROM tts_jobs WHERE document_id = ? "
+                "ORDER BY created_at DESC LIMIT 1", (document_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    # --- Worker side ---
+
+    def start(self) -> None:
+        """Start this process's worker threads (idempotent)"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(max(self.num_workers, 0)):
+            thread = threading.Thread(target=self._worker_loop, name=f"tts-job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the worker threads to exit once their current job is done"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = self.process_next()
+            except Exception as e:
+                logging.error(f"TTS job worker error: {e}", exc_info=True)
+                processed = False
+            if not processed:
+                self._wakeup.wait(self.POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest runnable job to 'processing' and return it"""
+        now = time.time()
+        stale_before = now - self.stale_seconds
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so two workers never claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            abandoned = conn.execute(
+                "SELECT job_id, document_id FROM tts_jobs WHERE status = ? AND claimed_at < ? AND attempts >= ?",
+                (JOB_RUNNING, stale_before, self.max_attempts)
+            ).fetchall()
+            if abandoned:
+                conn.execute(
+                    "UPDATE tts_jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE status = ? AND claimed_at < ? AND attempts >= ?",
+                    (JOB_FAILED, 'Worker stopped while processing', now, JOB_RUNNING, stale_before, self.max_attempts)
+                )
+            row = conn.execute(
+                "SELECT * FROM tts_jobs WHERE (status = ? AND available_at <= ?) OR (status = ? AND claimed_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, now, JOB_RUNNING, stale_before)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE tts_jobs SET status = ?, attempts = attempts + 1, claimed_by = ?, claimed_at = ?, updated_at = ? "
+                    "WHERE job_id = ?",
+                    (JOB_RUNNING, self.worker_name, now, now, row['job_id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        for job_id, document_id in abandoned:
+            logging.error(f"TTS job {job_id} for document {document_id} abandoned by its worker; giving up")
+            self._update_document(document_id, {'tts_status': JOB_FAILED, 'tts_error': 'Worker stopped while processing'})
+
+        if not row:
+            return None
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+    def process_next(self) -> bool:
+        """
+        Claim and run one job.
+
+        Returns:
+            True if a job was processed (successfully or not), False if the queue was empty
+        """
+        job = self._claim_next()
+        if not job:
+            return False
+
+        job_id, document_id = job['job_id'], job['document_id']
+        logging.info(f"Running TTS job {job_id} for document {document_id} (attempt {job['attempts']})")
+        self._update_document(document_id, {'tts_status': JOB_RUNNING})
+        try:
+            assets = self._generate_assets(job)
+        except Exception as e:
+            self._record_failure(job, str(e))
+            return True
+
+        self._finish_job(job_id, JOB_COMPLETED, audio_gcs_uri=assets['audio_gcs_uri'],
+                         timepoints_gcs_uri=assets['timepoints_gcs_uri'])
+        self._update_document(document_id, {
+            'tts_status': JOB_COMPLETED,
+            'tts_error': None,
+            'tts_audio_gcs_uri': assets['audio_gcs_uri'],
+            'tts_timepoints_gcs_uri': assets['timepoints_gcs_uri'],
+        })
+        logging.info(f"TTS job {job_id} completed for document {document_id}")
+        return True
+
+    def _generate_assets(self, job: Dict[str, Any]) -> Dict[str, str]:
+        """Synthesize the narrative and upload MP3 + compact timepoints to GCS"""
+        from backend.services.tts_service import TTSService
+        from backend.services.storage_service import StorageService
+
+        document_id, user_id = job['document_id'], job['user_id']
+        # Pinned to MP3: the asset names, content type and the player all assume it,
+        # whatever TTS_DEFAULT_AUDIO_ENCODING says
+        tts_result = TTSService().synthesize_text(job['text'], audio_encoding='MP3')
+        if not tts_result or not tts_result.get('audio_content') or not tts_result.get('timepoints'):
+            raise RuntimeError("TTS synthesis failed or returned incomplete data")
+
+        storage_service = StorageService()
+        audio_success, audio_meta = storage_service.upload_bytes_as_file(
+            content_bytes=tts_result['audio_content'],
+            content_type='audio/mpeg',
+            user_id=user_id,
+            base_filename=f"{document_id}_tts.mp3",
+            sub_folder='tts_outputs'
+        )
+        # Compact, gzip-encoded timepoints; GCS serves them decompressed (Content-Encoding: gzip)
+        tp_success, tp_meta = storage_service.upload_bytes_as_file(
+            content_bytes=dumps_timepoints(tts_result['timepoints'], compress=True),
+            content_type='application/json',
+            content_encoding='gzip',
+            user_id=user_id,
+            base_filename=f"{document_id}_timepoints.json",
+            sub_folder='tts_outputs'
+        )
+        if not (audio_success and tp_success):
+            raise RuntimeError("Failed to upload TTS assets to GCS")
+        return {'audio_gcs_uri': audio_meta['gcsUri'], 'timepoints_gcs_uri': tp_meta['gcsUri']}
+
+    def _record_failure(self, job: Dict[str, Any], error: str) -> None:
+        """Schedule a retry with backoff, or mark the job failed after max_attempts"""
+        job_id, document_id = job['job_id'], job['document_id']
+        if job['attempts'] < self.max_attempts:
+            delay = self.RETRY_BACKOFF_SECONDS * job['attempts']
+            logging.warning(f"TTS job {job_id} for document {document_id} failed ({error}); retrying in {delay}s")
+            self._finish_job(job_id, JOB_QUEUED, error=error, available_at=time.time() + delay)
+            self._update_document(document_id, {'tts_status': JOB_QUEUED})
+        else:
+            logging.error(f"TTS job {job_id} for document {document_id} failed after {job['attempts']} attempts: {error}")
+            self._finish_job(job_id, JOB_FAILED, error=error)
+            self._update_document(document_id, {'tts_status': JOB_FAILED, 'tts_error': error})
+
+    def _finish_job(self, job_id: str, status: str, **fields: Any) -> None:
+        fields.update(status=status, updated_at=time.time(), claimed_by=None)
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with closing(self._connect()) as conn:
+            conn.execute(f"UPDATE tts_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def _update_document(self, document_id: str, fields: Dict[str, Any]) -> None:
+        """Mirror job progress onto the Firestore document; failures are logged, not raised"""
+        from backend.services.firestore_service import FirestoreService
+        try:
+            fields = dict(fields, updated_at=datetime.now(timezone.utc).isoformat())
+            if not FirestoreService().update_document(document_id, fields):
+                logging.error(f"Failed to update TTS status for document {document_id}")
+        except Exception as e:
+            logging.error(f"Error updating TTS status for document {document_id}: {e}")
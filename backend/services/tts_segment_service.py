@@ -0,0 +1,297 @@
+"""
+Lazy, segment-by-segment read-aloud audio for documents.
+
+Instead of synthesizing a whole narrative up front, the narrative is split into
+segments (paragraphs; long paragraphs are split at sentence boundaries) and each
+segment is synthesized the first time it is requested. Results are cached in
+TTSService's local cache and in GCS under <user_id>/tts_segments/<document_id>/,
+keyed by the same content hash, so edits to a narrative only re-synthesize the
+segments that changed. Serving a segment prefetches the next TTS_SEGMENT_PREFETCH
+segments in the background so playback does not wait at segment boundaries.
+"""
+
+import os
+import re
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.utils.audio_utils import mp3_duration_seconds
+from backend.utils.text_utils import sanitize_text_for_tts
+from backend.utils.timepoint_codec import dumps_timepoints, loads_timepoints
+
+# Load environment variables
+load_dotenv()
+
+# Rough speaking speed used to estimate durations of segments not yet synthesized
+_ESTIMATED_CHARS_PER_SECOND = 15.0
+# Segments are always MP3, whatever TTS_DEFAULT_AUDIO_ENCODING says: they are stored as
+# <key>.mp3 and served as audio/mpeg
+SEGMENT_AUDIO_ENCODING = 'MP3'
+SEGMENT_MIME_TYPE = 'audio/mpeg'
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+class TTSSegmentService:
+    """Service class for segmenting narratives and synthesizing segments on demand"""
+
+    _instance = None
+
+    def __new__(cls):
+        """Singleton pattern so prefetching shares one worker pool"""
+        if cls._instance is None:
+            cls._instance = super(TTSSegmentService, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, tts_service=None, storage_service=None, firestore_service=None):
+        """Read segmentation and prefetch settings"""
+        self.max_segment_chars = int(os.getenv('TTS_SEGMENT_MAX_CHARS', 1500))
+        self.prefetch_count = int(os.getenv('TTS_SEGMENT_PREFETCH', 2))
+        self._tts_service = tts_service
+        self._storage_service = storage_service
+        self._firestore_service = firestore_service
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TTS_SEGMENT_PREFETCH_WORKERS', 2)),
+            thread_name_prefix='tts-segment-prefetch'
+        )
+        # Segment key -> Future, so a request for a segment being prefetched waits for it
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    # Services are resolved lazily so this module imports without GCP credentials
+
+    @property
+    def tts_service(self):
+        if self._tts_service is None:
+            from backend.services.tts_service import TTSService
+            self._tts_service = TTSService()
+        return self._tts_service
+
+    @property
+    def storage_service(self):
+        if self._storage_service is None:
+            from backend.services.storage_service import StorageService
+            self._storage_service = StorageService()
+        return self._storage_service
+
+    @property
+    def firestore_service(self):
+        if self._firestore_service is None:
+            from backend.services.firestore_service import FirestoreService
+            self._firestore_service = FirestoreService()
+        return self._firestore_service
+
+    # --- Segmentation ---
+
+    def segment_text(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Splits a narrative into read-aloud segments.
+
+        Every paragraph is a segment; paragraphs longer than TTS_SEGMENT_MAX_CHARS are
+        split into runs of whole sentences up to that size.
+
+        Returns:
+            List of {"index", "paragraph_index", "text"}
+        """
+        segments = []
+        sanitized = sanitize_text_for_tts(text or '')
+        paragraphs = [p.strip() for p in re.split(r'\n{2,}', sanitized) if p.strip()]
+        for paragraph_index, paragraph in enumerate(paragraphs):
+            for piece in self._split_paragraph(paragraph):
+                segments.append({"index": len(segments), "paragraph_index": paragraph_index, "text": piece})
+        return segments
+
+    def _split_paragraph(self, paragraph: str) -> List[str]:
+        if len(paragraph) <= self.max_segment_chars:
+            return [paragraph]
+        pieces, current = [], ''
+        for sentence in _SENTENCE_BOUNDARY.split(paragraph):
+            if current and len(current) + 1 + len(sentence) > self.max_segment_chars:
+                pieces.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            pieces.append(current)
+        return pieces
+
+    # --- Manifest ---
+
+    def get_manifest(self, document: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """
+        Lists a document's segments with their durations.
+
+        Durations of segments that have been synthesized are measured from their MP3
+        frames; the rest are estimated from their length. Also starts prefetching the first segments.
+
+        Args:
+            document: Firestore document dict (id, user_id, tts_segment_durations)
+            text: The narrative to segment
+
+        Returns:
+            Dict with segment_count, total_duration_seconds and segments
+            ({"index", "paragraph_index", "char_count", "duration_seconds", "duration_estimated", "synthesized"})
+        """
+        segments = self.segment_text(text)
+        measured = document.get('tts_segment_durations') or {}
+        entries = []
+        total = 0.0
+        for segment in segments:
+            key = self._segment_key(segment['text'])
+            duration = measured.get(key)
+            estimated = duration is None
+            if estimated:
+                duration = round(len(segment['text']) / _ESTIMATED_CHARS_PER_SECOND, 2)
+            total += duration
+            entries.append({
+                "index": segment['index'],
+                "paragraph_index": segment['paragraph_index'],
+                "char_count": len(segment['text']),
+                "duration_seconds": duration,
+                "duration_estimated": estimated,
+                "synthesized": not estimated,
+            })
+
+        self.prefetch(document, segments, range(self.prefetch_count))
+        return {
+            "segment_count": len(entries),
+            "total_duration_seconds": round(total, 2),
+            "segments": entries,
+        }
+
+    # --- Segments ---
+
+    def get_segment(self, document: Dict[str, Any], text: str, index: int) -> Optional[Dict[str, Any]]:
+        """
+        Returns one segment's audio and timepoints, synthesizing it if needed,
+        and prefetches the segments after it.
+
+        Returns:
+            Dict with index, segment_count, paragraph_index, audio_content, mime_type,
+            timepoints and duration_seconds, or None if index is out of range
+
+        Raises:
+            RuntimeError: If synthesis fails
+        """
+        segments = self.segment_text(text)
+        if not 0 <= index < len(segments):
+            return None
+        segment = segments[index]
+        result = self._ensure_segment(document, segment['text'])
+        self.prefetch(document, segments, range(index + 1, index + 1 + self.prefetch_count))
+        return {
+            "index": index,
+            "segment_count": len(segments),
+            "paragraph_index": segment['paragraph_index'],
+            "audio_content": result['audio_content'],
+            "mime_type": SEGMENT_MIME_TYPE,
+            "timepoints": result['timepoints'],
+            "duration_seconds": self._duration_seconds(result),
+        }
+
+    def _segment_key(self, segment_text: str) -> str:
+        """The TTS result cache key of a segment's MP3 synthesis"""
+        return self.tts_service.result_cache_key(segment_text, audio_encoding=SEGMENT_AUDIO_ENCODING)
+
+    def prefetch(self, document: Dict[str, Any], segments: List[Dict[str, Any]], indexes) -> None:
+        """Synthesize the given segments in the background if they are not cached yet"""
+        for index in indexes:
+            if 0 <= index < len(segments):
+                self._ensure_segment(document, segments[index]['text'], wait=False)
+
+    def _ensure_segment(self, document: Dict[str, Any], segment_text: str, wait: bool = True) -> Optional[Dict[str, Any]]:
+        """Fetch a segment from the local cache, GCS or the API, deduplicating concurrent requests"""
+        key = self._segment_key(segment_text)
+        cache = self.tts_service.cache
+        if cache:
+            cached = cache.get(key)
+            if cached:
+                return cached
+
+        submitted = False
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._load_or_synthesize, document, segment_text, key)
+                self._inflight[key] = future
+                submitted = True
+        if submitted:
+            # Outside the lock: a future that is already done runs the callback on this thread
+            future.add_done_callback(lambda done: self._forget_inflight(key, done))
+        if not wait:
+            return None
+        return future.result()
+
+    def _forget_inflight(self, key: str, future: Future) -> None:
+        with self._inflight_lock:
+            # A newer request for the key may have replaced this future already
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _load_or_synthesize(self, document: Dict[str, Any], segment_text: str, key: str) -> Dict[str, Any]:
+        """Restore a segment from GCS, or synthesize it and upload it there"""
+        result = self._download_segment(document, key)
+        if result:
+            if self.tts_service.cache:
+                self.tts_service.cache.put(key, result)
+            return result
+
+        result = self.tts_service.synthesize_text(segment_text, audio_encoding=SEGMENT_AUDIO_ENCODING)
+        if not result or not result.get('audio_content'):
+            raise RuntimeError(f"TTS synthesis failed for segment {key[:12]} of document {document.get('id')}")
+        self._upload_segment(document, key, result)
+        return result
+
+    def _segment_path(self, document: Dict[str, Any], key: str, extension: str) -> str:
+        return f"{document['user_id']}/tts_segments/{document['id']}/{key}.{extension}"
+
+    def _download_segment(self, document: Dict[str, Any], key: str) -> Optional[Dict[str, Any]]:
+        success, audio_content = self.storage_service.get_file(self._segment_path(document, key, 'mp3'))
+        if not success or not audio_content:
+            return None
+        success, timepoints_payload = self.storage_service.get_file(self._segment_path(document, key, 'json'))
+        if not success or not timepoints_payload:
+            return None
+        try:
+            timepoints = loads_timepoints(timepoints_payload)
+        except ValueError as e:
+            logging.warning(f"Ignoring unreadable cached timepoints for segment {key[:12]}: {e}")
+            return None
+        return {"audio_content": audio_content, "timepoints": timepoints, "mime_type": SEGMENT_MIME_TYPE}
+
+    def _upload_segment(self, document: Dict[str, Any], key: str, result: Dict[str, Any]) -> None:
+        """Persist a synthesized segment to GCS and record its duration on the document"""
+        user_id, document_id = document['user_id'], document['id']
+        try:
+            audio_success, _ = self.storage_service.upload_bytes_as_file(
+                content_bytes=result['audio_content'],
+                content_type=SEGMENT_MIME_TYPE,
+                user_id=user_id,
+                base_filename=f"{key}.mp3",
+                sub_folder=f"tts_segments/{document_id}"
+            )
+            tp_success, _ = self.storage_service.upload_bytes_as_file(
+                content_bytes=dumps_timepoints(result['timepoints'], compress=True),
+                content_type='application/json',
+                content_encoding='gzip',
+                user_id=user_id,
+                base_filename=f"{key}.json",
+                sub_folder=f"tts_segments/{document_id}"
+            )
+            if not (audio_success and tp_success):
+                logging.error(f"Failed to upload TTS segment {key[:12]} for document {document_id}")
+            self.firestore_service.update_document(document_id, {
+                f"tts_segment_durations.{key}": self._duration_seconds(result)
+            })
+        except Exception as e:
+            logging.error(f"Error persisting TTS segment {key[:12]} for document {document_id}: {e}")
+
+    @staticmethod
+    def _duration_seconds(result: Dict[str, Any]) -> float:
+        """Length of a segment's audio, from its MP3 frame count"""
+        return round(mp3_duration_seconds(result['audio_content']), 3)
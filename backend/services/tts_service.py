@@ -9,16 +9,53 @@ for converting text to speech audio.
 import io
 import os
 import re
+import json
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import texttospeech_v1beta1 as texttospeech
 from google.oauth2 import service_account
 from dotenv import load_dotenv
 from pydub import AudioSegment
 from backend.utils.text_utils import sanitize_text_for_tts
+from backend.services.tts_cache import TTSCache
+from backend.utils.audio_utils import parse_wav, pcm_duration_seconds, concat_pcm, wav_header
+from backend.utils.data_dir import get_data_dir
 
 # Load environment variables
 load_dotenv()
 
+# Chunk-level concurrency for synthesize_text: workers per call, and total
+# in-flight synthesize_speech requests across the process (API quota guard).
+TTS_MAX_WORKERS_PER_CALL = int(os.getenv('TTS_MAX_WORKERS_PER_CALL', 4))
+TTS_MAX_CONCURRENT_REQUESTS = int(os.getenv('TTS_MAX_CONCURRENT_REQUESTS', 8))
+
+# Word-only marking: emit <mark> tags for words only, not for the whitespace between them.
+# Clients rebuild spacing themselves (they already drop whitespace timepoints), so this
+# halves SSML size and timepoint count. Whitespace containing a newline is still marked,
+# since some views use it as a line/paragraph boundary.
+TTS_WORD_MARKS_ONLY = os.getenv('TTS_WORD_MARKS_ONLY', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Per-request input limit of the Text-to-Speech API, in bytes of SSML (tags included)
+TTS_MAX_SSML_BYTES = int(os.getenv('TTS_MAX_SSML_BYTES', 5000))
+
+# Output encodings callers can request, keyed by texttospeech.AudioEncoding name.
+# Chunks are synthesized and stitched as LINEAR16 PCM, then encoded once with pydub/ffmpeg
+# (export_format/codec); LINEAR16 output is just the stitched PCM with a WAV header.
+AUDIO_OUTPUT_FORMATS = {
+    "MP3": {"mime_type": "audio/mpeg", "export_format": "mp3", "codec": None},
+    "OGG_OPUS": {"mime_type": "audio/ogg", "export_format": "ogg", "codec": "libopus"},
+    "LINEAR16": {"mime_type": "audio/wav", "export_format": None, "codec": None},
+}
+
+# Voice lists change rarely: get_available_voices serves them from memory (and a disk
+# snapshot under DATA_DIR/tts_voices shared by all workers) and refreshes entries older
+# than TTS_VOICE_CACHE_TTL_SECONDS in the background.
+TTS_VOICE_CACHE_TTL_SECONDS = int(os.getenv('TTS_VOICE_CACHE_TTL_SECONDS', 24 * 3600))
+# Only well-formed BCP-47 codes are cached (they also name the snapshot files)
+_VOICE_LANGUAGE_CODE = re.compile(r'^[A-Za-z]{2,3}(-[A-Za-z0-9]{2,8})*$')
+
 class TTSServiceError(Exception):
     """Custom exception for TTSService errors."""
     pass
@@ -27,6 +64,7 @@ class TTSService:
     """Service for converting text to speech using Google Cloud Text-to-Speech API"""
     
     _instance = None
+    _request_semaphore = threading.BoundedSemaphore(max(1, TTS_MAX_CONCURRENT_REQUESTS))
     
     def __new__(cls):
         """Singleton pattern to ensure only one TTS connection"""
@@ -42,6 +80,11 @@ class TTSService:
     def _initialize(self):
         """Initialize Text-to-Speech client and configuration"""
         self.client = None
+        self.cache = TTSCache()
+        # Voice list cache: language code ('' for all) -> (fetched_at, voices)
+        self._voice_cache = {}
+        self._voice_cache_lock = threading.Lock()
+        self._voice_refreshing = set()
         self.project_id = os.getenv('GCP_PROJECT_ID')
         
         # Get Firebase service account key path
@@ -83,153 +126,497 @@ class TTSService:
     
     def _chunk_text(self, text: str) -> list[str]:
         """
-        Splits the input text into manageable chunks to avoid hitting Google Cloud TTS API limits.
+        Splits the input text into chunks whose generated SSML stays within the API's
+        per-request input limit (TTS_MAX_SSML_BYTES), packing each chunk as full as possible.
         Preserves paragraph boundaries for better TTS output.
+
+        Chunk size is measured on the SSML that _build_ssml_and_map will actually produce
+        (mark tags, <p> wrappers and paragraph breaks included), not on the plain text.
+        Paragraphs that don't fit in a request on their own are split by sentences, then
+        by words.
         
         Args:
             text: The text to be chunked
             
         Returns:
-            A list of text chunks, each below the maximum chunk size
+            A list of text chunks, each producing SSML below the maximum request size
         """
         # Log detailed information about the input text
         # Correctly split by double newlines to count actual paragraphs
-        paragraphs_in = re.split(r'\n{2,}', text)
-        logging.debug(f"TTS_TRACE: CHUNKER INPUT - Total length: {len(text)}, Paragraph count: {len(paragraphs_in)}")
+        paragraphs = re.split(r'\n{2,}', text)
+        logging.debug(f"TTS_TRACE: CHUNKER INPUT - Total length: {len(text)}, Paragraph count: {len(paragraphs)}")
         chunker_input_first_100 = text[:100].replace('\n', '[NEWLINE]')
         logging.debug(f"TTS_TRACE: CHUNKER INPUT - First 100 chars: {chunker_input_first_100}")
         chunker_input_last_100 = text[-100:].replace('\n', '[NEWLINE]')
         logging.debug(f"TTS_TRACE: CHUNKER INPUT - Last 100 chars: {chunker_input_last_100}")
-        
-        # Maximum size for any chunk (leaving room for SSML tag overhead)
-        max_chunk_size = 2500
+
+        max_bytes = TTS_MAX_SSML_BYTES
         
         # If the text is already small enough, return it as a single chunk
-        if len(text) <= max_chunk_size:
+        if self._ssml_size(text) <= max_bytes:
             logging.debug(f"TTS_TRACE: CHUNKER - Text fits in single chunk of {len(text)} characters")
             return [text]
         
         chunks = []
-        # Split by paragraph breaks properly
-        paragraphs = re.split(r'\n{2,}', text)
-        current_chunk = ""
+        current_paragraphs = []
+        current_size = self._SSML_ENVELOPE_BYTES
+        part_counter = 0
         paragraph_separator = "\n\n"  # Use double newline to preserve paragraph breaks
-        chunk_paragraph_count = 0  # Initialize paragraph counter for current chunk
-        
-        for i, paragraph in enumerate(paragraphs):
+
+        def flush():
+            nonlocal current_paragraphs, current_size, part_counter
+            if current_paragraphs:
+                chunks.append(paragraph_separator.join(current_paragraphs))
+                logging.debug(
+                    f"TTS_TRACE: CHUNKER OUTPUT - Chunk {len(chunks)} has {len(current_paragraphs)} paragraphs, "
+                    f"length: {len(chunks[-1])}, SSML bytes: {current_size}"
+                )
+            current_paragraphs = []
+            current_size = self._SSML_ENVELOPE_BYTES
+            part_counter = 0
+
+        for paragraph in paragraphs:
             paragraph = paragraph.strip()
             if not paragraph:
                 continue  # Skip empty paragraphs
-                
-            # If adding this paragraph would exceed the chunk size, start a new chunk
-            if current_chunk and (len(current_chunk) + len(paragraph_separator) + len(paragraph) > max_chunk_size):
-                # Finalize the current chunk.
-                chunks.append(current_chunk)
-                logging.debug(f"TTS_TRACE: CHUNKER OUTPUT - Chunk {len(chunks)}/{len(paragraphs)} has {chunk_paragraph_count} paragraphs, length: {len(current_chunk)}")
-                
-                # Start the new chunk with the current paragraph.
-                current_chunk = paragraph
-                chunk_paragraph_count = 1
+
+            # Mark names are numbered per chunk, so the cost depends on what is already in it
+            size, parts = self._paragraph_ssml_size(paragraph, part_counter, len(current_paragraphs))
+            if current_paragraphs and current_size + size > max_bytes:
+                flush()
+                size, parts = self._paragraph_ssml_size(paragraph, 0, 0)
+
+            if current_size + size <= max_bytes:
+                current_paragraphs.append(paragraph)
+                current_size += size
+                part_counter += parts
                 continue
-                
-            # If the paragraph itself is too large, we need to split it by sentences
-            if len(paragraph) > max_chunk_size:
-                # If we have content in the current chunk, finalize it first
-                if current_chunk:
-                    chunks.append(current_chunk)
-                    logging.debug(f"TTS_TRACE: CHUNKER OUTPUT - Chunk {len(chunks)}/{len(paragraphs)} has {chunk_paragraph_count} paragraphs, length: {len(current_chunk)}")
-                    
-                    # Reset for new chunk
-                    current_chunk = ""
-                    chunk_paragraph_count = 0
-                    
-                # Split the large paragraph by sentence boundaries
-                sentences = re.split(r'([.!?]\s+)', paragraph)
-                sentence_groups = []
-                
-                # Reassemble the split parts to keep punctuation with sentences
-                for j in range(0, len(sentences)-1, 2):
-                    if j+1 < len(sentences):
-                        sentence_groups.append(sentences[j] + sentences[j+1])
-                    else:
-                        sentence_groups.append(sentences[j])
-                        
-                # If there's an odd number, add the last element
-                if len(sentences) % 2 == 1:
-                    sentence_groups.append(sentences[-1])
-                    
-                # Create chunks from sentence groups
-                current_sentence_chunk = ""
-                for sentence in sentence_groups:
-                    # If adding this sentence would exceed chunk size, start a new chunk
-                    if len(current_sentence_chunk) + len(sentence) > max_chunk_size:
-                        if current_sentence_chunk:
-                            chunks.append(current_sentence_chunk)
-                            current_sentence_chunk = sentence
-                        else:  # If the sentence itself is too long, we need to break it up
-                            for k in range(0, len(sentence), max_chunk_size):
-                                sub_part = sentence[k:k + max_chunk_size]
-                                chunks.append(sub_part)
-                    else:
-                        if current_sentence_chunk:
-                            current_sentence_chunk += sentence
-                        else:
-                            current_sentence_chunk = sentence
-                            
-                # Add any remaining sentence chunk
-                if current_sentence_chunk:
-                    chunks.append(current_sentence_chunk)
-                    
-                # Start a new paragraph chunk
-                current_chunk = ""
-                chunk_paragraph_count = 0
-            else:
-                # Otherwise, add the paragraph to the current chunk.
-                if current_chunk:
-                    # Join with the separator if the chunk isn't empty.
-                    current_chunk += paragraph_separator + paragraph
+
+            # The paragraph alone is too large for one request: split it by sentences, then words
+            logging.debug(f"TTS_TRACE: CHUNKER - Splitting oversized paragraph ({len(paragraph)} characters, {size} SSML bytes)")
+            sentences = [sentence for sentence in re.split(r'(?<=[.!?])\s+', paragraph) if sentence]
+            for piece in self._pack_units(sentences, max_bytes):
+                if self._ssml_size(piece) <= max_bytes:
+                    chunks.append(piece)
                 else:
-                    # This handles the very first paragraph of the first chunk.
-                    current_chunk = paragraph
-                chunk_paragraph_count += 1
-        
-        # Add the last chunk if it has content
-        if current_chunk:
-            chunks.append(current_chunk)
-            
-        # Log detailed information about the output chunks
+                    chunks.extend(self._pack_units(piece.split(), max_bytes))
+
+        flush()
         logging.debug(f"TTS_TRACE: CHUNKER OUTPUT - Split into {len(chunks)} chunks")
-        for i, chunk in enumerate(chunks):
-            chunk_paragraphs = re.split(r'\n{2,}', chunk)
-            logging.debug(f"TTS_TRACE: CHUNKER OUTPUT - Chunk {i+1}/{len(chunks)} has {len(chunk_paragraphs)} paragraphs, length: {len(chunk)}")
-        
         return chunks
 
-    def synthesize_text(self, text, voice_name=None, speaking_rate=None, pitch=None,
-                     audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-                     sample_rate_hertz=None):
+    # len("<speak></speak>")
+    _SSML_ENVELOPE_BYTES = 15
+
+    def _paragraph_ssml_size(self, paragraph: str, part_counter: int, p_index: int):
         """
-        Converts text to speech using Google Cloud TTS API, with support for chunking
-        large texts and preserving paragraph structure.
-        
+        Returns (bytes, mark_count) of the SSML _build_ssml_and_map emits for one non-empty
+        paragraph, given the mark and paragraph counters it starts from. Must mirror the builder.
+        """
+        size = len('<p>') + len(f'</p><mark name="p_break_{p_index}"/><break time="750ms"/>')
+        marks = 0
+        for part in re.split(r'(\s+)', paragraph):
+            if not part:
+                continue
+            size += len(part.encode('utf-8'))
+            if TTS_WORD_MARKS_ONLY and not part.strip() and '\n' not in part:
+                continue
+            size += len(f'<mark name="part_{part_counter + marks}"/>')
+            marks += 1
+        return size, marks
+
+    def _ssml_size(self, text: str) -> int:
+        """SSML byte size of text as a single chunk (same result as building it, without the logging)."""
+        size = self._SSML_ENVELOPE_BYTES
+        part_counter = 0
+        p_index = 0
+        for paragraph in re.split(r'\n{2,}', text):
+            if not paragraph.strip():
+                size += len(f'<mark name="part_{part_counter}"/>')
+                part_counter += 1
+                continue
+            paragraph_size, marks = self._paragraph_ssml_size(paragraph, part_counter, p_index)
+            size += paragraph_size
+            part_counter += marks
+            p_index += 1
+        return size
+
+    def _pack_units(self, units: list[str], max_bytes: int) -> list[str]:
+        """
+        Greedily joins units (sentences or words) with spaces into pieces that each fit in
+        max_bytes of SSML. A unit that can't fit even on its own is hard-split by characters.
+        """
+        pieces = []
+        current = ""
+        for unit in units:
+            candidate = f"{current} {unit}" if current else unit
+            if self._ssml_size(candidate) <= max_bytes:
+                current = candidate
+                continue
+            if current:
+                pieces.append(current)
+            if self._ssml_size(unit) <= max_bytes:
+                current = unit
+                continue
+            # A single unbroken run (e.g. a long URL); shrink until it fits
+            current = ""
+            step = max(1, len(unit))
+            start = 0
+            while start < len(unit):
+                while step > 1 and self._ssml_size(unit[start:start + step]) > max_bytes:
+                    step //= 2
+                pieces.append(unit[start:start + step])
+                start += step
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _build_ssml_and_map(self, plain_text: str):
+        """
+        Builds the SSML for a chunk of text and a map from mark names to the text they mark.
+        With TTS_WORD_MARKS_ONLY, plain whitespace runs are emitted without a mark.
+
         Args:
-            text: The text to be synthesized
-            voice_name: Optional voice name to use
-            speaking_rate: Optional speaking rate (default: 1.0)
-            pitch: Optional pitch adjustment (default: 0.0)
-            audio_encoding: Optional audio encoding format
-            sample_rate_hertz: Optional sample rate in hertz
+            plain_text: The (already sanitized) chunk text
+
+        Returns:
+            Tuple of (ssml_string, marks_map)
+        """
+        ssml_body = []
+        marks_map = {}  # Map mark names to actual text
+        part_counter = 0
+        p_index = 0
+        
+        # Split the text into paragraphs based on double newlines
+        # This matches how sanitize_text_for_tts joins paragraphs with '\n\n'
+        paragraphs = re.split(r'\n{2,}', plain_text)
+        logging.debug(f"TTS_TRACE: SSML_BUILDER - Processing text with {len(paragraphs)} paragraphs, total length: {len(plain_text)}")
+        ssml_input_first_100 = plain_text[:100].replace('\n', '[NEWLINE]')
+        logging.debug(f"TTS_TRACE: SSML_BUILDER - First 100 chars: {ssml_input_first_100}")
+        ssml_input_last_100 = plain_text[-100:].replace('\n', '[NEWLINE]')
+        logging.debug(f"TTS_TRACE: SSML_BUILDER - Last 100 chars: {ssml_input_last_100}")
+        
+        # Log paragraph details
+        for i, para in enumerate(paragraphs):
+            if i < 3 or i >= len(paragraphs) - 3:  # Log first 3 and last 3 paragraphs
+                logging.debug(f"TTS_TRACE: SSML_BUILDER - Paragraph {i}/{len(paragraphs)}: '{para[:50]}...' (length: {len(para)})")
+        
+        for p_num, paragraph in enumerate(paragraphs):
+            logging.debug(f"TTS_TRACE: SSML_BUILDER - Processing paragraph {p_num+1}/{len(paragraphs)} - length: {len(paragraph)}")
+            
+            if not paragraph.strip():
+                # Add a mark for the paragraph break
+                mark_name = f"part_{part_counter}"
+                part_counter += 1
+                marks_map[mark_name] = '\n'
+                ssml_body.append(f'<mark name="{mark_name}"/>')
+                logging.debug(f"TTS_TRACE: SSML_BUILDER - Added empty paragraph marker at counter {part_counter-1}")
+                continue
+            
+            # Start a new paragraph in SSML
+            ssml_body.append('<p>')
+            logging.debug(f"TTS_TRACE: SSML_BUILDER - Started SSML paragraph {p_index+1}")
+            
+            # Split paragraph into words and spaces
+            parts = re.split(r'(\s+)', paragraph)
+            word_count = len([p for p in parts if p.strip()])
+            logging.debug(f"TTS_TRACE: SSML_BUILDER - Split paragraph into {len(parts)} parts ({word_count} words)")
+            
+            for part in parts:
+                if not part: 
+                    continue
+
+                if TTS_WORD_MARKS_ONLY and not part.strip() and '\n' not in part:
+                    ssml_body.append(part)
+                    continue
+                
+                # Create a mark for each text part (word or space)
+                mark_name = f"part_{part_counter}"
+                part_counter += 1
+                ssml_body.append(f'<mark name="{mark_name}"/>{part}')
+                marks_map[mark_name] = part
             
+            # Add a special paragraph break marker to the marks map
+            p_break_mark = f"p_break_{p_index}"
+            marks_map[p_break_mark] = "PARAGRAPH_BREAK"
+            logging.debug(f"TTS_TRACE: SSML_BUILDER - Adding PARAGRAPH_BREAK marker {p_break_mark}")
+            
+            # Close the paragraph tag and add a timed break to ensure a timepoint is generated
+            ssml_body.append(f'</p><mark name="{p_break_mark}"/><break time="750ms"/>')
+            logging.debug(f"TTS_TRACE: SSML_BUILDER - Closed SSML paragraph {p_index+1} with marker {p_break_mark} and timed break")
+            p_index += 1
+        
+        ssml_string = f"<speak>{''.join(ssml_body)}</speak>"
+        logging.debug(f"TTS_TRACE: SSML_BUILDER - Generated SSML with {p_index} paragraphs, {part_counter} word{'' if TTS_WORD_MARKS_ONLY else '/space'} markers")
+        
+        # Count paragraph breaks in the map
+        paragraph_breaks = sum(1 for k, v in marks_map.items() if v == "PARAGRAPH_BREAK")
+        logging.debug(f"TTS_TRACE: SSML_BUILDER - Final marks_map has {len(marks_map)} entries, including {paragraph_breaks} paragraph breaks")
+        
+        return ssml_string, marks_map
+
+    def _synthesize_chunk(self, chunk_index: int, chunk_count: int, chunk: str, voice, audio_config) -> dict:
+        """
+        Synthesizes a single chunk. Safe to call from worker threads; the global
+        request semaphore caps how many chunk requests are in flight process-wide.
+
+        Args:
+            chunk_index: Zero-based position of the chunk in the text
+            chunk_count: Total number of chunks (for logging)
+            chunk: The chunk text
+            voice: VoiceSelectionParams for the request
+            audio_config: AudioConfig for the request (LINEAR16, unless the caller wants
+                the final encoding straight from the API)
+
         Returns:
-            Dict with audio_content (bytes) and timepoints (list) or None if failed
+            Chunk result dict (see _chunk_result), timepoints relative to the chunk start
         """
-        logging.debug(f"TTS_TRACE: Entering synthesize_text. Initial text length: {len(text) if text else 0}")
+        label = f"[Chunk {chunk_index+1}/{chunk_count}]"
+        logging.info(f"Processing TTS chunk {chunk_index+1}/{chunk_count} ({len(chunk)} characters)")
+        logging.debug(f"TTS_TRACE: {label} Processing chunk with {len(chunk)} characters")
         
-        if not self._check_client() or not text:
-            return None
+        # Build SSML and mark map for this chunk
+        ssml_text, marks_to_text_map = self._build_ssml_and_map(chunk)
+        logging.debug(f"TTS_TRACE: {label} Generated SSML: {ssml_text[:500]}...")
+        
+        request = texttospeech.SynthesizeSpeechRequest(
+            input=texttospeech.SynthesisInput(ssml=ssml_text),
+            voice=voice,
+            audio_config=audio_config,
+            enable_time_pointing=[texttospeech.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+        )
+
+        # Send request to Google TTS API, staying under the process-wide concurrency cap
+        with self._request_semaphore:
+            response = self.client.synthesize_speech(request=request)
+        logging.debug(f"TTS_TRACE: {label} API call successful. Received {len(response.audio_content)} bytes of audio.")
+        
+        # Process timepoints for this chunk (offsets are rebased by the caller)
+        chunk_timepoints = []
+        paragraph_markers_found = 0
+        regular_markers_found = 0
+        logging.debug(f"TTS_TRACE: {label} Processing {len(response.timepoints)} timepoints")
+
+        for tp_index, tp in enumerate(response.timepoints):
+            # Log every 100th timepoint and first/last few
+            if tp_index % 100 == 0 or tp_index < 5 or tp_index >= len(response.timepoints) - 5:
+                logging.debug(f"TTS_TRACE: {label} Timepoint {tp_index}: name={tp.mark_name}, time={tp.time_seconds:.3f}s")
+            
+            text_part = marks_to_text_map.get(tp.mark_name, '')
+            if text_part == "PARAGRAPH_BREAK":
+                # Add a special paragraph break object to the timepoints
+                chunk_timepoints.append({"mark_name": "PARAGRAPH_BREAK", "time_seconds": tp.time_seconds})
+                paragraph_markers_found += 1
+            else:
+                # Regular word timepoint
+                chunk_timepoints.append({"mark_name": text_part, "time_seconds": tp.time_seconds})
+                regular_markers_found += 1
+
+        logging.debug(
+            f"TTS_TRACE: {label} Processed {paragraph_markers_found} paragraph breaks and {regular_markers_found} regular markers"
+        )
+        if audio_config.audio_encoding != texttospeech.AudioEncoding.LINEAR16:
+            # Natively encoded audio is returned as-is; it is never stitched
+            return {"audio_content": response.audio_content, "format": None, "pcm": None,
+                    "duration_ms": None, "timepoints": chunk_timepoints}
+
+        # Exact PCM timing straight from the WAV header; no decode needed
+        chunk_result = self._chunk_result(response.audio_content, chunk_timepoints)
+        real_duration_ms = chunk_result["duration_ms"]
+
+        last_chunk_timepoint_ms = 0
+        if response.timepoints:
+            last_chunk_timepoint_ms = response.timepoints[-1].time_seconds * 1000
+        logging.debug(
+            f"TTS_TRACE: {label} MeasuredDuration={real_duration_ms:.1f}ms, LastTimepoint={last_chunk_timepoint_ms:.1f}ms"
+        )
+        if real_duration_ms - last_chunk_timepoint_ms > 150:
+            logging.warning(
+                f"TTS_TRACE: {label} Detected {real_duration_ms - last_chunk_timepoint_ms:.1f}ms of trailing silence/padding; consider trimming."
+            )
+
+        return chunk_result
+
+    @staticmethod
+    def _chunk_result(audio_content: bytes, timepoints: list) -> dict:
+        """
+        Wraps a chunk's LINEAR16 WAV bytes for stitching.
+
+        Returns:
+            Dict with 'audio_content' (WAV bytes), 'format' (WavFormat), 'pcm' (zero-copy
+            memoryview of the samples), 'duration_ms' (from the sample count) and 'timepoints'
+        """
+        wav_format, pcm = parse_wav(audio_content)
+        return {
+            "audio_content": audio_content,
+            "format": wav_format,
+            "pcm": pcm,
+            "duration_ms": pcm_duration_seconds(len(pcm), wav_format) * 1000,
+            "timepoints": timepoints
+        }
+
+    def _paragraph_chunks(self, text: str) -> list[str]:
+        """
+        Splits text into one chunk per paragraph (oversized paragraphs are split further
+        by _chunk_text), so an edit to one paragraph leaves the other chunks unchanged.
+        """
+        chunks = []
+        for paragraph in re.split(r'\n{2,}', text):
+            paragraph = paragraph.strip()
+            if paragraph:
+                chunks.extend(self._chunk_text(paragraph))
+        return chunks or [text]
+
+    def _iter_chunk_results(self, chunks: list[str], voice, audio_config, chunk_cache_params=None):
+        """
+        Synthesizes all chunks, running them concurrently on a bounded worker pool, and
+        yields each result in chunk order as soon as it (and every chunk before it) is ready.
+
+        If chunk_cache_params is given, each chunk's WAV audio and relative timepoints are
+        cached under the chunk text plus those parameters, and only cache misses are sent
+        to the API.
+        """
+        results = [None] * len(chunks)
+        chunk_keys = [None] * len(chunks)
+        if chunk_cache_params is not None and self.cache:
+            for chunk_index, chunk in enumerate(chunks):
+                chunk_keys[chunk_index] = TTSCache.make_key(chunk, kind='chunk', **chunk_cache_params)
+                cached_chunk = self.cache.get(chunk_keys[chunk_index])
+                if cached_chunk:
+                    results[chunk_index] = self._chunk_result(cached_chunk["audio_content"], cached_chunk["timepoints"])
+            logging.debug(
+                f"TTS_TRACE: Chunk cache satisfied {sum(r is not None for r in results)}/{len(chunks)} chunks"
+            )
+
+        pending = [chunk_index for chunk_index, result in enumerate(results) if result is None]
+        executor = None
+        futures = {}
+        if len(pending) > 1:
+            max_workers = max(1, min(TTS_MAX_WORKERS_PER_CALL, len(pending)))
+            logging.debug(f"TTS_TRACE: Synthesizing {len(pending)} chunks with {max_workers} workers")
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-chunk")
+            futures = {
+                chunk_index: executor.submit(self._synthesize_chunk, chunk_index, len(chunks), chunks[chunk_index], voice, audio_config)
+                for chunk_index in pending
+            }
+        try:
+            for chunk_index, chunk in enumerate(chunks):
+                if results[chunk_index] is None:
+                    if chunk_index in futures:
+                        results[chunk_index] = futures[chunk_index].result()
+                    else:
+                        results[chunk_index] = self._synthesize_chunk(chunk_index, len(chunks), chunk, voice, audio_config)
+                    if chunk_keys[chunk_index] is not None:
+                        self.cache.put(chunk_keys[chunk_index], {
+                            "audio_content": results[chunk_index]["audio_content"],
+                            "timepoints": results[chunk_index]["timepoints"]
+                        })
+                yield results[chunk_index]
+                # Let stitched/streamed chunks be garbage collected as we go
+                results[chunk_index] = None
+        finally:
+            # On failure (or an abandoned stream), don't keep spending quota on chunks we will throw away
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
 
-        import re
+    def _synthesize_chunks(self, chunks: list[str], voice, audio_config, chunk_cache_params=None) -> list[dict]:
+        """Synthesizes all chunks (see _iter_chunk_results) and returns the results in chunk order."""
+        return list(self._iter_chunk_results(chunks, voice, audio_config, chunk_cache_params))
+
+    @staticmethod
+    def resolve_audio_encoding(audio_encoding=None) -> str:
+        """
+        Normalizes a requested output encoding to a key of AUDIO_OUTPUT_FORMATS.
+
+        Args:
+            audio_encoding: texttospeech.AudioEncoding, its name (case-insensitive), or None
+                for the TTS_DEFAULT_AUDIO_ENCODING env var (default: MP3)
+
+        Raises:
+            ValueError: If the encoding is not supported
+        """
+        if audio_encoding is None:
+            audio_encoding = os.getenv('TTS_DEFAULT_AUDIO_ENCODING', 'MP3')
+        if isinstance(audio_encoding, str):
+            name = audio_encoding.strip().upper()
+        else:
+            name = texttospeech.AudioEncoding(audio_encoding).name
+        if name not in AUDIO_OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported audio encoding '{audio_encoding}'. Supported: {', '.join(AUDIO_OUTPUT_FORMATS)}")
+        return name
+
+    @staticmethod
+    def _encode_pcm(pcm, wav_format, audio_encoding: str = "MP3", bitrate_kbps=None) -> bytes:
+        """
+        Encodes stitched PCM once, at the end. LINEAR16 only prepends a WAV header; other
+        encodings go through pydub/ffmpeg without decoding the PCM into an AudioSegment first.
+        """
+        if audio_encoding == "LINEAR16":
+            return b"".join((wav_header(len(pcm), wav_format), pcm))
+        output_format = AUDIO_OUTPUT_FORMATS[audio_encoding]
+        audio_segment = AudioSegment(
+            data=pcm,
+            sample_width=wav_format.sample_width,
+            frame_rate=wav_format.sample_rate,
+            channels=wav_format.channels
+        )
+        buffer = io.BytesIO()
+        audio_segment.export(
+            buffer,
+            format=output_format["export_format"],
+            codec=output_format["codec"],
+            bitrate=f"{int(bitrate_kbps)}k" if bitrate_kbps else None
+        )
+        return buffer.getvalue()
+
+    @staticmethod
+    def _stitch_chunk_results(chunk_results: list[dict]):
+        """
+        Joins chunk PCM in order into one preallocated buffer, rebasing each chunk's
+        timepoints by the PCM stitched before it. Offsets come from sample counts, so
+        they are exact and never drift.
+
+        Returns:
+            Tuple of (combined_pcm bytearray, WavFormat, timepoints)
+        """
+        wav_format = chunk_results[0]["format"]
+        timepoints = []
+        pcm_length = 0
+        for chunk_index, chunk_result in enumerate(chunk_results):
+            if chunk_result["format"] != wav_format:
+                raise TTSServiceError(f"Chunk {chunk_index+1} audio format {chunk_result['format']} does not match {wav_format}")
+            offset_seconds = pcm_duration_seconds(pcm_length, wav_format)
+            for tp in chunk_result["timepoints"]:
+                timepoints.append({
+                    "mark_name": tp["mark_name"],
+                    "time_seconds": tp["time_seconds"] + offset_seconds
+                })
+            logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunk_results)}] Offset={offset_seconds * 1000:.1f}ms, Duration={chunk_result['duration_ms']:.1f}ms")
+            pcm_length += len(chunk_result["pcm"])
 
+        combined_pcm = concat_pcm((chunk_result["pcm"] for chunk_result in chunk_results), pcm_length)
+        return combined_pcm, wav_format, timepoints
+
+    @staticmethod
+    def _audio_config(synthesis_params: dict, audio_encoding: str = "LINEAR16"):
+        """Builds the API AudioConfig for the resolved synthesis parameters."""
+        audio_config_params = {
+            "audio_encoding": getattr(texttospeech.AudioEncoding, audio_encoding),
+            "speaking_rate": synthesis_params["speaking_rate"],
+            "pitch": synthesis_params["pitch"]
+        }
+        if synthesis_params["sample_rate_hertz"] is not None:
+            audio_config_params["sample_rate_hertz"] = synthesis_params["sample_rate_hertz"]
+        return texttospeech.AudioConfig(**audio_config_params)
+
+    def _prepare_synthesis(self, text, voice_name=None, speaking_rate=None, pitch=None, sample_rate_hertz=None):
+        """
+        Resolves voice defaults, sanitizes the text and builds the API request parameters
+        shared by synthesize_text and synthesize_text_stream.
+
+        Returns:
+            Tuple of (sanitized_text, synthesis_params, voice, audio_config)
+        """
         # Determine defaults from environment variables
         final_voice_name = voice_name if voice_name is not None else os.getenv('TTS_DEFAULT_VOICE_NAME', "en-US-Journey-F")
         try:
@@ -239,77 +626,6 @@ class TTSService:
             logging.warning("Invalid speaking rate or pitch, using defaults.")
             final_speaking_rate = 1.0
             final_pitch = 0.0
-        
-        # Define a helper function to build SSML and map mark names to text
-        def _build_ssml_and_map(plain_text: str):
-            ssml_body = []
-            marks_map = {}  # Map mark names to actual text
-            part_counter = 0
-            p_index = 0
-            
-            # Split the text into paragraphs based on double newlines
-            # This matches how sanitize_text_for_tts joins paragraphs with '\n\n'
-            paragraphs = re.split(r'\n{2,}', plain_text)
-            logging.debug(f"TTS_TRACE: SSML_BUILDER - Processing text with {len(paragraphs)} paragraphs, total length: {len(plain_text)}")
-            ssml_input_first_100 = plain_text[:100].replace('\n', '[NEWLINE]')
-            logging.debug(f"TTS_TRACE: SSML_BUILDER - First 100 chars: {ssml_input_first_100}")
-            ssml_input_last_100 = plain_text[-100:].replace('\n', '[NEWLINE]')
-            logging.debug(f"TTS_TRACE: SSML_BUILDER - Last 100 chars: {ssml_input_last_100}")
-            
-            # Log paragraph details
-            for i, para in enumerate(paragraphs):
-                if i < 3 or i >= len(paragraphs) - 3:  # Log first 3 and last 3 paragraphs
-                    logging.debug(f"TTS_TRACE: SSML_BUILDER - Paragraph {i}/{len(paragraphs)}: '{para[:50]}...' (length: {len(para)})")
-            
-            for p_num, paragraph in enumerate(paragraphs):
-                logging.debug(f"TTS_TRACE: SSML_BUILDER - Processing paragraph {p_num+1}/{len(paragraphs)} - length: {len(paragraph)}")
-                
-                if not paragraph.strip():
-                    # Add a mark for the paragraph break
-                    mark_name = f"part_{part_counter}"
-                    part_counter += 1
-                    marks_map[mark_name] = '\n'
-                    ssml_body.append(f'<mark name="{mark_name}"/>')
-                    logging.debug(f"TTS_TRACE: SSML_BUILDER - Added empty paragraph marker at counter {part_counter-1}")
-                    continue
-                
-                # Start a new paragraph in SSML
-                ssml_body.append('<p>')
-                logging.debug(f"TTS_TRACE: SSML_BUILDER - Started SSML paragraph {p_index+1}")
-                
-                # Split paragraph into words and spaces
-                parts = re.split(r'(\s+)', paragraph)
-                word_count = len([p for p in parts if p.strip()])
-                logging.debug(f"TTS_TRACE: SSML_BUILDER - Split paragraph into {len(parts)} parts ({word_count} words)")
-                
-                for part in parts:
-                    if not part: 
-                        continue
-                    
-                    # Create a mark for each text part (word or space)
-                    mark_name = f"part_{part_counter}"
-                    part_counter += 1
-                    ssml_body.append(f'<mark name="{mark_name}"/>{part}')
-                    marks_map[mark_name] = part
-                
-                # Add a special paragraph break marker to the marks map
-                p_break_mark = f"p_break_{p_index}"
-                marks_map[p_break_mark] = "PARAGRAPH_BREAK"
-                logging.debug(f"TTS_TRACE: SSML_BUILDER - Adding PARAGRAPH_BREAK marker {p_break_mark}")
-                
-                # Close the paragraph tag and add a timed break to ensure a timepoint is generated
-                ssml_body.append(f'</p><mark name="{p_break_mark}"/><break time="750ms"/>')
-                logging.debug(f"TTS_TRACE: SSML_BUILDER - Closed SSML paragraph {p_index+1} with marker {p_break_mark} and timed break")
-                p_index += 1
-            
-            ssml_string = f"<speak>{''.join(ssml_body)}</speak>"
-            logging.debug(f"TTS_TRACE: SSML_BUILDER - Generated SSML with {p_index} paragraphs, {part_counter} word/space markers")
-            
-            # Count paragraph breaks in the map
-            paragraph_breaks = sum(1 for k, v in marks_map.items() if v == "PARAGRAPH_BREAK")
-            logging.debug(f"TTS_TRACE: SSML_BUILDER - Final marks_map has {len(marks_map)} entries, including {paragraph_breaks} paragraph breaks")
-            
-            return ssml_string, marks_map
 
         # Sanitize text and then chunk it
         sanitized_text = sanitize_text_for_tts(text)
@@ -330,123 +646,126 @@ class TTSService:
         
         # Log the text after sanitization
         logging.debug(f"TTS_TRACE: Text after sanitization. Length: {len(sanitized_text)}. Content: {sanitized_text[:500]}")
-        
-        chunks = self._chunk_text(sanitized_text)
-        logging.debug(f"TTS_TRACE: Text chunking complete. Number of chunks: {len(chunks)}. Chunk lengths: {[len(c) for c in chunks]}")
-        
-        
-        # Process each chunk and aggregate results
-        combined_audio_segment = AudioSegment.empty()
-        timepoint_chunks = []
-        
+
+        synthesis_params = {
+            "voice_name": final_voice_name,
+            "speaking_rate": final_speaking_rate,
+            "pitch": final_pitch,
+            "sample_rate_hertz": sample_rate_hertz,
+            "word_marks_only": TTS_WORD_MARKS_ONLY
+        }
+
         language_code = "-".join(final_voice_name.split('-')[0:2])
         voice = texttospeech.VoiceSelectionParams(
             language_code=language_code,
             name=final_voice_name
         )
         
-        # Force LINEAR16 for precise PCM chunk measurement regardless of caller input
-        audio_config_params = {
-            "audio_encoding": texttospeech.AudioEncoding.LINEAR16,
-            "speaking_rate": final_speaking_rate,
-            "pitch": final_pitch
-        }
-        if sample_rate_hertz is not None:
-            audio_config_params["sample_rate_hertz"] = sample_rate_hertz
+        # LINEAR16 for precise PCM chunk measurement and stitching
+        audio_config = self._audio_config(synthesis_params)
+        return sanitized_text, synthesis_params, voice, audio_config
+
+    @staticmethod
+    def _result_cache_key(sanitized_text, synthesis_params, output_encoding, bitrate_kbps=None, incremental=False):
+        """Cache key of a whole synthesize_text result"""
+        return TTSCache.make_key(
+            sanitized_text, incremental=incremental,
+            audio_encoding=output_encoding, bitrate_kbps=bitrate_kbps, **synthesis_params
+        )
+
+    def result_cache_key(self, text, voice_name=None, speaking_rate=None, pitch=None,
+                         audio_encoding=None, sample_rate_hertz=None, bitrate_kbps=None):
+        """
+        Returns the key synthesize_text caches this text's result under (self.cache), so
+        callers can look up or seed the cache, e.g. with audio restored from GCS.
+
+        Raises:
+            ValueError: If the audio encoding is not supported
+        """
+        output_encoding = self.resolve_audio_encoding(audio_encoding)
+        sanitized_text, synthesis_params, _, _ = self._prepare_synthesis(
+            text, voice_name, speaking_rate, pitch, sample_rate_hertz
+        )
+        return self._result_cache_key(sanitized_text, synthesis_params, output_encoding, bitrate_kbps)
+
+    def synthesize_text(self, text, voice_name=None, speaking_rate=None, pitch=None,
+                     audio_encoding=None, sample_rate_hertz=None, incremental=False,
+                     bitrate_kbps=None):
+        """
+        Converts text to speech using Google Cloud TTS API, with support for chunking
+        large texts and preserving paragraph structure. Chunks are synthesized
+        concurrently (see TTS_MAX_WORKERS_PER_CALL / TTS_MAX_CONCURRENT_REQUESTS).
+
+        With incremental=True the text is chunked per paragraph and each chunk is cached
+        on its own, so re-synthesizing a lightly edited text only calls the API for the
+        paragraphs that changed. Meant for short texts that are revised repeatedly.
+
+        When the text fits in a single chunk and no bitrate is requested, the output
+        encoding is requested natively from the API and no local encoding is done.
+        
+        Args:
+            text: The text to be synthesized
+            voice_name: Optional voice name to use
+            speaking_rate: Optional speaking rate (default: 1.0)
+            pitch: Optional pitch adjustment (default: 0.0)
+            audio_encoding: Optional output encoding: MP3, OGG_OPUS or LINEAR16 (WAV), as a
+                name or texttospeech.AudioEncoding (default: TTS_DEFAULT_AUDIO_ENCODING or MP3)
+            sample_rate_hertz: Optional sample rate in hertz
+            incremental: Cache and reuse audio per paragraph (see above)
+            bitrate_kbps: Optional bitrate for MP3/OGG_OPUS output, encoded locally
             
-        audio_config = texttospeech.AudioConfig(**audio_config_params)
+        Returns:
+            Dict with audio_content (bytes), timepoints (list), audio_encoding and mime_type,
+            or None if failed
+        """
+        logging.debug(f"TTS_TRACE: Entering synthesize_text. Initial text length: {len(text) if text else 0}")
         
+        if not self._check_client() or not text:
+            return None
+
         try:
-            for chunk_index, chunk in enumerate(chunks):
-                logging.info(f"Processing TTS chunk {chunk_index+1}/{len(chunks)} ({len(chunk)} characters)")
-                logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Processing chunk with {len(chunk)} characters")
-                
-                # Build SSML and mark map for this chunk
-                ssml_text, marks_to_text_map = _build_ssml_and_map(chunk)
-                logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Generated SSML: {ssml_text[:500]}...")
-                
-                input_text = texttospeech.SynthesisInput(ssml=ssml_text)
-                
-                # Create request for this chunk
-                request = texttospeech.SynthesizeSpeechRequest(
-                    input=input_text,
-                    voice=voice,
-                    audio_config=audio_config,
-                    enable_time_pointing=[texttospeech.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
-                )
+            output_encoding = self.resolve_audio_encoding(audio_encoding)
+        except ValueError as e:
+            logging.error(f"Error synthesizing speech: {e}")
+            return None
+        output_info = {"audio_encoding": output_encoding, "mime_type": AUDIO_OUTPUT_FORMATS[output_encoding]["mime_type"]}
 
-                # Send request to Google TTS API
-                response = self.client.synthesize_speech(request=request)
-                logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] API call successful. Received {len(response.audio_content)} bytes of audio.")
-                
-                # Decode LINEAR16 (WAV) chunk to maintain exact PCM timing
-                chunk_audio = AudioSegment.from_wav(io.BytesIO(response.audio_content))
-                real_duration_ms = len(chunk_audio)
-
-                # Process timepoints for this chunk
-                chunk_timepoints = []
-                paragraph_markers_found = 0
-                regular_markers_found = 0
-                
-                # Log timepoints from response
-                logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Processing {len(response.timepoints)} timepoints")
-                
-                # Determine the current offset from the already stitched audio
-                current_offset_ms = len(combined_audio_segment)
-
-                for tp_index, tp in enumerate(response.timepoints):
-                    # Log every 100th timepoint and first/last few
-                    if tp_index % 100 == 0 or tp_index < 5 or tp_index >= len(response.timepoints) - 5:
-                        logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Timepoint {tp_index}: name={tp.mark_name}, time={tp.time_seconds:.3f}s")
-                    
-                    text_part = marks_to_text_map.get(tp.mark_name, '')
-                    # Adjust timepoint by adding the total duration so far
-                    adjusted_time = tp.time_seconds + (current_offset_ms / 1000.0)
-                    
-                    # Check if this is a paragraph break marker
-                    if text_part == "PARAGRAPH_BREAK":
-                        # Add a special paragraph break object to the timepoints
-                        chunk_timepoints.append({
-                            "mark_name": "PARAGRAPH_BREAK", 
-                            "time_seconds": adjusted_time
-                        })
-                        paragraph_markers_found += 1
-                        logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Added PARAGRAPH_BREAK marker at {adjusted_time} seconds for mark {tp.mark_name}")
-                    else:
-                        # Regular word timepoint
-                        chunk_timepoints.append({
-                            "mark_name": text_part,
-                            "time_seconds": adjusted_time
-                        })
-                        regular_markers_found += 1
-                        
-                        # Log some sample words for debugging
-                        if regular_markers_found % 100 == 0 or regular_markers_found < 5 or len(text_part) > 20:
-                            logging.debug(f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Word marker: '{text_part}' at {adjusted_time:.3f}s")
-                
-                last_chunk_timepoint_ms = 0
-                if response.timepoints:
-                    last_chunk_timepoint_ms = response.timepoints[-1].time_seconds * 1000
-                logging.debug(
-                    f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Processed {paragraph_markers_found} paragraph breaks and {regular_markers_found} regular markers"
-                )
-                logging.debug(
-                    f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Offset={current_offset_ms}ms, MeasuredDuration={real_duration_ms}ms, LastTimepoint={last_chunk_timepoint_ms:.1f}ms"
-                )
-                if real_duration_ms - last_chunk_timepoint_ms > 150:
-                    logging.warning(
-                        f"TTS_TRACE: [Chunk {chunk_index+1}/{len(chunks)}] Detected {real_duration_ms - last_chunk_timepoint_ms:.1f}ms of trailing silence/padding; consider trimming."
-                    )
-                
-                # Add this chunk's results to our aggregated results
-                combined_audio_segment += chunk_audio
-                timepoint_chunks.extend(chunk_timepoints)
-            
-            # Export the stitched audio to a clean MP3 byte stream
-            buffer = io.BytesIO()
-            combined_audio_segment.export(buffer, format="mp3")
-            buffer.seek(0)
-            final_audio_bytes = buffer.getvalue()
+        sanitized_text, synthesis_params, voice, audio_config = self._prepare_synthesis(
+            text, voice_name, speaking_rate, pitch, sample_rate_hertz
+        )
+
+        # Serve repeated text (greetings, replayed answers) from the result cache
+        cache_key = None
+        if self.cache:
+            cache_key = self._result_cache_key(sanitized_text, synthesis_params, output_encoding, bitrate_kbps, incremental)
+            cached_result = self.cache.get(cache_key)
+            if cached_result:
+                logging.info(f"TTS cache hit: {len(cached_result['audio_content'])} bytes, {len(cached_result['timepoints'])} timepoints.")
+                cached_result.update(output_info)
+                return cached_result
+        
+        chunks = self._paragraph_chunks(sanitized_text) if incremental else self._chunk_text(sanitized_text)
+        logging.debug(f"TTS_TRACE: Text chunking complete. Number of chunks: {len(chunks)}. Chunk lengths: {[len(c) for c in chunks]}")
+
+        # Nothing to stitch: let the API produce the final encoding and skip local encoding
+        native_encoding = len(chunks) == 1 and not incremental and not bitrate_kbps
+        if native_encoding:
+            audio_config = self._audio_config(synthesis_params, output_encoding)
+        
+        try:
+            chunk_results = self._synthesize_chunks(
+                chunks, voice, audio_config,
+                chunk_cache_params=synthesis_params if incremental else None
+            )
+
+            if native_encoding:
+                final_audio_bytes = chunk_results[0]["audio_content"]
+                timepoint_chunks = chunk_results[0]["timepoints"]
+            else:
+                # Copy the PCM into one preallocated buffer and encode it once
+                combined_pcm, wav_format, timepoint_chunks = self._stitch_chunk_results(chunk_results)
+                chunk_results = None
+                final_audio_bytes = self._encode_pcm(combined_pcm, wav_format, output_encoding, bitrate_kbps)
             
             logging.info(f"TTS successfully synthesized {len(final_audio_bytes)} bytes with {len(timepoint_chunks)} timepoints across {len(chunks)} chunks.")
             logging.debug(
@@ -454,30 +773,142 @@ class TTSService:
                 f"Total timepoints: {len(timepoint_chunks)}"
             )
             
-            return {
+            result = {
                 "audio_content": final_audio_bytes,
-                "timepoints": timepoint_chunks
+                "timepoints": timepoint_chunks,
+                **output_info
             }
+            if cache_key:
+                self.cache.put(cache_key, result)
+            return result
         except Exception as e:
             logging.error(f"Error synthesizing speech: {e}")
             return None
 
-    def get_available_voices(self, language_code=None):
+    def synthesize_text_stream(self, text, voice_name=None, speaking_rate=None, pitch=None,
+                               sample_rate_hertz=None, audio_encoding=None, bitrate_kbps=None):
+        """
+        Streaming variant of synthesize_text: yields each chunk's audio as soon as it and
+        all chunks before it are synthesized, instead of waiting for the whole text.
+
+        Chunks are still synthesized concurrently; each yielded chunk is encoded on its own
+        and its timepoints are already offset to the start of the full text.
+        A whole-text cache hit is yielded as a single chunk.
+
+        Args:
+            text: The text to be synthesized
+            voice_name: Optional voice name to use
+            speaking_rate: Optional speaking rate (default: 1.0)
+            pitch: Optional pitch adjustment (default: 0.0)
+            sample_rate_hertz: Optional sample rate in hertz
+            audio_encoding: Optional output encoding (see synthesize_text)
+            bitrate_kbps: Optional bitrate for MP3/OGG_OPUS output
+
+        Yields:
+            Dict with chunk_index, chunk_count, audio_content (bytes), mime_type,
+            offset_seconds, duration_seconds and timepoints (list)
+
+        Raises:
+            TTSServiceError: If the client is not initialized
+            ValueError: If the audio encoding is not supported
+            Synthesis errors raised mid-stream are propagated to the caller.
+        """
+        if not self._check_client():
+            raise TTSServiceError("Text-to-Speech client not initialized.")
+        output_encoding = self.resolve_audio_encoding(audio_encoding)
+        mime_type = AUDIO_OUTPUT_FORMATS[output_encoding]["mime_type"]
+        if not text:
+            return
+
+        sanitized_text, synthesis_params, voice, audio_config = self._prepare_synthesis(
+            text, voice_name, speaking_rate, pitch, sample_rate_hertz
+        )
+
+        if self.cache:
+            cached_result = self.cache.get(self._result_cache_key(sanitized_text, synthesis_params, output_encoding, bitrate_kbps))
+            if cached_result:
+                logging.info(f"TTS stream cache hit: {len(cached_result['audio_content'])} bytes.")
+                yield {
+                    "chunk_index": 0,
+                    "chunk_count": 1,
+                    "audio_content": cached_result['audio_content'],
+                    "mime_type": mime_type,
+                    "offset_seconds": 0.0,
+                    "duration_seconds": None,  # Not recorded for cached results
+                    "timepoints": cached_result['timepoints']
+                }
+                return
+
+        chunks = self._chunk_text(sanitized_text)
+        logging.debug(f"TTS_TRACE: Streaming synthesis of {len(chunks)} chunks")
+
+        pcm_length = 0
+        for chunk_index, chunk_result in enumerate(self._iter_chunk_results(chunks, voice, audio_config)):
+            offset_seconds = pcm_duration_seconds(pcm_length, chunk_result["format"])
+            yield {
+                "chunk_index": chunk_index,
+                "chunk_count": len(chunks),
+                "audio_content": self._encode_pcm(chunk_result["pcm"], chunk_result["format"], output_encoding, bitrate_kbps),
+                "mime_type": mime_type,
+                "offset_seconds": offset_seconds,
+                "duration_seconds": chunk_result["duration_ms"] / 1000.0,
+                "timepoints": [
+                    {"mark_name": tp["mark_name"], "time_seconds": tp["time_seconds"] + offset_seconds}
+                    for tp in chunk_result["timepoints"]
+                ]
+            }
+            pcm_length += len(chunk_result["pcm"])
+        logging.info(f"TTS stream finished: {len(chunks)} chunks, {pcm_length} bytes of PCM.")
+
+    def get_available_voices(self, language_code=None, force_refresh=False):
         """
         Retrieves a list of available voices, optionally filtering by language code.
+
+        Results are cached per language code in memory and in a disk snapshot. Entries
+        older than TTS_VOICE_CACHE_TTL_SECONDS are still served while a background
+        refresh fetches a new list, so only the very first lookup calls the API inline.
         
         Args:
             language_code (str, optional): Language code to filter by (e.g., "en-US")
+            force_refresh (bool): Fetch from the API even if a cached list exists
             
         Returns:
             list or None: List of voice details, or None if retrieval fails
+
+        Raises:
+            ValueError: If language_code is not a well-formed BCP-47 code
         """
+        if language_code and not _VOICE_LANGUAGE_CODE.match(language_code):
+            raise ValueError(f"Invalid language code: {language_code!r}")
+        cache_key = language_code or ''
+
+        if not force_refresh:
+            entry = self._voice_cache.get(cache_key)
+            if entry is None or self._voice_entry_stale(entry):
+                # Another worker may have refreshed the shared snapshot already
+                snapshot = self._load_voice_snapshot(cache_key)
+                if snapshot and (entry is None or snapshot[0] > entry[0]):
+                    entry = snapshot
+            if entry:
+                if self._voice_entry_stale(entry):
+                    self._refresh_voices_in_background(cache_key)
+                return [dict(voice) for voice in entry[1]]
+
+        voices = self._fetch_voices(cache_key)
+        return [dict(voice) for voice in voices] if voices is not None else None
+
+    @staticmethod
+    def _voice_entry_stale(entry):
+        return time.time() - entry[0] > TTS_VOICE_CACHE_TTL_SECONDS
+
+    def _fetch_voices(self, cache_key):
+        """Calls list_voices and stores the result in the memory cache and disk snapshot."""
         if not self._check_client():
             return None
         
         try:
             # List all available voices
-            response = self.client.list_voices(language_code=language_code)
+            response = self.client.list_voices(language_code=cache_key or None)
             
             # Process the response
             voices = []
@@ -489,8 +920,60 @@ class TTSService:
                     "language_codes": list(voice.language_codes)
                 }
                 voices.append(voice_info)
-            
-            return voices
         except Exception as e:
             logging.error(f"Error retrieving available voices: {e}")
             return None
+
+        fetched_at = time.time()
+        with self._voice_cache_lock:
+            self._voice_cache[cache_key] = (fetched_at, voices)
+        self._save_voice_snapshot(cache_key, fetched_at, voices)
+        logging.info(f"Fetched {len(voices)} TTS voices for language '{cache_key or 'all'}'")
+        return voices
+
+    def _refresh_voices_in_background(self, cache_key):
+        """Starts at most one background refresh per language code."""
+        with self._voice_cache_lock:
+            if cache_key in self._voice_refreshing:
+                return
+            self._voice_refreshing.add(cache_key)
+
+        def refresh():
+            try:
+                self._fetch_voices(cache_key)
+            finally:
+                with self._voice_cache_lock:
+                    self._voice_refreshing.discard(cache_key)
+
+        threading.Thread(target=refresh, name=f"tts-voices-refresh-{cache_key or 'all'}", daemon=True).start()
+
+    @staticmethod
+    def _voice_snapshot_path(cache_key):
+        return os.path.join(get_data_dir('tts_voices'), f"voices_{cache_key or 'all'}.json")
+
+    def _load_voice_snapshot(self, cache_key):
+        """Loads a disk snapshot into the memory cache; returns (fetched_at, voices) or None."""
+        try:
+            with open(self._voice_snapshot_path(cache_key), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            entry = (float(snapshot['fetched_at']), list(snapshot['voices']))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable TTS voice snapshot for '{cache_key or 'all'}': {e}")
+            return None
+        with self._voice_cache_lock:
+            current = self._voice_cache.get(cache_key)
+            if current is None or current[0] < entry[0]:
+                self._voice_cache[cache_key] = entry
+        return entry
+
+    def _save_voice_snapshot(self, cache_key, fetched_at, voices):
+        try:
+            path = self._voice_snapshot_path(cache_key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': fetched_at, 'voices': voices}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Failed to write TTS voice snapshot for '{cache_key or 'all'}': {e}")
@@ -0,0 +1,28 @@
+"""
+Unit tests for AudioCapture, the opt-in sampled STT debug audio capture.
+"""
+
+import os
+
+from backend.utils.audio_capture import AudioCapture
+
+
+def test_capture_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("STT_DEBUG_CAPTURE_RATE", raising=False)
+    capture = AudioCapture(capture_dir=str(tmp_path))
+    assert not capture.enabled
+    assert capture.maybe_capture(b"audio") is False
+    assert os.listdir(tmp_path) == []
+
+
+def test_ring_directory_evicts_oldest_captures(tmp_path):
+    capture = AudioCapture(sample_rate=1.0, capture_dir=str(tmp_path), max_bytes=250)
+    for i in range(5):
+        assert capture.maybe_capture(bytes([i]) * 100, "flac")
+        capture.flush()
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2
+    assert all(name.endswith(".flac") for name in names)
+    kept = {open(os.path.join(tmp_path, name), "rb").read()[:1] for name in names}
+    assert kept == {bytes([3]), bytes([4])}
@@ -0,0 +1,36 @@
+"""
+Unit tests for AudioInputStore, the side channel that keeps audio out of supervisor checkpoints.
+"""
+
+import os
+import time
+
+import pytest
+
+from backend.services.audio_input_store import AudioInputStore
+
+
+@pytest.fixture
+def input_store(tmp_path):
+    store = object.__new__(AudioInputStore)
+    store._initialize(store_dir=str(tmp_path), ttl_seconds=60)
+    return store
+
+
+def test_audio_is_taken_once_by_its_owner(input_store, tmp_path):
+    blob_id = input_store.save(b"webm audio", "webm", "student-1")
+
+    assert input_store.take(blob_id, "student-2") is None
+    assert input_store.take(blob_id, "student-1") == (b"webm audio", "webm")
+    assert input_store.take(blob_id, "student-1") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_expired_audio_is_not_returned(input_store):
+    blob_id = input_store.save(b"old", "wav", "student-1")
+    audio_path, _ = input_store._paths(blob_id)
+    stale = time.time() - 120
+    os.utime(audio_path, (stale, stale))
+
+    assert input_store.take(blob_id, "student-1") is None
+    assert not os.path.exists(audio_path)
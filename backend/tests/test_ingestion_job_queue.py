@@ -0,0 +1,177 @@
+"""
+Unit tests for IngestionJobQueue, the staged background pipeline behind document uploads.
+"""
+
+import io
+import os
+
+import pytest
+
+from backend.services import firestore_service, storage_service, tts_job_queue
+from backend.services.ingestion_job_queue import IngestionJobQueue, PermanentStageError, is_transient_error
+
+
+@pytest.fixture
+def job_queue(tmp_path, monkeypatch):
+    queue = object.__new__(IngestionJobQueue)
+    queue._initialize(db_path=str(tmp_path / "jobs.db"), spool_dir=str(tmp_path / "spool"),
+                      num_workers=0, max_attempts=2, stale_seconds=60, dedup_enabled=False)
+    queue.document_updates = []
+    monkeypatch.setattr(queue, "_update_document", lambda doc_id, fields: queue.document_updates.append((doc_id, fields)))
+    return queue
+
+
+def _statuses(job_queue):
+    return [fields["status"] for _, fields in job_queue.document_updates if "status" in fields]
+
+
+def test_text_upload_runs_every_stage(job_queue, monkeypatch):
+    tts_jobs = []
+
+    class FakeTTSJobQueue:
+        def enqueue(self, document_id, user_id, text):
+            tts_jobs.append((document_id, user_id, text))
+            return "tts-job-1"
+
+    monkeypatch.setattr(tts_job_queue, "TTSJobQueue", FakeTTSJobQueue)
+    monkeypatch.setattr(job_queue, "_stage_runners", dict(
+        job_queue._stage_runners, store=lambda job: {"gcs_uri": "gs://bucket/notes.txt"}))
+
+    job_id = job_queue.enqueue("doc-1", "student-1", io.BytesIO(b"Photosynthesis turns light into sugar."),
+                               "notes.txt", "text/plain", "txt")
+    spool_path = os.path.join(job_queue.spool_dir, f"{job_id}.upload")
+    assert os.path.exists(spool_path)
+
+    while job_queue.process_next():
+        pass
+
+    job = job_queue.get_job(job_id)
+    assert job["status"] == "completed"
+    assert job["stage"] == "finalize"
+    assert job["gcs_uri"] == "gs://bucket/notes.txt"
+    assert _statuses(job_queue) == ["processing_text", "processed_dua"]
+    assert tts_jobs == [("doc-1", "student-1", "Photosynthesis turns light into sugar.")]
+    assert not os.path.exists(spool_path)
+
+
+def test_failed_stage_is_retried_then_fails_document(job_queue, monkeypatch):
+    def failing_store(job):
+        raise RuntimeError("bucket unavailable")
+
+    monkeypatch.setattr(job_queue, "_stage_runners", dict(job_queue._stage_runners, store=failing_store))
+    job_id = job_queue.enqueue("doc-2", "student-1", io.BytesIO(b"%PDF-1.4"), "worksheet.pdf", "application/pdf", "pdf")
+
+    assert job_queue.process_next() is True
+    job = job_queue.get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["stage"] == "store"
+    assert job["error"] == "bucket unavailable"
+    # Backoff keeps the retry out of reach until it is due
+    assert job_queue.process_next() is False
+
+    job_queue._finish_job(job_id, "queued", available_at=0)
+    assert job_queue.process_next() is True
+    assert job_queue.get_job(job_id)["status"] == "failed"
+    assert job_queue.document_updates[-1] == ("doc-2", {"status": "upload_failed", "processing_error": "bucket unavailable"})
+    assert os.listdir(job_queue.spool_dir) == []
+
+
+def test_duplicate_upload_reuses_narrative_and_copies_assets(job_queue, monkeypatch):
+    index, documents, copies, tts_jobs = {}, {}, [], []
+
+    class FakeFirestoreService:
+        def get_user(self, user_id):
+            return {"visualImpairment": False}
+
+        def get_content_index_entry(self, content_key):
+            return index.get(content_key)
+
+        def save_content_index_entry(self, content_key, entry_data):
+            index[content_key] = entry_data
+            return True
+
+        def get_document(self, document_id):
+            return documents.get(document_id)
+
+    class FakeStorageService:
+        bucket_name = "bucket"
+
+        def upload_file(self, file_content, content_type, user_id, original_filename=None):
+            return True, {"gcsUri": f"gs://bucket/{user_id}/original.pdf", "size": 16}
+
+        def copy_file(self, source_path, destination_path):
+            copies.append((source_path, destination_path))
+            return True
+
+    class FakeTTSJobQueue:
+        def enqueue(self, document_id, user_id, text):
+            tts_jobs.append(document_id)
+            return "tts-job"
+
+    def record_update(doc_id, fields):
+        documents.setdefault(doc_id, {"id": doc_id}).update(fields)
+
+    monkeypatch.setattr(firestore_service, "FirestoreService", FakeFirestoreService)
+    monkeypatch.setattr(storage_service, "StorageService", FakeStorageService)
+    monkeypatch.setattr(tts_job_queue, "TTSJobQueue", FakeTTSJobQueue)
+    monkeypatch.setattr(job_queue, "_update_document", record_update)
+    monkeypatch.setattr(job_queue, "_run_dua", lambda job: "Narrative of the handout.")
+    job_queue.dedup_enabled = True
+
+    job_queue.enqueue("doc-1", "student-1", io.BytesIO(b"%PDF-1.4 handout"), "handout.pdf", "application/pdf", "pdf")
+    while job_queue.process_next():
+        pass
+    assert [(key.endswith(":standard"), entry["document_id"]) for key, entry in index.items()] == [(True, "doc-1")]
+    documents["doc-1"].update(tts_status="completed",
+                              tts_audio_gcs_uri="gs://bucket/student-1/tts_outputs/doc-1_tts.ogg",
+                              tts_timepoints_gcs_uri="gs://bucket/student-1/tts_outputs/doc-1_timepoints.json")
+
+    # The same bytes from another student are copied instead of uploaded, narrated and synthesized
+    monkeypatch.setattr(job_queue, "_run_dua", lambda job: pytest.fail("duplicate was narrated again"))
+    job_id = job_queue.enqueue("doc-2", "student-2", io.BytesIO(b"%PDF-1.4 handout"), "handout.pdf", "application/pdf", "pdf")
+    while job_queue.process_next():
+        pass
+
+    assert job_queue.get_job(job_id)["reuse_document_id"] == "doc-1"
+    assert documents["doc-2"]["dua_narrative_content"] == "Narrative of the handout."
+    assert documents["doc-2"]["tts_status"] == "completed"
+    assert documents["doc-2"]["tts_audio_gcs_uri"] == "gs://bucket/student-2/tts_outputs/doc-2_tts.ogg"
+    assert tts_jobs == ["doc-1"]
+    assert [source for source, _ in copies] == [
+        "student-1/original.pdf", "student-1/tts_outputs/doc-1_tts.ogg", "student-1/tts_outputs/doc-1_timepoints.json"]
+
+
+def test_only_transient_dua_errors_are_retried(job_queue, monkeypatch):
+    assert is_transient_error("Error during LLM call: 503 The service is currently unavailable.")
+    assert is_transient_error("Error during LLM call: Pages 11-20 failed: 429 Resource has been exhausted")
+    assert is_transient_error("Error during LLM call: Deadline Exceeded")
+    assert not is_transient_error("Error during LLM call: Pages 501-510 failed: LLM response was empty or malformed.")
+
+    def unreadable_narrative(job):
+        raise PermanentStageError("Error during LLM call: LLM response was empty or malformed.")
+
+    monkeypatch.setattr(job_queue, "_stage_runners", dict(
+        job_queue._stage_runners, store=lambda job: {"gcs_uri": "gs://bucket/scan.pdf"}, narrative=unreadable_narrative))
+    job_id = job_queue.enqueue("doc-3", "student-1", io.BytesIO(b"%PDF-1.4"), "scan.pdf", "application/pdf", "pdf")
+
+    assert job_queue.process_next() is True
+    assert job_queue.process_next() is True
+    # Failed on its first attempt, without waiting for a retry
+    job = job_queue.get_job(job_id)
+    assert (job["stage"], job["status"], job["attempts"]) == ("narrative", "failed", 1)
+    assert job_queue.document_updates[-1][1]["status"] == "dua_failed"
+
+
+def test_failed_tts_stage_is_reported_on_the_document(job_queue, monkeypatch):
+    def failing_tts(job):
+        raise RuntimeError("tts queue unavailable")
+
+    monkeypatch.setattr(job_queue, "_stage_runners", dict(
+        job_queue._stage_runners, store=lambda job: {"gcs_uri": "gs://bucket/notes.txt"}, tts=failing_tts))
+    job_queue.max_attempts = 1
+    job_queue.enqueue("doc-4", "student-1", io.BytesIO(b"Enough text to be read aloud."), "notes.txt", "text/plain", "txt")
+    while job_queue.process_next():
+        pass
+
+    assert job_queue.document_updates[-1] == ("doc-4", {"tts_status": "failed", "tts_error": "tts queue unavailable"})
+    assert _statuses(job_queue)[-1] == "processed_dua"
@@ -0,0 +1,49 @@
+"""
+Unit tests for PartialNarrativePublisher, which publishes a streaming DUA narrative.
+"""
+
+from backend.utils.narrative_progress import PartialNarrativePublisher
+
+
+def test_only_complete_paragraphs_are_published():
+    written = []
+    publisher = PartialNarrativePublisher(written.append, min_interval_seconds=0)
+
+    assert publisher.update("Chapter one. The cell is") is False
+    assert publisher.update("Chapter one.\n\nThe cell is the basic unit") is True
+    assert publisher.update("Chapter one.\n\nThe cell is the basic unit of life.") is False
+    assert publisher.update("Chapter one.\n\nThe cell is the basic unit of life.\n\nMito") is True
+
+    assert written == ["Chapter one.", "Chapter one.\n\nThe cell is the basic unit of life."]
+    assert publisher.published_length == len(written[-1])
+
+
+def test_writes_are_throttled_and_failures_swallowed():
+    written = []
+    publisher = PartialNarrativePublisher(written.append, min_interval_seconds=60)
+    assert publisher.update("One.\n\nTwo") is True
+    # A newer paragraph inside the interval waits for a later update
+    assert publisher.update("One.\n\nTwo.\n\nThree") is False
+    assert written == ["One."]
+
+    def failing_write(text):
+        raise RuntimeError("firestore unavailable")
+
+    failing = PartialNarrativePublisher(failing_write, min_interval_seconds=0)
+    assert failing.update("One.\n\nTwo") is False
+    assert failing.published_length == 0
+
+
+def test_rewind_replaces_the_published_prefix():
+    written = []
+    publisher = PartialNarrativePublisher(written.append, min_interval_seconds=60)
+    assert publisher.update("Pages 1-2.\n\nPages 3-4, first try.\n\nMore") is True
+
+    # The retried range's text is dropped, so the shorter prefix is written at once
+    assert publisher.rewind("Pages 1-2.\n\n") is True
+    assert written[-1] == "Pages 1-2."
+    assert publisher.published_length == len("Pages 1-2.")
+
+    assert publisher.rewind("") is True
+    assert written[-1] == ""
+    assert publisher.published_length == 0
@@ -0,0 +1,67 @@
+"""
+Unit tests for the page-range helpers used for page-parallel DUA narration.
+"""
+
+import threading
+
+import pytest
+
+from backend.utils.pdf_pages import PageRange, PageRangeError, map_page_ranges
+
+
+def _ranges(count, pages_per_range=5):
+    return [PageRange(i * pages_per_range + 1, (i + 1) * pages_per_range, b"%PDF") for i in range(count)]
+
+
+def test_failed_range_is_retried_alone_and_results_keep_page_order():
+    calls = {}
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+
+    def narrate(page_range):
+        nonlocal in_flight, peak
+        with lock:
+            calls[page_range.start_page] = calls.get(page_range.start_page, 0) + 1
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            if page_range.start_page == 6 and calls[6] == 1:
+                raise RuntimeError("deadline exceeded")
+            return f"pages {page_range.start_page}-{page_range.end_page}"
+        finally:
+            with lock:
+                in_flight -= 1
+
+    results = map_page_ranges(_ranges(4), narrate, max_concurrency=2, max_attempts=2, retry_backoff_seconds=0)
+
+    assert results == ["pages 1-5", "pages 6-10", "pages 11-15", "pages 16-20"]
+    assert calls == {1: 1, 6: 2, 11: 1, 16: 1}
+    assert peak <= 2
+
+
+def test_range_failing_every_attempt_raises():
+    def narrate(page_range):
+        if page_range.start_page == 11:
+            raise RuntimeError("quota exhausted")
+        return "ok"
+
+    with pytest.raises(PageRangeError) as excinfo:
+        map_page_ranges(_ranges(3), narrate, max_attempts=2, retry_backoff_seconds=0)
+    assert excinfo.value.page_range.start_page == 11
+    assert "quota exhausted" in str(excinfo.value)
+
+
+def test_split_pdf_produces_ordered_standalone_ranges():
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    import io
+    from backend.utils.pdf_pages import count_pdf_pages, split_pdf
+
+    writer = PyPDF2.PdfWriter()
+    for _ in range(7):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+
+    ranges = split_pdf(buffer.getvalue(), 3)
+    assert [(r.start_page, r.end_page) for r in ranges] == [(1, 3), (4, 6), (7, 7)]
+    assert [count_pdf_pages(r.pdf_bytes) for r in ranges] == [3, 3, 1]
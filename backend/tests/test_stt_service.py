@@ -0,0 +1,119 @@
+"""
+Unit tests for STTService.transcribe, using a fake Speech-to-Text client.
+"""
+
+import struct
+import types
+
+import numpy as np
+import pytest
+from google.cloud import speech
+
+from backend.services import stt_service as stt_module
+from backend.services.stt_service import STTService
+from backend.utils.audio_utils import WavFormat, wav_header
+
+
+class FakeSpeechClient:
+    def __init__(self):
+        self.configs = []
+
+    def recognize(self, config, audio):
+        self.configs.append(config)
+        alternative = types.SimpleNamespace(transcript="what is photosynthesis", confidence=0.9)
+        return types.SimpleNamespace(results=[types.SimpleNamespace(alternatives=[alternative])],
+                                     total_billed_time=None)
+
+
+@pytest.fixture
+def stt_service():
+    service = object.__new__(STTService)
+    service._initialize()
+    service.client = FakeSpeechClient()
+    service.debug_capture.sample_rate = 0
+    return service
+
+
+def _webm_with_opus_head(sample_rate, channels=1):
+    opus_head = b"OpusHead" + bytes([1, channels]) + struct.pack("<HI", 312, sample_rate) + b"\x00\x00\x00"
+    return b"\x1aE\xdf\xa3" + b"\x00" * 40 + opus_head + b"\x00" * 200
+
+
+def test_same_utterance_is_transcribed_once(stt_service):
+    audio = _webm_with_opus_head(48000)
+    first_ok, first = stt_service.transcribe(audio, audio_format="webm")
+    second_ok, second = stt_service.transcribe(audio, audio_format="webm")
+
+    assert first_ok and second_ok
+    assert first["transcript"] == second["transcript"] == "what is photosynthesis"
+    assert len(stt_service.client.configs) == 1
+
+    config = stt_service.client.configs[0]
+    assert config.encoding == speech.RecognitionConfig.AudioEncoding.WEBM_OPUS
+    assert config.sample_rate_hertz == 48000
+
+
+def test_unsupported_format_is_rejected_without_api_call(stt_service):
+    success, result = stt_service.transcribe(b"data", audio_format="aiff")
+    assert not success
+    assert "Unsupported audio format" in result["error"]
+    assert stt_service.client.configs == []
+
+
+def _wav(samples, sample_rate=16000):
+    pcm = (np.asarray(samples) * 32767).astype("<i2").tobytes()
+    return wav_header(len(pcm), WavFormat(sample_rate, 1, 2)) + pcm
+
+
+def test_silence_is_trimmed_before_upload(stt_service):
+    rate = 16000
+    silence = np.zeros(rate * 2)
+    tone = 0.3 * np.sin(2 * np.pi * 220 * np.arange(rate) / rate)
+    audio = _wav(np.concatenate([silence, tone, silence]), rate)
+
+    success, result = stt_service.transcribe(audio, audio_format="wav")
+    assert success and result["transcript"] == "what is photosynthesis"
+    # 1s of speech plus padding on each side, instead of 5s
+    assert result["audio_size_bytes"] < len(audio) / 3
+
+
+def test_silent_recording_skips_the_api(stt_service):
+    audio = _wav(np.random.default_rng(0).normal(0, 0.0005, 16000 * 3))
+
+    success, result = stt_service.transcribe(audio, audio_format="wav")
+    assert success
+    assert result["transcript"] is None and result["no_speech"]
+    assert stt_service.client.configs == []
+
+
+def _ogg_opus(packet_sizes):
+    """Ogg Opus stream with one 20ms CELT packet per page, each packet_sizes[i] bytes long"""
+    def page(granule, packet):
+        return b"OggS" + bytes(2) + struct.pack("<q", granule) + bytes(12) + bytes([1, len(packet)]) + packet
+
+    opus_head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HI", 312, 48000) + b"\x00\x00\x00"
+    pages = [page(0, opus_head), page(0, b"OpusTags" + bytes(8))]
+    for i, size in enumerate(packet_sizes):
+        pages.append(page(960 * (i + 1), b"\xf8" + bytes(size - 1)))
+    return b"".join(pages)
+
+
+def test_opus_recording_with_little_silence_skips_ffmpeg(stt_service, monkeypatch):
+    decoded = []
+
+    def fake_from_file(*args, **kwargs):
+        decoded.append(args)
+        raise RuntimeError("ffmpeg unavailable")
+
+    monkeypatch.setattr(stt_module.AudioSegment, "from_file", fake_from_file)
+
+    # 0.2s of quiet packets around 3s of speech: sent as recorded, never decoded
+    audio = _ogg_opus([3] * 5 + [80] * 150 + [3] * 5)
+    success, result = stt_service.transcribe(audio, audio_format="ogg")
+    assert success and result["transcript"] == "what is photosynthesis"
+    assert result["audio_size_bytes"] == len(audio)
+    assert decoded == []
+
+    # 2s of leading silence is worth decoding to trim
+    stt_service.transcribe(_ogg_opus([3] * 100 + [80] * 150), audio_format="ogg")
+    assert len(decoded) == 1
@@ -0,0 +1,180 @@
+"""
+Unit tests for STTStreamSession, the queue-backed WebSocket streaming recognizer.
+"""
+
+import datetime
+import json
+import queue
+import threading
+import types
+
+import pytest
+from google.cloud import speech
+from simple_websocket import ConnectionClosed
+
+from backend.services import stt_stream
+from backend.services.stt_stream import STTStreamSession
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.incoming = queue.Queue()
+        for message in messages:
+            self.incoming.put(message)
+        self.sent = []
+        self.closed = threading.Event()
+
+    def receive(self, timeout=None):
+        while not self.closed.is_set():
+            try:
+                return self.incoming.get(timeout=0.05)
+            except queue.Empty:
+                continue
+        raise ConnectionClosed(1000, "closed")
+
+    def send(self, data):
+        if self.closed.is_set():
+            raise ConnectionClosed(1000, "closed")
+        self.sent.append(json.loads(data))
+
+    def close(self, reason=None, message=None):
+        self.closed.set()
+
+
+def _response(transcript, is_final, result_end_time=None):
+    alternative = types.SimpleNamespace(transcript=transcript)
+    result = types.SimpleNamespace(alternatives=[alternative], is_final=is_final, stability=0.9,
+                                   result_end_time=result_end_time)
+    return types.SimpleNamespace(results=[result])
+
+
+class EchoClient:
+    """Yields one final result per audio chunk."""
+
+    def streaming_recognize(self, config, requests):
+        for request in requests:
+            yield _response(request.audio_content.decode(), True)
+
+
+def test_audio_is_recognized_in_order_until_client_closes():
+    ws = FakeWebSocket([b"hello", b"world", "CLOSE"])
+    STTStreamSession(ws, EchoClient(), streaming_config=None).run()
+
+    assert [m["transcript"] for m in ws.sent] == ["hello", "world"]
+    assert ws.closed.is_set()
+
+
+def test_stalled_recognizer_triggers_backpressure_then_error():
+    release = threading.Event()
+
+    class StalledClient:
+        def streaming_recognize(self, config, requests):
+            release.wait(5)
+            return iter([])
+
+    ws = FakeWebSocket([b"a", b"b", b"c"])
+    session = STTStreamSession(ws, StalledClient(), streaming_config=None, queue_chunks=1, backpressure_timeout=0.1)
+    session.DRAIN_SECONDS = 0.1
+    session.run()
+    release.set()
+
+    assert ws.sent[0] == {"event": "backpressure"}
+    assert "falling behind" in ws.sent[1]["error"]
+
+
+def test_rollover_replays_header_and_unfinalized_audio(monkeypatch):
+    monkeypatch.setattr(stt_stream, "STT_STREAM_ROLLOVER_SECONDS", 0)
+
+    class RolloverClient:
+        """Finalizes chunk 'a' only; every stream records the audio it was sent."""
+
+        def __init__(self):
+            self.streams = []
+
+        def streaming_recognize(self, config, requests):
+            client = self
+
+            class Stream:
+                audio = []
+                cancelled = False
+
+                def __iter__(self):
+                    for request in requests:
+                        if self.cancelled:
+                            return
+                        self.audio.append(request.audio_content)
+                        if request.audio_content == b"a":
+                            yield _response("a", True, datetime.timedelta(0))
+                        elif request.audio_content != b"header":
+                            yield _response(request.audio_content.decode(), False)
+
+                def cancel(self):
+                    self.cancelled = True
+
+            stream = Stream()
+            stream.audio = []
+            client.streams.append(stream)
+            return stream
+
+    config = speech.StreamingRecognitionConfig(
+        config=speech.RecognitionConfig(encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS)
+    )
+    client = RolloverClient()
+    ws = FakeWebSocket([b"header", b"a", b"b", b"c", "CLOSE"])
+    STTStreamSession(ws, client, config).run()
+
+    assert len(client.streams) == 2
+    assert client.streams[0].audio[:2] == [b"header", b"a"]
+    # The new stream gets the container header, then only audio no final result covered
+    assert client.streams[1].audio == [b"header", b"b", b"c"]
+    assert [m["transcript"] for m in ws.sent if m["is_final"]] == ["a"]
+
+
+def test_early_rollover_replays_first_chunk_audio_once():
+    header, first_audio = b"EBML-tracks", b"\x1f\x43\xb6\x75cluster-1"
+
+    class DurationLimitClient:
+        """The first stream ends after two chunks with no final result; the client closes during the second."""
+
+        def __init__(self):
+            self.streams = []
+
+        def streaming_recognize(self, config, requests):
+            audio = []
+            self.streams.append(audio)
+            if len(self.streams) == 2:
+                ws.incoming.put("CLOSE")
+            for request in requests:
+                audio.append(request.audio_content)
+                if len(self.streams) == 1 and len(audio) == 2:
+                    raise RuntimeError("Exceeded maximum allowed stream duration of 305 seconds.")
+                yield _response("partial", False)
+
+    config = speech.StreamingRecognitionConfig(
+        config=speech.RecognitionConfig(encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS)
+    )
+    client = DurationLimitClient()
+    ws = FakeWebSocket([header + first_audio, b"cluster-2"])
+    STTStreamSession(ws, client, config).run()
+
+    assert client.streams[0] == [header + first_audio, b"cluster-2"]
+    # Only the header is resent; the first chunk's audio is replayed once, from the overlap
+    assert client.streams[1] == [header, first_audio, b"cluster-2"]
+
+
+def test_handshake_is_validated():
+    options = stt_stream.parse_stream_handshake(
+        '{"encoding": "LINEAR16", "sample_rate_hertz": 16000, "language_code": "es-ES", "interim_results": false}'
+    )
+    assert options == stt_stream.StreamOptions("linear16", 16000, "es-ES", False)
+
+    for bad in ('{"encoding": "mp3"}', '{"encoding": "webm_opus", "sample_rate_hertz": 44100}',
+                '{"language_code": "english please"}', '{"sample_rate": 16000}', '[1, 2]'):
+        with pytest.raises(ValueError):
+            stt_stream.parse_stream_handshake(bad)
+
+
+def test_client_without_handshake_streams_with_defaults():
+    ws = FakeWebSocket([b"hello"])
+    options, initial_audio = stt_stream.negotiate_stream(ws)
+    assert options.encoding == "webm_opus" and initial_audio == b"hello"
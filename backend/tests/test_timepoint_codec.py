@@ -0,0 +1,37 @@
+"""
+Unit tests for the compact timepoint encoding.
+"""
+
+import json
+
+from backend.utils.timepoint_codec import encode_timepoints, decode_timepoints, dumps_timepoints, loads_timepoints
+
+
+TIMEPOINTS = [
+    {"mark_name": "The", "time_seconds": 0.0},
+    {"mark_name": " ", "time_seconds": 0.1234},
+    {"mark_name": "cat", "time_seconds": 0.25},
+    {"mark_name": " ", "time_seconds": 0.4},
+    {"mark_name": "PARAGRAPH_BREAK", "time_seconds": 0.9},
+    {"mark_name": "The", "time_seconds": 1.65},
+]
+
+
+def test_compact_round_trip_uses_token_table_and_deltas():
+    compact = encode_timepoints(TIMEPOINTS)
+
+    assert compact["tokens"] == ["The", " ", "cat", "PARAGRAPH_BREAK"]
+    assert compact["token_ids"] == [0, 1, 2, 1, 3, 0]
+    assert compact["delta_ms"] == [0, 123, 127, 150, 500, 750]
+    assert decode_timepoints(compact) == [
+        {"mark_name": tp["mark_name"], "time_seconds": round(tp["time_seconds"], 3)} for tp in TIMEPOINTS
+    ]
+
+
+def test_loads_accepts_gzip_compact_and_legacy_lists():
+    long_timepoints = TIMEPOINTS * 500
+
+    compressed = dumps_timepoints(long_timepoints, compress=True)
+    assert len(compressed) < len(json.dumps(long_timepoints)) / 10
+    assert loads_timepoints(compressed) == decode_timepoints(encode_timepoints(long_timepoints))
+    assert loads_timepoints(json.dumps(TIMEPOINTS)) == TIMEPOINTS
@@ -0,0 +1,42 @@
+"""
+Unit tests for TTSAudioStore, the on-disk store behind /api/tts/audio/<audio_id>.
+"""
+
+import os
+import time
+
+import pytest
+
+from backend.services.tts_audio_store import TTSAudioStore
+
+
+@pytest.fixture
+def audio_store(tmp_path):
+    store = object.__new__(TTSAudioStore)
+    store._initialize(store_dir=str(tmp_path), ttl_seconds=60)
+    return store
+
+
+def test_saved_audio_is_only_served_to_its_owner(audio_store):
+    audio_id = audio_store.save(b"ID3 audio", "audio/mpeg", "student-1")
+
+    audio_path, mime_type = audio_store.get(audio_id, "student-1")
+    with open(audio_path, "rb") as f:
+        assert f.read() == b"ID3 audio"
+    assert mime_type == "audio/mpeg"
+
+    assert audio_store.get(audio_id, "student-2") is None
+    assert audio_store.get("../../etc/passwd", "student-1") is None
+
+
+def test_expired_audio_is_not_served_and_is_swept(audio_store):
+    audio_id = audio_store.save(b"old", "audio/mpeg", "student-1")
+    audio_path, _ = audio_store.get(audio_id, "student-1")
+    stale = time.time() - 120
+    os.utime(audio_path, (stale, stale))
+
+    assert audio_store.get(audio_id, "student-1") is None
+
+    audio_store._last_cleanup = 0
+    audio_store.save(b"new", "audio/mpeg", "student-1")
+    assert not os.path.exists(audio_path)
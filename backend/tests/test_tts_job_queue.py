@@ -0,0 +1,78 @@
+"""
+Unit tests for TTSJobQueue, the SQLite-backed background TTS pre-generation queue.
+"""
+
+import pytest
+
+from backend.services.tts_job_queue import TTSJobQueue
+
+
+@pytest.fixture
+def job_queue(tmp_path, monkeypatch):
+    queue = object.__new__(TTSJobQueue)
+    queue._initialize(db_path=str(tmp_path / "jobs.db"), num_workers=0, max_attempts=2, stale_seconds=60)
+    queue.document_updates = []
+    monkeypatch.setattr(queue, "_update_document", lambda doc_id, fields: queue.document_updates.append((doc_id, fields)))
+    return queue
+
+
+def test_completed_job_records_asset_uris(job_queue, monkeypatch):
+    generated = []
+
+    def fake_generate(job):
+        generated.append((job["document_id"], job["user_id"], job["text"]))
+        return {"audio_gcs_uri": "gs://bucket/a.mp3", "timepoints_gcs_uri": "gs://bucket/a.json"}
+
+    monkeypatch.setattr(job_queue, "_generate_assets", fake_generate)
+    job_id = job_queue.enqueue("doc-1", "student-1", "A narrative long enough to read.")
+    assert job_queue.get_latest_job("doc-1")["status"] == "queued"
+
+    assert job_queue.process_next() is True
+    assert job_queue.process_next() is False
+
+    assert generated == [("doc-1", "student-1", "A narrative long enough to read.")]
+    job = job_queue.get_job(job_id)
+    assert job["status"] == "completed"
+    assert job["attempts"] == 1
+    assert job["audio_gcs_uri"] == "gs://bucket/a.mp3"
+    assert "text" not in job
+    doc_id, fields = job_queue.document_updates[-1]
+    assert doc_id == "doc-1"
+    assert fields["tts_status"] == "completed"
+    assert fields["tts_timepoints_gcs_uri"] == "gs://bucket/a.json"
+
+
+def test_failed_job_is_retried_then_marked_failed(job_queue, monkeypatch):
+    def failing_generate(job):
+        raise RuntimeError("synthesis unavailable")
+
+    monkeypatch.setattr(job_queue, "_generate_assets", failing_generate)
+    job_id = job_queue.enqueue("doc-2", "student-1", "Another narrative to read aloud.")
+
+    assert job_queue.process_next() is True
+    job = job_queue.get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["error"] == "synthesis unavailable"
+    # Backoff keeps the retry out of reach until it is due
+    assert job_queue.process_next() is False
+
+    job_queue.RETRY_BACKOFF_SECONDS = 0
+    job_queue._finish_job(job_id, "queued", available_at=0)
+    assert job_queue.process_next() is True
+    job = job_queue.get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job_queue.document_updates[-1] == ("doc-2", {"tts_status": "failed", "tts_error": "synthesis unavailable"})
+
+
+def test_stale_running_job_is_reclaimed(job_queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "_generate_assets",
+                        lambda job: {"audio_gcs_uri": "gs://b/x.mp3", "timepoints_gcs_uri": "gs://b/x.json"})
+    job_id = job_queue.enqueue("doc-3", "student-1", "Narrative whose worker died.")
+    assert job_queue._claim_next()["job_id"] == job_id
+    # Nothing else is runnable while the claim is fresh
+    assert job_queue.process_next() is False
+
+    job_queue._finish_job(job_id, "processing", claimed_at=0)
+    assert job_queue.process_next() is True
+    assert job_queue.get_job(job_id)["status"] == "completed"
@@ -0,0 +1,152 @@
+"""
+Unit tests for TTSSegmentService, the lazy per-segment read-aloud synthesizer.
+"""
+
+import hashlib
+from concurrent.futures import Future
+
+import pytest
+
+from backend.services.tts_cache import TTSCache
+from backend.services.tts_segment_service import TTSSegmentService
+from backend.utils.timepoint_codec import dumps_timepoints
+
+# One MPEG-2 Layer III frame (24 kHz, 32 kbps): 96 bytes, 576 samples = 24 ms
+MP3_FRAME = bytes([0xFF, 0xF3, 0x44, 0x00]) + bytes(92)
+
+
+def fake_mp3(seconds):
+    return MP3_FRAME * round(seconds / 0.024)
+
+
+class FakeTTS:
+    def __init__(self, cache):
+        self.cache = cache
+        self.synthesized = []
+
+    def result_cache_key(self, text, audio_encoding=None):
+        return hashlib.sha256(f"{audio_encoding}:{text}".encode("utf-8")).hexdigest()
+
+    def synthesize_text(self, text, audio_encoding=None):
+        self.synthesized.append((text, audio_encoding))
+        result = {"audio_content": fake_mp3(len(text) / 10), "mime_type": "audio/mpeg",
+                  "timepoints": [{"mark_name": text.split()[0], "time_seconds": 0.1},
+                                 {"mark_name": "PARAGRAPH_BREAK", "time_seconds": 1.25}]}
+        # Like TTSService, results land in the local cache under result_cache_key
+        self.cache.put(self.result_cache_key(text, audio_encoding), result)
+        return result
+
+
+class FakeStorage:
+    def __init__(self):
+        self.files = {}
+
+    def get_file(self, path):
+        return (True, self.files[path]) if path in self.files else (False, None)
+
+    def upload_bytes_as_file(self, content_bytes, content_type, user_id, base_filename, sub_folder=None, content_encoding=None):
+        self.files[f"{user_id}/{sub_folder}/{base_filename}"] = content_bytes
+        return True, {"gcsUri": f"gs://bucket/{user_id}/{sub_folder}/{base_filename}"}
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.updates = []
+
+    def update_document(self, document_id, data):
+        self.updates.append((document_id, data))
+        return True
+
+
+@pytest.fixture
+def segment_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("TTS_SEGMENT_PREFETCH", "1")
+    service = object.__new__(TTSSegmentService)
+    cache = TTSCache(cache_dir=str(tmp_path), enabled=True)
+    service._initialize(tts_service=FakeTTS(cache), storage_service=FakeStorage(), firestore_service=FakeFirestore())
+    yield service
+    service._executor.shutdown(wait=True)
+
+
+DOCUMENT = {"id": "doc-1", "user_id": "student-1"}
+NARRATIVE = "First paragraph here.\n\nSecond paragraph here.\n\nThird paragraph here."
+
+
+def test_long_paragraphs_split_at_sentence_boundaries(segment_service):
+    segment_service.max_segment_chars = 40
+    segments = segment_service.segment_text(
+        "One short sentence. Another short sentence. A third one here.\n\nNext paragraph."
+    )
+    assert [s["text"] for s in segments] == [
+        "One short sentence.", "Another short sentence.", "A third one here.", "Next paragraph."
+    ]
+    assert [s["paragraph_index"] for s in segments] == [0, 0, 0, 1]
+
+
+def test_segment_is_synthesized_once_then_served_from_cache(segment_service):
+    tts = segment_service.tts_service
+    segment = segment_service.get_segment(DOCUMENT, NARRATIVE, 0)
+    assert segment["segment_count"] == 3
+    assert segment["mime_type"] == "audio/mpeg"
+    # Measured from the MP3 frames, not the last timepoint
+    assert segment["duration_seconds"] == pytest.approx(2.112)
+
+    # The next segment was prefetched in the background
+    for future in list(segment_service._inflight.values()):
+        future.result()
+    assert tts.synthesized == [("First paragraph here.", "MP3"), ("Second paragraph here.", "MP3")]
+
+    segment_service.get_segment(DOCUMENT, NARRATIVE, 0)
+    assert segment_service.get_segment(DOCUMENT, NARRATIVE, 3) is None
+    assert len(tts.synthesized) == 2
+
+    key = tts.result_cache_key("First paragraph here.", "MP3")
+    assert f"student-1/tts_segments/doc-1/{key}.mp3" in segment_service.storage_service.files
+    assert ("doc-1", {f"tts_segment_durations.{key}": 2.112}) in segment_service.firestore_service.updates
+
+
+def test_segment_is_restored_from_gcs_before_synthesizing(segment_service):
+    tts = segment_service.tts_service
+    key = tts.result_cache_key("Second paragraph here.", "MP3")
+    storage = segment_service.storage_service
+    storage.files[f"student-1/tts_segments/doc-1/{key}.mp3"] = fake_mp3(1.2)
+    storage.files[f"student-1/tts_segments/doc-1/{key}.json"] = dumps_timepoints(
+        [{"mark_name": "Second", "time_seconds": 0.2}], compress=True
+    )
+    segment_service.prefetch_count = 0
+
+    segment = segment_service.get_segment(DOCUMENT, NARRATIVE, 1)
+    assert segment["audio_content"] == fake_mp3(1.2)
+    assert segment["duration_seconds"] == pytest.approx(1.2)
+    assert segment["timepoints"] == [{"mark_name": "Second", "time_seconds": 0.2}]
+    assert tts.synthesized == []
+
+
+def test_manifest_uses_measured_durations_when_known(segment_service):
+    segment_service.prefetch_count = 0
+    key = segment_service.tts_service.result_cache_key("Second paragraph here.", "MP3")
+    manifest = segment_service.get_manifest(dict(DOCUMENT, tts_segment_durations={key: 3.5}), NARRATIVE)
+    assert manifest["segment_count"] == 3
+    second = manifest["segments"][1]
+    assert second["duration_seconds"] == 3.5 and not second["duration_estimated"]
+    assert manifest["segments"][0]["duration_estimated"]
+
+
+def test_segment_finished_before_its_callback_is_registered(segment_service):
+    class InlineExecutor:
+        """Runs the task on submit, so the future is done before add_done_callback"""
+
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+        def shutdown(self, wait=True):
+            pass
+
+    segment_service._executor = InlineExecutor()
+    segment_service.prefetch_count = 0
+
+    segment = segment_service.get_segment(DOCUMENT, NARRATIVE, 0)
+    assert segment["index"] == 0
+    assert segment_service._inflight == {}
@@ -0,0 +1,275 @@
+"""
+Unit tests for TTSService chunked synthesis, using a fake Text-to-Speech client
+so no Google Cloud credentials are needed.
+"""
+
+import io
+import re
+import threading
+import time
+import types
+import wave
+
+import pytest
+
+from backend.services import tts_service as tts_module
+from backend.services.tts_service import TTSService
+from backend.services.tts_cache import TTSCache
+from backend.utils.audio_utils import WavFormat, parse_wav, pcm_duration_seconds, concat_pcm, wav_header
+
+
+def _make_wav(duration_ms: int, sample_rate: int = 24000) -> bytes:
+    """Build a mono 16-bit WAV file of the given duration."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b'\x00\x00' * (sample_rate * duration_ms // 1000))
+    return buffer.getvalue()
+
+
+class FakeTTSClient:
+    """Mimics TextToSpeechClient.synthesize_speech: one timepoint per mark, 100ms apart."""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def synthesize_speech(self, request):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        marks = re.findall(r'<mark name="([^"]+)"/>', request.input.ssml)
+        timepoints = [types.SimpleNamespace(mark_name=m, time_seconds=i * 0.1) for i, m in enumerate(marks)]
+        with self._lock:
+            self.active -= 1
+        return types.SimpleNamespace(audio_content=_make_wav(len(marks) * 100 + 100), timepoints=timepoints)
+
+
+@pytest.fixture
+def tts_service(monkeypatch):
+    """A TTSService bound to a fake client; MP3 export is stubbed since ffmpeg may be absent."""
+    service = object.__new__(TTSService)
+    service.client = FakeTTSClient()
+    service.cache = None
+    monkeypatch.setattr(tts_module.AudioSegment, "export",
+                        lambda self, out_f, format=None, **kwargs: out_f.write(b"ID3"))
+    return service
+
+
+def test_single_chunk_synthesis(tts_service):
+    result = tts_service.synthesize_text("Hello there, student.")
+
+    assert result is not None
+    assert tts_service.client.calls == 1
+    words = [tp["mark_name"] for tp in result["timepoints"] if tp["mark_name"].strip()]
+    assert words[:3] == ["Hello", "there,", "student."]
+
+
+def test_multi_chunk_synthesis_runs_concurrently_and_keeps_order(tts_service, monkeypatch):
+    monkeypatch.setattr(tts_module, "TTS_MAX_WORKERS_PER_CALL", 3)
+    paragraphs = [f"Paragraph {i} " + "word " * 150 for i in range(20)]
+    text = "\n\n".join(paragraphs)
+
+    result = tts_service.synthesize_text(text)
+
+    assert result is not None
+    assert tts_service.client.calls > 3
+    assert 1 < tts_service.client.max_active <= 3
+
+    times = [tp["time_seconds"] for tp in result["timepoints"]]
+    assert times == sorted(times)
+    words = [tp["mark_name"] for tp in result["timepoints"] if tp["mark_name"].strip()]
+    paragraph_numbers = [words[i + 1] for i, word in enumerate(words) if word == "Paragraph"]
+    assert paragraph_numbers == [str(i) for i in range(20)]
+
+
+def test_chunk_failure_returns_none(tts_service):
+    def failing_call(request):
+        raise RuntimeError("quota exceeded")
+
+    tts_service.client.synthesize_speech = failing_call
+    assert tts_service.synthesize_text("\n\n".join(["word " * 600] * 4)) is None
+
+
+def test_cache_hit_skips_api_call(tts_service, tmp_path):
+    tts_service.cache = TTSCache(cache_dir=str(tmp_path), enabled=True)
+
+    first = tts_service.synthesize_text("Is there anything else I can help you with?")
+    second = tts_service.synthesize_text("Is there anything else I can help you with?")
+
+    assert tts_service.client.calls == 1
+    assert second == first
+
+    tts_service.synthesize_text("Is there anything else I can help you with?", speaking_rate=1.25)
+    assert tts_service.client.calls == 2
+
+
+def test_cache_disk_tier_survives_restart_and_evicts(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), memory_max_bytes=1024, disk_max_bytes=2500, enabled=True)
+    for i in range(5):
+        cache.put(f"key{i}", {"audio_content": bytes([i]) * 1000, "timepoints": [{"mark_name": "hi", "time_seconds": 0.0}]})
+
+    restarted = TTSCache(cache_dir=str(tmp_path), memory_max_bytes=1024, disk_max_bytes=2500, enabled=True)
+    assert restarted.get("key0") is None
+    newest = restarted.get("key4")
+    assert newest["audio_content"] == bytes([4]) * 1000
+    assert newest["timepoints"] == [{"mark_name": "hi", "time_seconds": 0.0}]
+
+
+
+def test_cache_overwrite_is_counted_once(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), memory_max_bytes=1024, disk_max_bytes=10000, enabled=True)
+    for _ in range(3):
+        cache.put("same", {"audio_content": b"a" * 1000, "timepoints": []})
+
+    assert cache._disk_bytes == sum(size for _, size, _ in cache._scan_disk())
+
+
+def test_incremental_resynthesis_only_sends_changed_paragraphs(tts_service, tmp_path):
+    tts_service.cache = TTSCache(cache_dir=str(tmp_path), enabled=True)
+    paragraphs = ["The boy felt upset about the game.", "He talked to his coach.", "They made a plan together."]
+
+    original = tts_service.synthesize_text("\n\n".join(paragraphs), incremental=True)
+    assert tts_service.client.calls == 3
+
+    paragraphs[0] = "The boy felt angry about the game."
+    edited = tts_service.synthesize_text("\n\n".join(paragraphs), incremental=True)
+    assert tts_service.client.calls == 4
+
+    words = [tp["mark_name"] for tp in edited["timepoints"] if tp["mark_name"].strip()]
+    assert "angry" in words and "upset" not in words
+    # Unchanged paragraphs keep their timing relative to the start of the text
+    assert [tp["time_seconds"] for tp in edited["timepoints"]] == [tp["time_seconds"] for tp in original["timepoints"]]
+
+
+def test_stream_yields_chunks_in_order_with_offset_timepoints(tts_service, monkeypatch):
+    monkeypatch.setattr(tts_module, "TTS_MAX_WORKERS_PER_CALL", 3)
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 150 for i in range(10))
+
+    streamed = list(tts_service.synthesize_text_stream(text))
+    combined = tts_service.synthesize_text(text)
+
+    assert len(streamed) > 1
+    assert [c["chunk_index"] for c in streamed] == list(range(len(streamed)))
+    assert all(c["chunk_count"] == len(streamed) for c in streamed)
+    for previous, current in zip(streamed, streamed[1:]):
+        assert current["offset_seconds"] == pytest.approx(previous["offset_seconds"] + previous["duration_seconds"])
+    assert [tp for c in streamed for tp in c["timepoints"]] == combined["timepoints"]
+
+
+def test_wav_parsing_and_pcm_stitching_round_trip():
+    first, second = _make_wav(300), _make_wav(200)
+    first_format, first_pcm = parse_wav(first)
+    _, second_pcm = parse_wav(second)
+
+    assert first_format == WavFormat(sample_rate=24000, channels=1, sample_width=2)
+    assert pcm_duration_seconds(len(first_pcm), first_format) == pytest.approx(0.3)
+
+    combined = concat_pcm([first_pcm, second_pcm], len(first_pcm) + len(second_pcm))
+    with wave.open(io.BytesIO(wav_header(len(combined), first_format) + bytes(combined))) as wav_file:
+        assert wav_file.getframerate() == 24000
+        assert wav_file.getnframes() == 24000 * 500 // 1000
+
+
+def test_output_encoding_is_native_for_single_chunk_and_encoded_once_otherwise(tts_service, monkeypatch):
+    requested_encodings = []
+    synthesize = tts_service.client.synthesize_speech
+
+    def recording_call(request):
+        requested_encodings.append(request.audio_config.audio_encoding)
+        return synthesize(request)
+
+    exports = []
+    tts_service.client.synthesize_speech = recording_call
+    monkeypatch.setattr(tts_module.AudioSegment, "export",
+                        lambda self, out_f, **kwargs: exports.append(kwargs) or out_f.write(b"OggS"))
+
+    short = tts_service.synthesize_text("Hello there.", audio_encoding="ogg_opus")
+    assert requested_encodings == [tts_module.texttospeech.AudioEncoding.OGG_OPUS]
+    assert short["mime_type"] == "audio/ogg" and exports == []
+
+    long_text = "\n\n".join("word " * 400 for _ in range(3))
+    result = tts_service.synthesize_text(long_text, audio_encoding="OGG_OPUS", bitrate_kbps=24)
+    assert set(requested_encodings[1:]) == {tts_module.texttospeech.AudioEncoding.LINEAR16}
+    assert exports == [{"format": "ogg", "codec": "libopus", "bitrate": "24k"}]
+    assert result["audio_content"] == b"OggS"
+
+    assert tts_service.synthesize_text("Hello there.", audio_encoding="FLAC") is None
+
+
+def test_word_only_marks_skip_plain_whitespace(tts_service, monkeypatch):
+    text = "Plants need light.\nAnd water."
+
+    monkeypatch.setattr(tts_module, "TTS_WORD_MARKS_ONLY", False)
+    all_marks = [tp["mark_name"] for tp in tts_service.synthesize_text(text)["timepoints"]]
+    monkeypatch.setattr(tts_module, "TTS_WORD_MARKS_ONLY", True)
+    word_marks = [tp["mark_name"] for tp in tts_service.synthesize_text(text)["timepoints"]]
+
+    assert " " in all_marks and " " not in word_marks
+    assert [m for m in all_marks if m != " "] == word_marks
+
+
+@pytest.mark.parametrize("word_marks_only", [True, False])
+def test_chunker_budgets_on_generated_ssml_bytes(tts_service, monkeypatch, word_marks_only):
+    monkeypatch.setattr(tts_module, "TTS_WORD_MARKS_ONLY", word_marks_only)
+    paragraphs = [
+        " ".join(f"Sentence {p}.{s} has some résumé words in it." for s in range(1 + p % 7))
+        for p in range(60)
+    ]
+    paragraphs.append("One enormous run-on paragraph " * 400 + "x" * 6000)
+    text = "\n\n".join(paragraphs)
+
+    chunks = tts_service._chunk_text(text)
+
+    sizes = [len(tts_service._build_ssml_and_map(chunk)[0].encode("utf-8")) for chunk in chunks]
+    assert sizes == [tts_service._ssml_size(chunk) for chunk in chunks]
+    assert max(sizes) <= tts_module.TTS_MAX_SSML_BYTES
+    assert "".join(chunks).replace("\n", "").replace(" ", "") == text.replace("\n", "").replace(" ", "")
+    # Packed greedily: the next paragraph never would have fit in the previous chunk
+    paragraph_chunks = tts_service._chunk_text("\n\n".join(paragraphs[:-1]))
+    for chunk, next_chunk in zip(paragraph_chunks, paragraph_chunks[1:]):
+        next_paragraph = next_chunk.split("\n\n")[0]
+        assert tts_service._ssml_size(chunk + "\n\n" + next_paragraph) > tts_module.TTS_MAX_SSML_BYTES
+
+
+def test_voice_list_is_cached_in_memory_and_on_disk(tts_service, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    calls = []
+
+    def list_voices(language_code=None):
+        calls.append(language_code)
+        voice = types.SimpleNamespace(name="en-US-Journey-F", ssml_gender=2,
+                                      natural_sample_rate_hertz=24000, language_codes=["en-US"])
+        return types.SimpleNamespace(voices=[voice])
+
+    tts_service.client.list_voices = list_voices
+    tts_service._voice_cache, tts_service._voice_cache_lock, tts_service._voice_refreshing = {}, threading.Lock(), set()
+
+    voices = tts_service.get_available_voices("en-US")
+    assert voices[0]["name"] == "en-US-Journey-F" and voices[0]["gender"] == "FEMALE"
+    assert tts_service.get_available_voices("en-US") == voices
+    assert calls == ["en-US"]
+
+    # A fresh process starts from the disk snapshot instead of the API
+    tts_service._voice_cache = {}
+    assert tts_service.get_available_voices("en-US") == voices
+    assert calls == ["en-US"]
+
+    # Stale entries are served immediately and refreshed in the background
+    monkeypatch.setattr(tts_module, "TTS_VOICE_CACHE_TTL_SECONDS", -1)
+    assert tts_service.get_available_voices("en-US") == voices
+    for _ in range(100):
+        if len(calls) == 2 and not tts_service._voice_refreshing:
+            break
+        time.sleep(0.01)
+    assert calls == ["en-US", "en-US"]
+
+    with pytest.raises(ValueError):
+        tts_service.get_available_voices("../etc")
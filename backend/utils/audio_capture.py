@@ -0,0 +1,109 @@
+"""
+Opt-in sampling capture of audio sent to Speech-to-Text, for debugging recognition issues.
+
+Disabled unless STT_DEBUG_CAPTURE_RATE is above 0. A sampled recording is handed to a
+single background writer thread, so request threads never wait on disk. Files go to a
+ring directory (STT_DEBUG_CAPTURE_DIR, default DATA_DIR/debug_audio) that is kept under
+STT_DEBUG_CAPTURE_MAX_BYTES by deleting the oldest captures first.
+"""
+import os
+import time
+import uuid
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from backend.utils.data_dir import get_data_dir
+
+CAPTURE_PREFIX = 'stt_capture_'
+
+
+class AudioCapture:
+    """Samples audio payloads to a size-capped directory on a background thread."""
+
+    # Captures waiting for the writer beyond this are dropped rather than queued
+    MAX_PENDING_WRITES = 8
+
+    def __init__(self, sample_rate: Optional[float] = None, capture_dir: Optional[str] = None,
+                 max_bytes: Optional[int] = None):
+        rate = sample_rate if sample_rate is not None else float(os.getenv('STT_DEBUG_CAPTURE_RATE', 0))
+        self.sample_rate = min(max(rate, 0.0), 1.0)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('STT_DEBUG_CAPTURE_MAX_BYTES', 50 * 1024 * 1024))
+        self.capture_dir = capture_dir or os.getenv('STT_DEBUG_CAPTURE_DIR')
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            self.capture_dir = self.capture_dir or get_data_dir('debug_audio')
+            os.makedirs(self.capture_dir, exist_ok=True)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audio-capture')
+            logging.info(f"STT debug audio capture enabled: rate={self.sample_rate}, dir={self.capture_dir}, cap={self.max_bytes} bytes")
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and self.max_bytes > 0
+
+    def maybe_capture(self, audio_bytes: bytes, extension: str = 'raw') -> bool:
+        """
+        Queue audio for capture if this call is sampled.
+
+        Returns:
+            True if the audio was queued for writing
+        """
+        if not self.enabled or not audio_bytes or random.random() >= self.sample_rate:
+            return False
+        if len(audio_bytes) > self.max_bytes:
+            return False
+        with self._lock:
+            if self._pending >= self.MAX_PENDING_WRITES:
+                logging.debug("STT debug capture: writer busy, dropping sample")
+                return False
+            self._pending += 1
+        self._executor.submit(self._write, bytes(audio_bytes), extension)
+        return True
+
+    def _write(self, audio_bytes: bytes, extension: str) -> None:
+        try:
+            # Timestamp first so names sort oldest-first; the suffix keeps them unique across workers
+            filename = f"{CAPTURE_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}.{extension}"
+            path = os.path.join(self.capture_dir, filename)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(audio_bytes)
+            os.replace(tmp_path, path)
+            logging.info(f"STT debug capture: saved {len(audio_bytes)} bytes to {path}")
+            self._evict_oldest()
+        except OSError as e:
+            logging.error(f"STT debug capture: failed to save audio: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _evict_oldest(self) -> None:
+        """Delete the oldest captures until the directory is back under max_bytes."""
+        captures = []
+        for name in os.listdir(self.capture_dir):
+            if not name.startswith(CAPTURE_PREFIX) or name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.capture_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            captures.append((stat.st_mtime_ns, name, stat.st_size, path))
+        total = sum(size for _, _, size, _ in captures)
+        for _, _, size, path in sorted(captures):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for queued captures to be written (used by tests and shutdown)."""
+        if self._executor:
+            self._executor.submit(lambda: None).result(timeout)
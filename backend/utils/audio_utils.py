@@ -0,0 +1,294 @@
+"""
+Low-level audio helpers for the AI Tutor application.
+
+Works on raw LINEAR16 WAV bytes directly (header parsing, PCM slicing, stitching)
+so callers can avoid decoding whole files into pydub AudioSegments.
+"""
+import struct
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+
+class WavFormat(NamedTuple):
+    """PCM layout of a WAV file."""
+    sample_rate: int
+    channels: int
+    sample_width: int  # bytes per sample
+
+    @property
+    def frame_width(self) -> int:
+        return self.channels * self.sample_width
+
+
+def parse_wav(data: bytes) -> Tuple[WavFormat, memoryview]:
+    """
+    Parses a RIFF/WAVE header and returns the PCM format and a zero-copy view of the samples.
+
+    Args:
+        data: Complete WAV file bytes (as returned by the TTS API for LINEAR16)
+
+    Returns:
+        Tuple of (WavFormat, memoryview over the 'data' chunk)
+
+    Raises:
+        ValueError: If the bytes are not an uncompressed PCM WAV file
+    """
+    view = memoryview(data)
+    if len(view) < 12 or bytes(view[0:4]) != b'RIFF' or bytes(view[8:12]) != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+
+    wav_format = None
+    position = 12
+    while position + 8 <= len(view):
+        chunk_id = bytes(view[position:position + 4])
+        chunk_size = struct.unpack_from('<I', view, position + 4)[0]
+        body_start = position + 8
+        if chunk_id == b'fmt ':
+            audio_format, channels, sample_rate = struct.unpack_from('<HHI', view, body_start)
+            bits_per_sample = struct.unpack_from('<H', view, body_start + 14)[0]
+            # 0xFFFE is WAVE_FORMAT_EXTENSIBLE, still integer PCM for LINEAR16
+            if audio_format not in (1, 0xFFFE):
+                raise ValueError(f"Unsupported WAV audio format {audio_format}; expected PCM")
+            wav_format = WavFormat(sample_rate, channels, bits_per_sample // 8)
+        elif chunk_id == b'data':
+            if wav_format is None:
+                raise ValueError("WAV 'data' chunk precedes 'fmt ' chunk")
+            # Streamed WAVs may carry a placeholder size; clamp to what we actually have
+            data_end = min(body_start + chunk_size, len(view))
+            data_end -= (data_end - body_start) % wav_format.frame_width
+            return wav_format, view[body_start:data_end]
+        # Chunks are word-aligned
+        position = body_start + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no 'data' chunk")
+
+
+def pcm_duration_seconds(pcm_length: int, wav_format: WavFormat) -> float:
+    """Exact duration of a PCM buffer, computed from its sample count."""
+    return pcm_length / wav_format.frame_width / wav_format.sample_rate
+
+
+def concat_pcm(segments: Iterable[memoryview], total_length: int) -> bytearray:
+    """
+    Copies PCM segments back to back into a single preallocated buffer.
+
+    Args:
+        segments: PCM views to join, in order
+        total_length: Sum of the segment lengths in bytes
+
+    Returns:
+        bytearray of exactly total_length bytes
+    """
+    buffer = bytearray(total_length)
+    target = memoryview(buffer)
+    position = 0
+    for segment in segments:
+        target[position:position + len(segment)] = segment
+        position += len(segment)
+    if position != total_length:
+        raise ValueError(f"PCM segments total {position} bytes, expected {total_length}")
+    return buffer
+
+
+def wav_header(pcm_length: int, wav_format: WavFormat) -> bytes:
+    """Builds a 44-byte canonical PCM WAV header for pcm_length bytes of samples."""
+    byte_rate = wav_format.sample_rate * wav_format.frame_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + pcm_length, b'WAVE',
+        b'fmt ', 16, 1, wav_format.channels, wav_format.sample_rate, byte_rate,
+        wav_format.frame_width, wav_format.sample_width * 8,
+        b'data', pcm_length
+    )
+
+
+# Sample rates the Speech-to-Text API accepts for OGG_OPUS / WEBM_OPUS
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def opus_stream_info(data: bytes, search_bytes: int = 4096) -> Optional[Tuple[int, int]]:
+    """
+    Reads the sample rate and channel count from the OpusHead header of an Ogg or
+    WebM Opus recording (browsers put it within the first few hundred bytes).
+
+    Returns:
+        Tuple of (sample_rate, channels), or None if no OpusHead was found. A missing or
+        non-standard input rate is reported as 48000, Opus's native decode rate.
+    """
+    position = bytes(data[:search_bytes]).find(b'OpusHead')
+    if position < 0 or position + 16 > len(data):
+        return None
+    channels = data[position + 9]
+    input_sample_rate = struct.unpack_from('<I', data, position + 12)[0]
+    sample_rate = input_sample_rate if input_sample_rate in OPUS_SAMPLE_RATES else 48000
+    return sample_rate, channels
+
+
+# Element ID of a WebM (Matroska) Cluster, the first element that carries audio
+_WEBM_CLUSTER_ID = b'\x1f\x43\xb6\x75'
+
+
+def container_header_length(data: bytes) -> int:
+    """
+    Length of the container header at the start of a WebM or Ogg Opus recording: the
+    bytes a decoder needs before any audio. For WebM that is everything before the first
+    Cluster; for Ogg, the leading pages with granule position 0 (OpusHead and OpusTags).
+
+    Returns:
+        Header length, or len(data) if data holds no audio after the header
+    """
+    if bytes(data[:4]) == b'OggS':
+        position = 0
+        while position + 27 <= len(data) and bytes(data[position:position + 4]) == b'OggS':
+            if struct.unpack_from('<q', data, position + 6)[0] != 0:
+                return position
+            segment_count = data[position + 26]
+            if position + 27 + segment_count > len(data):
+                break
+            position += 27 + segment_count + sum(data[position + 27:position + 27 + segment_count])
+        return len(data)
+    cluster = bytes(data).find(_WEBM_CLUSTER_ID)
+    return cluster if cluster >= 0 else len(data)
+
+
+# EBML element IDs (marker bits kept) of the WebM elements on the way to Opus packets
+_WEBM_MASTER_IDS = (0x18538067, 0x1F43B675, 0xA0)  # Segment, Cluster, BlockGroup
+_WEBM_BLOCK_IDS = (0xA3, 0xA1)  # SimpleBlock, Block
+
+
+def _ebml_vint(data: bytes, position: int, keep_marker: bool) -> Tuple[int, int]:
+    """Reads an EBML variable-length integer; returns (value, length in bytes)"""
+    first = data[position]
+    length = 9 - first.bit_length()
+    if first == 0 or position + length > len(data):
+        raise ValueError(f"Invalid EBML integer at byte {position}")
+    value = first if keep_marker else first & ((1 << (8 - length)) - 1)
+    for byte in data[position + 1:position + length]:
+        value = (value << 8) | byte
+    return value, length
+
+
+def _webm_opus_frames(data: bytes) -> List[bytes]:
+    frames = []
+    position = 0
+    while position < len(data):
+        element_id, id_length = _ebml_vint(data, position, keep_marker=True)
+        size, size_length = _ebml_vint(data, position + id_length, keep_marker=False)
+        body = position + id_length + size_length
+        if element_id in _WEBM_MASTER_IDS:
+            # Browsers write Segment and Cluster with unknown size; their children follow directly
+            position = body
+            continue
+        if size == (1 << (7 * size_length)) - 1:
+            raise ValueError(f"Unknown-size element {element_id:#x}")
+        if body + size > len(data):
+            break
+        if element_id in _WEBM_BLOCK_IDS:
+            track_length = _ebml_vint(data, body, keep_marker=False)[1]
+            if data[body + track_length + 2] & 0x06:
+                raise ValueError("Laced WebM blocks are not supported")
+            frames.append(data[body + track_length + 3:body + size])
+        position = body + size
+    return frames
+
+
+def _ogg_opus_packets(data: bytes) -> List[bytes]:
+    packets = []
+    current = bytearray()
+    position = 0
+    while position + 27 <= len(data):
+        if bytes(data[position:position + 4]) != b'OggS':
+            raise ValueError(f"Invalid Ogg page at byte {position}")
+        segment_count = data[position + 26]
+        offset = position + 27 + segment_count
+        for lacing_value in data[position + 27:offset]:
+            current += data[offset:offset + lacing_value]
+            offset += lacing_value
+            if lacing_value < 255:
+                packets.append(bytes(current))
+                current = bytearray()
+        position = offset
+    return [packet for packet in packets if not packet.startswith((b'OpusHead', b'OpusTags'))]
+
+
+def _opus_packet_seconds(packet: bytes) -> float:
+    """Duration of an Opus packet, from its TOC byte (RFC 6716, section 3.1)"""
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame_ms = (10, 20, 40, 60)[config & 3]  # SILK
+    elif config < 16:
+        frame_ms = (10, 20)[config & 1]  # Hybrid
+    else:
+        frame_ms = (2.5, 5, 10, 20)[config & 3]  # CELT
+    code = toc & 3
+    frame_count = 1 if code == 0 else 2 if code < 3 else (packet[1] & 0x3F if len(packet) > 1 else 0)
+    return frame_ms * frame_count / 1000
+
+
+def opus_packets(data: bytes) -> Optional[List[Tuple[int, float]]]:
+    """
+    Lists the Opus packets of an Ogg or WebM recording without decoding them.
+
+    Returns:
+        (size in bytes, duration in seconds) per packet, or None if data is not a
+        readable Ogg/WebM Opus stream
+    """
+    try:
+        if bytes(data[:4]) == b'OggS':
+            packets = _ogg_opus_packets(data)
+        elif bytes(data[:4]) == b'\x1a\x45\xdf\xa3':
+            packets = _webm_opus_frames(data)
+        else:
+            return None
+    except (ValueError, IndexError):
+        return None
+    return [(len(packet), _opus_packet_seconds(packet)) for packet in packets if packet] or None
+
+
+# MPEG audio Layer III bitrates in kbps by bitrate index, for MPEG-1 and for MPEG-2/2.5
+_MP3_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MP3_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+# Sample rates by version bits (3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5) and sample rate index
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def mp3_duration_seconds(data: bytes) -> float:
+    """
+    Duration of an MP3 file, computed by walking its Layer III frame headers.
+
+    Skips a leading ID3v2 tag and a Xing/Info header frame. Nothing is decoded, so this
+    is cheap even for long files.
+
+    Returns:
+        Total duration in seconds (0.0 if no MP3 frames were found)
+    """
+    view = memoryview(data)
+    position = 0
+    if len(view) >= 10 and bytes(view[0:3]) == b'ID3':
+        tag_size = (view[6] << 21) | (view[7] << 14) | (view[8] << 7) | view[9]
+        position = 10 + tag_size + (10 if view[5] & 0x10 else 0)
+
+    total_seconds = 0.0
+    first_frame = True
+    while position + 4 <= len(view):
+        b1, b2 = view[position + 1], view[position + 2]
+        if view[position] != 0xFF or (b1 & 0xE0) != 0xE0:
+            position += 1
+            continue
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, sample_rate_index = b2 >> 4, (b2 >> 2) & 3
+        # version 1 is reserved; layer bits 01 mean Layer III
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+            position += 1
+            continue
+        sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+        bitrates = _MP3_BITRATES_V1 if version == 3 else _MP3_BITRATES_V2
+        samples_per_frame = 1152 if version == 3 else 576
+        frame_length = (samples_per_frame // 8) * bitrates[bitrate_index] * 1000 // sample_rate + ((b2 >> 1) & 1)
+        # An encoder's Xing/Info frame holds metadata, not audio
+        is_info_frame = first_frame and any(tag in bytes(view[position:position + frame_length]) for tag in (b'Xing', b'Info'))
+        if not is_info_frame:
+            total_seconds += samples_per_frame / sample_rate
+        first_frame = False
+        position += frame_length
+    return total_seconds
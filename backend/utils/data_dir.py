@@ -0,0 +1,29 @@
+"""
+Location of the persistent data directory (SQLite checkpoints, caches, job queues).
+"""
+import os
+
+
+def get_data_dir(*subdirs: str) -> str:
+    """
+    Resolve the data directory and make sure it exists.
+
+    Priority: DATA_DIR env var -> Docker volume (/app/data) -> local fallback (backend/data).
+
+    Args:
+        *subdirs: Optional path components to append (e.g. 'tts_cache')
+
+    Returns:
+        Absolute path of the (sub)directory
+    """
+    if os.getenv('DATA_DIR'):
+        base_dir = os.getenv('DATA_DIR')
+    elif os.path.exists('/app/data'):
+        base_dir = '/app/data'
+    else:
+        # Local fallback: backend/data
+        base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+    path = os.path.join(base_dir, *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,87 @@
+"""
+Progressive publishing of a narrative that the LLM is still generating.
+
+The DUA node streams Gemini output and feeds the growing text to a
+PartialNarrativePublisher, which hands the finished paragraphs to a writer (the
+document's dua_narrative_partial field) at most once per flush interval. Only whole
+paragraphs are published, so the read-aloud segments built from the partial text
+(one per paragraph) stay stable as more text arrives. When generated text is
+discarded (a retried page range), rewind() republishes from scratch.
+"""
+import time
+import logging
+import threading
+from typing import Callable
+
+
+class PartialNarrativePublisher:
+    """Throttled writer for the completed paragraphs of a growing narrative."""
+
+    def __init__(self, write: Callable[[str], None], min_interval_seconds: float = 2.0):
+        """
+        Args:
+            write: Persists the published prefix; exceptions are logged, not raised
+            min_interval_seconds: Minimum time between two writes
+        """
+        self._write = write
+        self.min_interval_seconds = min_interval_seconds
+        self._published_length = 0
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def published_length(self) -> int:
+        return self._published_length
+
+    @staticmethod
+    def _complete_paragraphs(text: str) -> str:
+        # Everything before the last paragraph break is complete
+        cut = text.rfind("\n\n")
+        return text[:cut].rstrip() if cut > 0 else ""
+
+    def update(self, text: str) -> bool:
+        """
+        Offer the narrative generated so far.
+
+        Returns:
+            True if a new prefix was written
+        """
+        prefix = self._complete_paragraphs(text)
+        if not prefix:
+            return False
+        with self._lock:
+            if len(prefix) <= self._published_length:
+                return False
+            if time.monotonic() - self._last_write < self.min_interval_seconds:
+                return False
+            self._last_write = time.monotonic()
+            try:
+                self._write(prefix)
+            except Exception as e:
+                logging.warning(f"Failed to publish partial narrative: {e}")
+                return False
+            self._published_length = len(prefix)
+            return True
+
+    def rewind(self, text: str) -> bool:
+        """
+        Replace the published prefix after part of it was discarded.
+
+        Writes the complete paragraphs of text immediately, even when shorter than
+        what was published (an empty string clears the field), and continues from there.
+
+        Returns:
+            True if the prefix was rewritten
+        """
+        prefix = self._complete_paragraphs(text)
+        with self._lock:
+            # If this write fails, the next update overwrites the stale text
+            self._published_length = 0
+            self._last_write = time.monotonic()
+            try:
+                self._write(prefix)
+            except Exception as e:
+                logging.warning(f"Failed to rewind partial narrative: {e}")
+                return False
+            self._published_length = len(prefix)
+            return True
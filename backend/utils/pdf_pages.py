@@ -0,0 +1,112 @@
+"""
+Page-range helpers for sending large PDFs to an LLM piece by piece.
+
+split_pdf cuts a PDF into standalone PDFs of a few pages each. map_page_ranges runs a
+worker over those ranges with bounded concurrency, retries each failed range on its
+own and returns the results in page order, so a long document costs roughly as much
+wall time as its slowest range instead of one huge all-or-nothing request.
+"""
+import io
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class PageRange(NamedTuple):
+    """A contiguous run of pages, 1-based and inclusive, as a standalone PDF."""
+    start_page: int
+    end_page: int
+    pdf_bytes: bytes
+
+
+class PageRangeError(Exception):
+    """A page range still failed after all of its attempts."""
+
+    def __init__(self, page_range: PageRange, cause: Exception):
+        super().__init__(f"Pages {page_range.start_page}-{page_range.end_page} failed: {cause}")
+        self.page_range = page_range
+        self.cause = cause
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    """Number of pages in a PDF."""
+    from PyPDF2 import PdfReader
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+
+def split_pdf(pdf_bytes: bytes, pages_per_range: int) -> List[PageRange]:
+    """
+    Splits a PDF into standalone PDFs of at most pages_per_range pages.
+
+    Raises:
+        ValueError: If pages_per_range is not positive
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
+    if pages_per_range < 1:
+        raise ValueError("pages_per_range must be at least 1")
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    total_pages = len(reader.pages)
+    ranges = []
+    for start in range(0, total_pages, pages_per_range):
+        end = min(start + pages_per_range, total_pages)
+        writer = PdfWriter()
+        for index in range(start, end):
+            writer.add_page(reader.pages[index])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        ranges.append(PageRange(start + 1, end, buffer.getvalue()))
+    return ranges
+
+
+def map_page_ranges(
+    ranges: List[PageRange],
+    worker: Callable[[PageRange], T],
+    max_concurrency: int = 4,
+    max_attempts: int = 3,
+    retry_backoff_seconds: float = 2.0,
+    log_prefix: Optional[str] = None
+) -> List[T]:
+    """
+    Runs worker over every page range concurrently and returns the results in page order.
+
+    Args:
+        ranges: Page ranges in document order
+        worker: Called once per attempt; raising counts as a failed attempt
+        max_concurrency: Upper bound on ranges in flight at once
+        max_attempts: Attempts per range before giving up
+        retry_backoff_seconds: Delay before a retry, multiplied by the attempt number
+        log_prefix: Prepended to log lines (e.g. the document ID)
+
+    Raises:
+        PageRangeError: For the first range (in page order) that failed every attempt
+    """
+    prefix = f"[{log_prefix}] " if log_prefix else ""
+
+    def run_with_retries(page_range: PageRange) -> T:
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return worker(page_range)
+            except Exception as e:
+                if attempt >= max_attempts:
+                    raise PageRangeError(page_range, e) from e
+                delay = retry_backoff_seconds * attempt
+                logging.warning(f"{prefix}Pages {page_range.start_page}-{page_range.end_page} failed "
+                                f"(attempt {attempt}/{max_attempts}): {e}; retrying in {delay}s")
+                time.sleep(delay)
+
+    if not ranges:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(ranges))),
+                            thread_name_prefix='pdf-page-range') as executor:
+        futures = [executor.submit(run_with_retries, page_range) for page_range in ranges]
+        try:
+            return [future.result() for future in futures]
+        except PageRangeError:
+            # The document cannot be completed; don't start ranges that are still waiting
+            for future in futures:
+                future.cancel()
+            raise
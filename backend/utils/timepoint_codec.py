@@ -0,0 +1,102 @@
+"""
+Compact encoding for TTS word timepoints.
+
+synthesize_text produces one {"mark_name", "time_seconds"} dict per marked token,
+where mark_name is the token's text. With TTS_WORD_MARKS_ONLY (the default) only
+words and whitespace containing a newline are marked; otherwise every whitespace run
+is too. Paragraph ends add a "PARAGRAPH_BREAK" timepoint. For a long narrative that
+is tens of thousands of dicts, mostly repeating the same few thousand words, so
+dumps_timepoints writes them as parallel arrays:
+
+    {
+        "v": 1,
+        "tokens": ["The", "cell", ...],   # distinct mark names, in first-occurrence order
+        "token_ids": [0, 1, ...],         # index into tokens for each timepoint
+        "delta_ms": [120, 310, ...]       # milliseconds since the previous timepoint (first: since 0)
+    }
+
+Times are rounded to whole milliseconds before delta-encoding, so decoding never drifts.
+loads_timepoints also accepts gzip-compressed payloads and the legacy list-of-dicts JSON.
+"""
+import gzip
+import json
+from typing import Any, Dict, List, Union
+
+COMPACT_TIMEPOINTS_VERSION = 1
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def encode_timepoints(timepoints: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Converts a list of timepoint dicts to the compact parallel-array form.
+
+    Args:
+        timepoints: List of {"mark_name": str, "time_seconds": float}
+
+    Returns:
+        Compact timepoints dict (see module docstring)
+    """
+    token_index: Dict[str, int] = {}
+    tokens: List[str] = []
+    token_ids: List[int] = []
+    delta_ms: List[int] = []
+    previous_ms = 0
+    for tp in timepoints:
+        mark_name = tp["mark_name"]
+        token_id = token_index.get(mark_name)
+        if token_id is None:
+            token_id = token_index[mark_name] = len(tokens)
+            tokens.append(mark_name)
+        token_ids.append(token_id)
+        time_ms = int(round(tp["time_seconds"] * 1000))
+        delta_ms.append(time_ms - previous_ms)
+        previous_ms = time_ms
+    return {
+        "v": COMPACT_TIMEPOINTS_VERSION,
+        "tokens": tokens,
+        "token_ids": token_ids,
+        "delta_ms": delta_ms,
+    }
+
+
+def decode_timepoints(compact: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expands compact timepoints back into the list-of-dicts form.
+
+    Raises:
+        ValueError: If the version is unknown or the arrays do not line up
+    """
+    if compact.get("v") != COMPACT_TIMEPOINTS_VERSION:
+        raise ValueError(f"Unsupported compact timepoints version: {compact.get('v')}")
+    tokens, token_ids, delta_ms = compact["tokens"], compact["token_ids"], compact["delta_ms"]
+    if len(token_ids) != len(delta_ms):
+        raise ValueError("Compact timepoints arrays have different lengths")
+
+    timepoints = []
+    time_ms = 0
+    for token_id, delta in zip(token_ids, delta_ms):
+        time_ms += delta
+        timepoints.append({"mark_name": tokens[token_id], "time_seconds": time_ms / 1000.0})
+    return timepoints
+
+
+def dumps_timepoints(timepoints: List[Dict[str, Any]], compress: bool = False) -> bytes:
+    """
+    Serializes timepoints in compact form as JSON bytes, optionally gzip-compressed.
+    """
+    data = json.dumps(encode_timepoints(timepoints), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return gzip.compress(data) if compress else data
+
+
+def loads_timepoints(data: Union[bytes, str]) -> List[Dict[str, Any]]:
+    """
+    Parses timepoints written by dumps_timepoints, or legacy list-of-dicts JSON.
+    Gzip-compressed input is detected automatically.
+    """
+    if isinstance(data, bytes) and data[:2] == _GZIP_MAGIC:
+        data = gzip.decompress(data)
+    parsed = json.loads(data)
+    if isinstance(parsed, list):
+        return parsed
+    return decode_timepoints(parsed)
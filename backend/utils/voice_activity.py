@@ -0,0 +1,162 @@
+"""
+Energy-based voice activity detection for recordings sent to Speech-to-Text.
+
+A recording is scored in short frames by RMS level (dBFS). A frame counts as voiced
+when it clears an absolute floor and sits a margin above the recording's own noise
+floor (a low percentile of its frame levels), so both quiet and noisy rooms work
+without per-microphone tuning. Callers trim everything before the first and after
+the last voiced frame, keeping some padding so word onsets and tails are not clipped.
+
+For Opus recordings, estimate_edge_silence_seconds gives a decode-free estimate from
+packet sizes, so recordings with little silence are not decoded at all.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.audio_utils import WavFormat, parse_wav, wav_header
+
+
+class SpeechBounds(NamedTuple):
+    """Sample range of a recording that contains speech, padding included."""
+    start_sample: int
+    end_sample: int
+    voiced_seconds: float
+
+
+class TrimResult(NamedTuple):
+    """Outcome of trim_wav; audio_bytes is None when the recording has no speech."""
+    audio_bytes: Optional[bytes]
+    original_seconds: float
+    speech_seconds: float
+
+
+def pcm_to_mono(pcm, wav_format: WavFormat) -> np.ndarray:
+    """
+    Converts interleaved integer PCM to mono float32 samples in [-1, 1].
+
+    Raises:
+        ValueError: If the sample width is not 8, 16 or 32 bits
+    """
+    if wav_format.sample_width == 2:
+        samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+    elif wav_format.sample_width == 4:
+        samples = np.frombuffer(pcm, dtype='<i4').astype(np.float32) / 2147483648.0
+    elif wav_format.sample_width == 1:
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        raise ValueError(f"Unsupported PCM sample width {wav_format.sample_width}")
+    if wav_format.channels > 1:
+        samples = samples.reshape(-1, wav_format.channels).mean(axis=1)
+    return samples
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = 30,
+    floor_dbfs: float = -50.0,
+    margin_db: float = 12.0,
+    min_voiced_ms: int = 120,
+    padding_ms: int = 250
+) -> Optional[SpeechBounds]:
+    """
+    Finds the span of a mono recording that contains speech.
+
+    Args:
+        samples: Mono float samples in [-1, 1]
+        sample_rate: Samples per second
+        frame_ms: Analysis frame length
+        floor_dbfs: Frames quieter than this are never voiced
+        margin_db: How far above the noise floor a frame must be to count as voiced
+        min_voiced_ms: Less voiced audio than this in total is treated as no speech
+        padding_ms: Audio kept before the first and after the last voiced frame
+
+    Returns:
+        SpeechBounds, or None if the recording has no speech
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return None
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    levels = 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+    noise_floor = np.percentile(levels, 10)
+    # Capping at peak - margin keeps recordings that are speech from end to end voiced
+    threshold = max(floor_dbfs, min(noise_floor + margin_db, levels.max() - margin_db))
+    voiced = np.flatnonzero(levels > threshold)
+    if len(voiced) * frame_ms < min_voiced_ms:
+        return None
+
+    padding_frames = padding_ms // frame_ms
+    start = max(0, voiced[0] - padding_frames) * frame_length
+    end = min(len(samples), (voiced[-1] + 1 + padding_frames) * frame_length)
+    return SpeechBounds(int(start), int(end), len(voiced) * frame_ms / 1000.0)
+
+
+def trim_wav(data: bytes, **vad_options) -> TrimResult:
+    """
+    Trims leading and trailing silence from a PCM WAV recording.
+
+    Args:
+        data: Complete WAV file bytes
+        **vad_options: Passed through to detect_speech
+
+    Returns:
+        TrimResult with a new WAV (or the original bytes if nothing was trimmed)
+
+    Raises:
+        ValueError: If the bytes are not a PCM WAV file
+    """
+    wav_format, pcm = parse_wav(data)
+    samples = pcm_to_mono(pcm, wav_format)
+    original_seconds = len(samples) / wav_format.sample_rate
+    bounds = detect_speech(samples, wav_format.sample_rate, **vad_options)
+    if bounds is None:
+        return TrimResult(None, original_seconds, 0.0)
+    if bounds.start_sample == 0 and bounds.end_sample == len(samples):
+        return TrimResult(data, original_seconds, original_seconds)
+
+    trimmed = pcm[bounds.start_sample * wav_format.frame_width:bounds.end_sample * wav_format.frame_width]
+    speech_seconds = (bounds.end_sample - bounds.start_sample) / wav_format.sample_rate
+    return TrimResult(wav_header(len(trimmed), wav_format) + bytes(trimmed), original_seconds, speech_seconds)
+
+
+def estimate_edge_silence_seconds(
+    packets: List[Tuple[int, float]],
+    quiet_ratio: float = 0.5,
+    quiet_floor_bytes: int = 8
+) -> float:
+    """
+    Estimates leading plus trailing silence of an Opus recording from its packet sizes.
+
+    Opus is variable-bitrate, so silence encodes to much smaller packets than speech. A
+    packet counts as quiet when it is under quiet_ratio of the recording's typical speech
+    packet (90th percentile size), or under quiet_floor_bytes (digital silence).
+
+    Args:
+        packets: (size in bytes, duration in seconds) per packet, as from opus_packets
+
+    Returns:
+        Seconds of quiet packets at the start and end of the recording
+    """
+    if not packets:
+        return 0.0
+    sizes = sorted(size for size, _ in packets)
+    speech_size = sizes[min(len(sizes) - 1, int(len(sizes) * 0.9))]
+    quiet_below = max(quiet_floor_bytes, speech_size * quiet_ratio)
+
+    start = 0
+    leading = 0.0
+    while start < len(packets) and packets[start][0] < quiet_below:
+        leading += packets[start][1]
+        start += 1
+    end = len(packets) - 1
+    trailing = 0.0
+    while end >= start and packets[end][0] < quiet_below:
+        trailing += packets[end][1]
+        end -= 1
+    return leading + trailing
@@ -111,6 +111,13 @@ const useRealtimeStt = (): UseRealtimeSttReturn => {
 
       ws.onopen = () => {
         console.log('WebSocket connection established.');
+        // Handshake: tell the server what useAudioRecorder produces before any audio is sent
+        ws.send(JSON.stringify({
+          encoding: 'webm_opus',
+          sample_rate_hertz: 16000,
+          language_code: 'en-US',
+          interim_results: true,
+        }));
         setStatus('dictating');
         resolve();
       };
@@ -118,6 +125,16 @@ const useRealtimeStt = (): UseRealtimeSttReturn => {
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          if (data.error) {
+            console.error('STT stream error:', data.error);
+            setError(data.error);
+            return;
+          }
+          if (data.event) {
+            // Control messages ('ready', 'backpressure') carry no transcript
+            console.log('STT stream event:', data.event);
+            return;
+          }
           if (data.is_final) {
             setTranscript(prev => ({ final: prev.final + data.transcript + ' ', interim: '' }));
           } else {
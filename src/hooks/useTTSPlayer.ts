@@ -3,6 +3,7 @@ import { useState, useRef, useCallback, useEffect } from 'react';
 export type PlayerStatus = 'idle' | 'loading' | 'playing' | 'paused';
 
 import apiService from '../services/api';
+import { normalizeTimepoints } from '../utils/ttsUtils';
 
 type PlayOptions = {
   audioContent?: string;
@@ -10,6 +11,23 @@ type PlayOptions = {
   text?: string;
 };
 
+type Segment = {
+  audioUrl: string;
+  timepoints: any[]; // Shifted to document time
+  offset: number;
+  duration: number;
+};
+
+// Lazily synthesized read-aloud: one audio element per segment, played back to back
+type SegmentPlayback = {
+  documentId: string;
+  count: number;
+  partial: boolean; // The narrative is still being generated
+  index: number;
+  loaded: Segment[];
+  pending: Map<number, Promise<Segment>>;
+};
+
 export const useTTSPlayer = (documentId: string | null, fullText: string = '') => {
   const [status, setStatus] = useState<PlayerStatus>('idle');
   const [activeTimepoint, setActiveTimepoint] = useState<any | null>(null);
@@ -20,6 +38,7 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
   const seekToTimeRef = useRef<number | null>(null); // Ref to store pending seek time
   const lastHighlightedTimepointRef = useRef<any | null>(null);
   const isPlayingRef = useRef<boolean>(false); // Track actual playback state independent of React
+  const segmentPlaybackRef = useRef<SegmentPlayback | null>(null);
 
   const stopAudio = useCallback(() => {
     if (audioRef.current) {
@@ -27,6 +46,10 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
       if (audioRef.current.src) URL.revokeObjectURL(audioRef.current.src);
       audioRef.current = null;
     }
+    if (segmentPlaybackRef.current) {
+      segmentPlaybackRef.current.loaded.forEach(segment => URL.revokeObjectURL(segment.audioUrl));
+      segmentPlaybackRef.current = null;
+    }
     isPlayingRef.current = false;
     setStatus('idle');
     setActiveTimepoint(null);
@@ -35,6 +58,101 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
     lastHighlightedTimepointRef.current = null;
   }, []);
 
+  const highlightAt = useCallback((timepoints: any[], time: number) => {
+    let currentWordTimepoint = null;
+    for (let i = 0; i < timepoints.length; i++) {
+      const tp = timepoints[i];
+      if (time >= tp.time_seconds) {
+        currentWordTimepoint = tp;
+      } else {
+        break;
+      }
+    }
+
+    if (currentWordTimepoint && lastHighlightedTimepointRef.current?.mark_name !== currentWordTimepoint.mark_name) {
+      setActiveTimepoint(currentWordTimepoint);
+      lastHighlightedTimepointRef.current = currentWordTimepoint;
+    }
+  }, []);
+
+  const loadSegment = useCallback((playback: SegmentPlayback, index: number): Promise<Segment> => {
+    let pending = playback.pending.get(index);
+    if (!pending) {
+      pending = (async () => {
+        // A segment starts where the one before it ends, so offsets chain from measured durations
+        const previous = index > 0 ? await loadSegment(playback, index - 1) : null;
+        const data = await apiService.getTtsSegment(playback.documentId, index);
+        const audioBlob = await fetch(`data:${data.audio_mime_type};base64,${data.audio_content_base64}`).then(res => res.blob());
+        const offset = previous ? previous.offset + previous.duration : 0;
+        const segment: Segment = {
+          audioUrl: URL.createObjectURL(audioBlob),
+          timepoints: normalizeTimepoints(data.timepoints).map(tp => ({ ...tp, time_seconds: tp.time_seconds + offset })),
+          offset,
+          duration: data.duration_seconds,
+        };
+        if (segmentPlaybackRef.current !== playback) {
+          URL.revokeObjectURL(segment.audioUrl);
+          throw new Error('Segment playback was stopped');
+        }
+        playback.loaded[index] = segment;
+        // Segments resolve in order, so appending keeps the timepoints sorted
+        setWordTimepoints(prev => [...prev, ...segment.timepoints]);
+        return segment;
+      })();
+      pending.catch(() => playback.pending.delete(index));
+      playback.pending.set(index, pending);
+    }
+    return pending;
+  }, []);
+
+  const playSegment = useCallback(async (playback: SegmentPlayback, index: number, startAt: number = 0) => {
+    const segment = await loadSegment(playback, index);
+    if (segmentPlaybackRef.current !== playback) return;
+
+    if (audioRef.current) audioRef.current.pause();
+    const audio = new Audio(segment.audioUrl);
+    audioRef.current = audio;
+    playback.index = index;
+
+    audio.ontimeupdate = () => highlightAt(segment.timepoints, segment.offset + audio.currentTime);
+
+    audio.onended = async () => {
+      try {
+        if (index + 1 >= playback.count && playback.partial) {
+          // Pick up the paragraphs generated since playback started
+          const manifest = await apiService.getTtsSegmentManifest(playback.documentId);
+          playback.count = manifest.segment_count;
+          playback.partial = manifest.partial;
+        }
+        if (segmentPlaybackRef.current !== playback) return;
+        if (index + 1 < playback.count) {
+          await playSegment(playback, index + 1);
+        } else {
+          isPlayingRef.current = false;
+          stopAudio();
+        }
+      } catch (err) {
+        console.error('Error playing next segment:', err);
+        setError(err instanceof Error ? err.message : String(err));
+        stopAudio();
+      }
+    };
+
+    audio.onerror = (e) => {
+      console.error('Audio playback error:', e);
+      setError('Failed to play audio');
+      stopAudio();
+    };
+
+    audio.currentTime = startAt;
+    await audio.play();
+    isPlayingRef.current = true;
+    setStatus('playing');
+
+    // Fetch the next segment while this one plays
+    if (index + 1 < playback.count) loadSegment(playback, index + 1).catch(() => {});
+  }, [loadSegment, highlightAt, stopAudio]);
+
   const startPlayback = useCallback(async (options: PlayOptions = {}) => {
     setStatus('loading');
     setError(null);
@@ -43,8 +161,8 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
     const playFromUrls = async (audioUrl: string, timepointsUrl: string) => {
       const timepointsResponse = await fetch(timepointsUrl);
       if (!timepointsResponse.ok) throw new Error('Failed to fetch timepoints');
-      const timepoints = await timepointsResponse.json();
-      setWordTimepoints(timepoints || []);
+      const timepoints = normalizeTimepoints(await timepointsResponse.json());
+      setWordTimepoints(timepoints);
 
       const audio = new Audio(audioUrl);
       return { audio, timepoints };
@@ -76,6 +194,31 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
       return { audio, timepoints };
     };
 
+    const playFromSegments = async (docId: string) => {
+      let manifest;
+      try {
+        manifest = await apiService.getTtsSegmentManifest(docId);
+      } catch (e) {
+        console.warn(`TTS_DEBUG: No read-aloud segments for document ${docId}.`, e);
+        return false;
+      }
+      if (!manifest.segment_count) return false;
+
+      const playback: SegmentPlayback = {
+        documentId: docId,
+        count: manifest.segment_count,
+        partial: manifest.partial,
+        index: 0,
+        loaded: [],
+        pending: new Map(),
+      };
+      segmentPlaybackRef.current = playback;
+      setWordTimepoints([]);
+      seekToTimeRef.current = null;
+      await playSegment(playback, 0);
+      return true;
+    };
+
     try {
       let audio: HTMLAudioElement;
       let timepoints: any[];
@@ -93,7 +236,12 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
           timepoints = result.timepoints;
           console.log(`TTS_DEBUG: Successfully loaded pre-generated TTS assets.`);
         } catch (e) {
-          console.warn(`TTS_DEBUG: Could not fetch pre-generated assets for document ${documentId}. Falling back to on-demand synthesis.`, e);
+          console.warn(`TTS_DEBUG: Could not fetch pre-generated assets for document ${documentId}. Trying read-aloud segments.`, e);
+          if (await playFromSegments(documentId)) {
+            console.log(`TTS_DEBUG: Playing read-aloud segments.`);
+            return;
+          }
+          console.warn(`TTS_DEBUG: Falling back to on-demand synthesis for document ${documentId}.`);
           const result = await playFromOnDemand(options.text || fullText);
           audio = result.audio;
           timepoints = result.timepoints;
@@ -107,22 +255,7 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
 
       audioRef.current = audio;
 
-      audio.ontimeupdate = () => {
-        let currentWordTimepoint = null;
-        for (let i = 0; i < timepoints.length; i++) {
-          const tp = timepoints[i];
-          if (audio.currentTime >= tp.time_seconds) {
-            currentWordTimepoint = tp;
-          } else {
-            break;
-          }
-        }
-
-        if (currentWordTimepoint && lastHighlightedTimepointRef.current?.mark_name !== currentWordTimepoint.mark_name) {
-          setActiveTimepoint(currentWordTimepoint);
-          lastHighlightedTimepointRef.current = currentWordTimepoint;
-        }
-      };
+      audio.ontimeupdate = () => highlightAt(timepoints, audio.currentTime);
 
       audio.onended = () => {
         isPlayingRef.current = false;
@@ -151,7 +284,7 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
       setError(err instanceof Error ? err.message : String(err));
       stopAudio();
     }
-  }, [documentId, fullText, stopAudio]);
+  }, [documentId, fullText, stopAudio, highlightAt, playSegment]);
 
   const playAudio = useCallback(async (options?: PlayOptions) => {
     console.log('[TTS_PLAYER] playAudio called', {
@@ -194,6 +327,27 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
   }, [status, startPlayback, stopAudio]);
 
   const seekAndPlay = useCallback((timeInSeconds: number) => {
+    const playback = segmentPlaybackRef.current;
+    if (playback && (status === 'playing' || status === 'paused')) {
+      // Timepoints are in document time; find the loaded segment that holds this time
+      const index = playback.loaded.reduce((found, segment, i) => (segment.offset <= timeInSeconds ? i : found), 0);
+      const segment = playback.loaded[index];
+      if (index === playback.index && audioRef.current) {
+        audioRef.current.currentTime = timeInSeconds - segment.offset;
+        if (status === 'paused') {
+          audioRef.current.play();
+          isPlayingRef.current = true;
+          setStatus('playing');
+        }
+      } else {
+        playSegment(playback, index, timeInSeconds - segment.offset).catch(err => {
+          console.error('Error seeking to segment:', err);
+          stopAudio();
+        });
+      }
+      return;
+    }
+
     if (audioRef.current && (status === 'playing' || status === 'paused')) {
       audioRef.current.currentTime = timeInSeconds;
       if (status === 'paused') {
@@ -205,7 +359,7 @@ export const useTTSPlayer = (documentId: string | null, fullText: string = '') =
       seekToTimeRef.current = timeInSeconds;
       playAudio();
     }
-  }, [status, playAudio]);
+  }, [status, playAudio, playSegment, stopAudio]);
 
   useEffect(() => {
     return () => stopAudio();
@@ -33,8 +33,15 @@ interface DocumentData {
   file_type: string;
   original_filename: string;
   content_length: number;
+  status?: string;
+  processing?: boolean;
+  processing_error?: string | null;
+  content_partial?: boolean;
 }
 
+// How often to re-fetch a document whose ingestion pipeline is still running
+const PROCESSING_POLL_INTERVAL_MS = 3000;
+
 const DocumentView: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const { currentUser, getAuthToken } = useAuth();
@@ -74,10 +81,16 @@ const DocumentView: React.FC = () => {
   };
 
   useEffect(() => {
-    const fetchDocument = async () => {
+    let cancelled = false;
+    let pollTimer: ReturnType<typeof setTimeout> | undefined;
+
+    // Uploads are processed in the background; keep polling until the document leaves the pipeline
+    const fetchDocument = async (initialLoad: boolean) => {
       if (!currentUser || !id) return;
-      setLoading(true);
-      setError(null);
+      if (initialLoad) {
+        setLoading(true);
+        setError(null);
+      }
       try {
         const token = await getAuthToken();
         if (!token) throw new Error('Authentication token not available');
@@ -85,15 +98,24 @@ const DocumentView: React.FC = () => {
         const response = await axios.get(`${apiUrl}/api/documents/${id}?include_content=true`, {
           headers: { 'Authorization': `Bearer ${token}` }
         });
+        if (cancelled) return;
         setDocument(response.data);
+        if (response.data.processing) {
+          pollTimer = setTimeout(() => fetchDocument(false), PROCESSING_POLL_INTERVAL_MS);
+        }
       } catch (error) {
         console.error('Error fetching document:', error);
-        setError('Failed to load document. Please try again.');
+        if (!cancelled) setError('Failed to load document. Please try again.');
       } finally {
-        setLoading(false);
+        if (initialLoad && !cancelled) setLoading(false);
       }
     };
-    fetchDocument();
+    fetchDocument(true);
+
+    return () => {
+      cancelled = true;
+      if (pollTimer) clearTimeout(pollTimer);
+    };
   }, [currentUser, id, getAuthToken]);
 
   useEffect(() => {
@@ -145,7 +167,13 @@ const DocumentView: React.FC = () => {
       case 'read':
         return (
           <div className="p-4 sm:p-6 lg:p-8" style={{ fontSize: `${fontSize}px`, lineHeight: lineSpacing }}>
-            {(status === 'playing' || status === 'paused' || (wordTimepoints && wordTimepoints.length > 0)) ? (
+            {document.processing && (
+              <div className="flex items-center mb-4 text-sm text-foreground">
+                <Loader className="h-4 w-4 mr-2 animate-spin" />
+                {document.content_partial ? 'Still generating the rest of this document...' : 'Processing document...'}
+              </div>
+            )}
+            {document.processing && !document.content ? null : (status === 'playing' || status === 'paused' || (wordTimepoints && wordTimepoints.length > 0)) ? (
               <SpeakableDocumentContent
                 wordTimepoints={wordTimepoints}
                 activeTimepoint={activeTimepoint}
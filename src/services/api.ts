@@ -221,12 +221,8 @@ export const apiService = {
     message: string;
     filename: string;
     name: string;
-    gcs_uri: string;
     status: string;
-    dua_processed: boolean;
-    ocr_processed: boolean;
-    dua_narrative_snippet: string | null;
-    processing_error: string | null;
+    job_id: string;
   }> {
     const formData = new FormData();
     formData.append('file', file);
@@ -256,6 +252,30 @@ export const apiService = {
     return response.data;
   },
 
+  // List a document's read-aloud segments (synthesized on demand, one per paragraph or sentence group)
+  async getTtsSegmentManifest(documentId: string): Promise<{
+    segment_count: number;
+    total_duration_seconds: number;
+    partial: boolean;
+    segments: { index: number; paragraph_index: number; duration_seconds: number; duration_estimated: boolean }[];
+  }> {
+    const response = await api.get(`/api/documents/${documentId}/tts-segments`);
+    return response.data;
+  },
+
+  // Get one read-aloud segment; its timepoints are relative to the segment start
+  async getTtsSegment(documentId: string, index: number): Promise<{
+    index: number;
+    segment_count: number;
+    duration_seconds: number;
+    timepoints: any[];
+    audio_mime_type: string;
+    audio_content_base64: string;
+  }> {
+    const response = await api.get(`/api/documents/${documentId}/tts-segments/${index}`);
+    return response.data;
+  },
+
   // Cancel an active quiz session
   async cancelQuiz(threadId: string): Promise<void> {
     await api.post('/api/v2/agent/chat', {
@@ -192,3 +192,36 @@ export const playAudioFromBase64 = (audioData: string, format = 'mp3'): HTMLAudi
 
   return audio;
 };
+
+/**
+ * Compact timepoints as stored for pre-generated document audio
+ * (see backend/utils/timepoint_codec.py)
+ */
+export interface CompactTimepoints {
+  v: number;
+  tokens: string[];
+  token_ids: number[];
+  delta_ms: number[];
+}
+
+/**
+ * Normalize timepoints to the list-of-objects form, expanding the compact
+ * parallel-array encoding if needed
+ *
+ * @param data Timepoints as a list or in compact form
+ * @returns List of { mark_name, time_seconds }
+ */
+export const normalizeTimepoints = (
+  data: { mark_name: string; time_seconds: number }[] | CompactTimepoints | null | undefined
+): { mark_name: string; time_seconds: number }[] => {
+  if (!data) return [];
+  if (Array.isArray(data)) return data;
+
+  const timepoints: { mark_name: string; time_seconds: number }[] = new Array(data.token_ids.length);
+  let timeMs = 0;
+  for (let i = 0; i < data.token_ids.length; i++) {
+    timeMs += data.delta_ms[i];
+    timepoints[i] = { mark_name: data.tokens[data.token_ids[i]], time_seconds: timeMs / 1000 };
+  }
+  return timepoints;
+};